@@ -17,8 +17,9 @@ export async function queryRag(payload) {
   } catch (error) {
     console.error("RAG Service Error:", error.response?.status, error.response?.data || error.message);
     
-    // If Python backend is down or returning non-JSON, return a fallback response
-    if (error.response?.status === 404 || error.code === 'ECONNREFUSED' || error.message.includes('not valid JSON')) {
+    // If Python backend is down, overloaded (429/503) or returning non-JSON, return a fallback response
+    const status = error.response?.status;
+    if (status === 404 || status === 429 || status === 503 || error.code === 'ECONNREFUSED' || error.message.includes('not valid JSON')) {
       console.warn("Python backend unavailable, using fallback response");
       return {
         response: "I apologize, but I'm having trouble connecting to my knowledge base right now. However, I can still help you with basic tasks. Please try again in a moment, or let me know if you need immediate assistance.",
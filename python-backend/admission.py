@@ -0,0 +1,212 @@
+"""
+Admission control for LLM calls.
+
+At most LLM_MAX_CONCURRENCY LLM calls per worker run at once; a request
+holds a slot only for its LLM call, not for retrieval or cache hits.
+Further calls wait in a bounded queue (LLM_QUEUE_MAX), served by
+priority and then arrival order:
+
+    FOLLOW_UP    a later turn of a session the worker already holds
+    NEW_SESSION  a first turn
+    BATCH        an item of /chat/batch, or a background summary
+
+A request that cannot be admitted fails fast with AdmissionRejected,
+which the API turns into a 429 or 503 with Retry-After:
+
+    queue_full  the queue is full of requests at least as urgent (429)
+    evicted     a more urgent request took its place in the queue (503)
+    timeout     no slot freed up within LLM_QUEUE_TIMEOUT_SECONDS or
+                the request's own deadline (503)
+
+Retry-After is estimated from the recent time requests hold a slot.
+The controller is per process and must be used from one event loop.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
+from config import settings
+from metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS
+
+# Priorities, most urgent first
+FOLLOW_UP = 0
+NEW_SESSION = 1
+BATCH = 2
+PRIORITY_NAMES = {FOLLOW_UP: "follow_up", NEW_SESSION: "new_session", BATCH: "batch"}
+
+# Slot hold time assumed until requests have been measured, in seconds
+DEFAULT_HOLD_SECONDS = 1.0
+# Weight of the newest hold time in the running average
+HOLD_SMOOTHING = 0.1
+# Bounds of the Retry-After estimate, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 30
+
+
+class AdmissionRejected(Exception):
+    """A request was shed instead of waiting for an LLM slot."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request not admitted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+class Ticket:
+    """An admitted request's slot; release() is safe to call more than once."""
+
+    def __init__(self, controller: Optional["AdmissionController"]):
+        self._controller = controller
+        self._started = time.monotonic()
+
+    def release(self) -> None:
+        controller, self._controller = self._controller, None
+        if controller is not None:
+            controller._release(time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, prioritized wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        """
+        Args:
+            max_concurrency: Requests admitted at once (0 = no limit)
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Longest wait for a slot, in seconds
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._hold_seconds = DEFAULT_HOLD_SECONDS
+
+    @property
+    def in_flight(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a request sent now would likely get a slot."""
+        if self.max_concurrency <= 0:
+            return MIN_RETRY_AFTER
+        estimate = self._hold_seconds * (len(self._waiters) + 1) / self.max_concurrency
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    async def acquire(self, priority: int, deadline: Optional[float] = None) -> Ticket:
+        """
+        Wait for a slot, or raise AdmissionRejected.
+
+        Args:
+            priority: FOLLOW_UP, NEW_SESSION or BATCH
+            deadline: time.monotonic() by which the request must have
+                started (default: LLM_QUEUE_TIMEOUT_SECONDS from now)
+        """
+        if self.max_concurrency <= 0:
+            return Ticket(None)
+
+        name = PRIORITY_NAMES[priority]
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            ADMISSION_WAIT_SECONDS.observe(0.0, priority=name)
+            return Ticket(self)
+
+        if len(self._waiters) >= self.max_queue:
+            lowest = max(self._waiters) if self._waiters else None
+            if lowest is None or lowest.priority <= priority:
+                raise self._reject("queue_full", name)
+            # Shed the least urgent, most recent waiter to make room
+            self._remove(lowest)
+            lowest.future.set_exception(self._reject("evicted", PRIORITY_NAMES[lowest.priority]))
+
+        started = time.monotonic()
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - started)
+        if timeout <= 0:
+            raise self._reject("timeout", name)
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await asyncio.wait({waiter.future}, timeout=timeout)
+        except asyncio.CancelledError:
+            # The client went away: give back a slot granted meanwhile
+            if waiter.future.done() and not waiter.future.exception():
+                self._release(self._hold_seconds)
+            else:
+                self._remove(waiter)
+                waiter.future.cancel()
+            raise
+
+        if not waiter.future.done():
+            self._remove(waiter)
+            waiter.future.cancel()
+            raise self._reject("timeout", name)
+        waiter.future.result()  # raises if evicted
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - started, priority=name)
+        return Ticket(self)
+
+    @asynccontextmanager
+    async def slot(self, priority: int, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot for the enclosed block (see acquire)."""
+        ticket = await self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    def _release(self, held_seconds: float) -> None:
+        self._hold_seconds += HOLD_SMOOTHING * (held_seconds - self._hold_seconds)
+        self._active -= 1
+        # Hand the slot straight to the most urgent waiter
+        while self._waiters and self._active < self.max_concurrency:
+            waiter = heapq.heappop(self._waiters)
+            if not waiter.future.done():
+                self._active += 1
+                waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+
+    def _reject(self, reason: str, priority_name: str) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.inc(reason=reason, priority=priority_name)
+        return AdmissionRejected(reason, self.retry_after())
+
+
+# ------------------------------------------------------------------
+# Global instance
+# ------------------------------------------------------------------
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.llm_max_concurrency,
+    max_queue=settings.llm_queue_max,
+    queue_timeout=settings.llm_queue_timeout_seconds,
+)
@@ -0,0 +1,238 @@
+"""
+Overload the chat endpoint with and without LLM admission control.
+
+Serves the FastAPI app through httpx's ASGI transport with a stub LLM
+of limited capacity (SaturatingChatModel: past --llm-capacity calls in
+flight, every call slows down) and sends /api/v1/chat requests at a
+fixed arrival rate above that capacity, once per scenario in its own
+process:
+
+    unlimited  LLM_MAX_CONCURRENCY=0, every request goes to the LLM
+    limited    --max-concurrency / --queue-max / --queue-timeout
+
+A --follow-up share of requests continue a session opened earlier in
+the run; the rest start a new one. For each kind the report shows
+requests answered by the LLM within --client-timeout (the Node
+ragService timeout), answered from the documents after the LLM call
+timed out (LLM_RETRIEVAL_FALLBACK), answered late, shed with 429 / 503,
+and answer latency percentiles, plus the peak LLM calls in flight. Run
+from the python-backend folder:
+
+    python benchmarks/admission_bench.py --rate 40 --duration 20 \\
+        --llm-capacity 8 --max-concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+REPLY = "A technician can take care of that for you; most visits take about an hour."
+QUERIES = [
+    "How much does an oil change cost?",
+    "Can I book a tire rotation this Saturday?",
+    "Is the extended warranty transferable?",
+    "How long does a brake pad replacement take?",
+    "Can I get a loaner vehicle during service?",
+]
+KINDS = ("follow_up", "new_session")
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_child(args) -> None:
+    """Run one scenario and print measurements as JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    import httpx
+
+    from main import app
+    from rag_system import RETRIEVAL_FALLBACK_MESSAGE, rag_system
+    from stubs import HashingEmbeddings, SaturatingChatModel, parse_latency
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "service.txt").write_text(
+        "Oil changes cost $49 and take about 45 minutes. Tire rotations are "
+        "free with any service. Brake pad replacement takes about two hours. "
+        "Loaner vehicles are available for visits longer than three hours. "
+        "The extended warranty transfers to a new owner for a $50 fee.",
+        encoding="utf-8",
+    )
+
+    llm = SaturatingChatModel(
+        REPLY, latency=parse_latency(args.llm_latency, seed=args.seed), capacity=args.llm_capacity
+    )
+    rag_system.initialize(embeddings=HashingEmbeddings(), llm=llm)
+
+    rows = {
+        kind: {
+            "requests": 0, "answered": 0, "fallback": 0, "late": 0,
+            "shed_429": 0, "shed_503": 0, "latencies": [],
+        }
+        for kind in KINDS
+    }
+    sessions = []
+
+    async def drive():
+        rng = random.Random(args.seed)
+        limits = httpx.Limits(max_connections=None)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", limits=limits, timeout=None
+        ) as client:
+
+            async def one(query, session_id):
+                row = rows["follow_up" if session_id else "new_session"]
+                row["requests"] += 1
+                body = {"query": query}
+                if session_id:
+                    body["session_id"] = session_id
+                started = time.perf_counter()
+                response = await client.post("/api/v1/chat", json=body)
+                elapsed = time.perf_counter() - started
+                if response.status_code in (429, 503):
+                    row[f"shed_{response.status_code}"] += 1
+                    return
+                response.raise_for_status()
+                result = response.json()
+                row["latencies"].append(elapsed * 1000)
+                if elapsed > args.client_timeout:
+                    row["late"] += 1
+                elif result["response"].startswith(RETRIEVAL_FALLBACK_MESSAGE):
+                    row["fallback"] += 1
+                else:
+                    row["answered"] += 1
+                if not session_id:
+                    sessions.append(result["session_id"])
+
+            tasks = []
+            started = time.monotonic()
+            # Open-loop Poisson arrivals: shedding must not slow the offered load
+            while time.monotonic() - started < args.duration:
+                session_id = rng.choice(sessions) if sessions and rng.random() < args.follow_up else None
+                tasks.append(asyncio.create_task(one(rng.choice(QUERIES), session_id)))
+                await asyncio.sleep(rng.expovariate(args.rate))
+            await asyncio.gather(*tasks)
+
+    asyncio.run(drive())
+
+    result = {"peak_llm_in_flight": llm.peak_in_flight}
+    for kind, row in rows.items():
+        latencies = sorted(row.pop("latencies"))
+        result[kind] = {
+            **row,
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+        }
+    print(json.dumps(result))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenarios", default="unlimited,limited")
+    parser.add_argument("--rate", type=float, default=40.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of offered load")
+    parser.add_argument("--llm-latency", default="lognormal:400:0.4", help="see stubs.parse_latency")
+    parser.add_argument("--llm-capacity", type=int, default=8, help="LLM calls served at full speed")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="LLM_MAX_CONCURRENCY when limited")
+    parser.add_argument("--queue-max", type=int, default=16, help="LLM_QUEUE_MAX when limited")
+    parser.add_argument("--queue-timeout", type=float, default=3.0, help="LLM_QUEUE_TIMEOUT_SECONDS when limited")
+    parser.add_argument("--follow-up", type=float, default=0.5, help="share of requests continuing a session")
+    parser.add_argument("--client-timeout", type=float, default=10.0, help="seconds the caller waits for an answer")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    scenarios = {
+        "unlimited": {"LLM_MAX_CONCURRENCY": "0"},
+        "limited": {
+            "LLM_MAX_CONCURRENCY": str(args.max_concurrency),
+            "LLM_QUEUE_MAX": str(args.queue_max),
+            "LLM_QUEUE_TIMEOUT_SECONDS": str(args.queue_timeout),
+        },
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.scenarios.split(","):
+            env = {
+                **os.environ,
+                "DATA_FOLDER": str(Path(tmp) / "data"),
+                "VECTOR_STORE_PATH": str(Path(tmp) / f"store-{name}"),
+                "SESSION_BACKEND": "memory",
+                "RESPONSE_CACHE_ENABLED": "false",
+                "MIN_SIMILARITY_SCORE": "0",
+                **scenarios[name],
+            }
+            command = [
+                sys.executable, __file__, "--child",
+                "--data-dir", env["DATA_FOLDER"],
+                "--rate", str(args.rate),
+                "--duration", str(args.duration),
+                "--llm-latency", args.llm_latency,
+                "--llm-capacity", str(args.llm_capacity),
+                "--follow-up", str(args.follow_up),
+                "--client-timeout", str(args.client_timeout),
+                "--seed", str(args.seed),
+            ]
+            completed = subprocess.run(
+                command, cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+            )
+            results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print(
+        f"{args.rate:g} req/s for {args.duration:g}s, LLM latency {args.llm_latency} "
+        f"at up to {args.llm_capacity} calls, {args.follow_up:.0%} follow-ups; limited = "
+        f"{args.max_concurrency} slots, queue {args.queue_max}, wait {args.queue_timeout:g}s\n"
+    )
+    print(
+        f"{'scenario':<10} {'kind':<12} {'reqs':>5} {'answered':>8} {'fallback':>8} {'late':>5} {'429':>5} "
+        f"{'503':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'LLM peak':>9}"
+    )
+    for name, result in results.items():
+        for kind in KINDS:
+            row = result[kind]
+            print(
+                f"{name:<10} {kind:<12} {row['requests']:>5} {row['answered']:>8} {row['fallback']:>8} {row['late']:>5} "
+                f"{row['shed_429']:>5} {row['shed_503']:>5} {row['p50_ms']:>8.0f} "
+                f"{row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} {result['peak_llm_in_flight']:>9}"
+            )
+
+    if args.output:
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "child", "data_dir")},
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Benchmark embedding backends on the CPU.
+
+Compares the PyTorch sentence-transformer with the ONNX Runtime export
+(fp32 and int8, see export_onnx.py): throughput for single queries and
+for ingestion-sized batches, plus cosine parity with the PyTorch
+vectors. Run from the python-backend folder:
+
+    python benchmarks/embedding_bench.py --threads 4
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402
+from onnx_embeddings import OnnxEmbeddings, default_model_path  # noqa: E402
+
+VOCABULARY = (
+    "vehicle service warranty financing lease oil change brake pads tire rotation "
+    "appointment dealership hours inspection battery transmission coolant recall "
+    "mileage trade-in credit approval insurance detailing alignment filter engine"
+).split()
+
+
+def sentences(count: int, words: int, rng: random.Random):
+    return [
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(words // 2, words)))
+        for _ in range(count)
+    ]
+
+
+def load_backends(threads: int, model_path: str):
+    backends = {}
+    try:
+        import torch
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        backends["torch"] = HuggingFaceEmbeddings(
+            model_name=settings.embedding_model, model_kwargs={"device": "cpu"}
+        )
+    except ImportError as e:
+        print(f"Skipping torch: {e}")
+
+    for label, quantized in (("onnx", False), ("onnx-int8", True)):
+        try:
+            backends[label] = OnnxEmbeddings(model_path, quantized=quantized, threads=threads)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"Skipping {label}: {e}")
+    return backends
+
+
+def throughput(embeddings, texts, batch_size: int) -> float:
+    """Texts per second embedding `texts` batch_size at a time."""
+    if batch_size == 1:
+        embeddings.embed_query(texts[0])  # warm-up
+        started = time.perf_counter()
+        for text in texts:
+            embeddings.embed_query(text)
+    else:
+        embeddings.embed_documents(texts[:batch_size])  # warm-up
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            embeddings.embed_documents(texts[start : start + batch_size])
+    return len(texts) / (time.perf_counter() - started)
+
+
+def parity(reference, candidate, texts):
+    import numpy as np
+
+    expected = np.asarray(reference.embed_documents(texts))
+    actual = np.asarray(candidate.embed_documents(texts))
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosines = (expected * actual).sum(axis=1)
+    return float(cosines.min()), float(cosines.mean())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=settings.embedding_threads)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=settings.ingest_batch_size)
+    parser.add_argument(
+        "--model-path",
+        default=settings.onnx_model_path or default_model_path(settings.embedding_model),
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    query_texts = sentences(args.queries, 14, rng)
+    chunk_texts = sentences(args.chunks, 160, rng)
+
+    backends = load_backends(args.threads, args.model_path)
+    if not backends:
+        print("No embedding backend available")
+        return 1
+
+    results = []
+    reference = backends.get("torch")
+    for name, embeddings in backends.items():
+        row = {
+            "backend": name,
+            "query_per_s": round(throughput(embeddings, query_texts, 1), 1),
+            "ingest_per_s": round(throughput(embeddings, chunk_texts, args.batch_size), 1),
+        }
+        if reference is not None and embeddings is not reference:
+            row["min_cosine"], row["mean_cosine"] = (
+                round(value, 5) for value in parity(reference, embeddings, query_texts[:64] + chunk_texts[:64])
+            )
+        results.append(row)
+
+    print(f"\nthreads={args.threads or 'default'}, ingestion batch={args.batch_size}\n")
+    print(f"{'backend':<10} {'queries/s':>10} {'chunks/s':>10} {'min cos':>8} {'mean cos':>9}")
+    for row in results:
+        print(
+            f"{row['backend']:<10} {row['query_per_s']:>10.1f} {row['ingest_per_s']:>10.1f} "
+            f"{row.get('min_cosine', '-'):>8} {row.get('mean_cosine', '-'):>9}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
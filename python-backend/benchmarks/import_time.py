@@ -0,0 +1,123 @@
+"""
+Measure how long `import main` takes, i.e. how long uvicorn waits before
+it can bind the port.
+
+Each run imports the app in a fresh interpreter. Pass --compare-ref to
+also measure another git revision of python-backend (for example the
+commit before lazy loading) in a temporary checkout. Run from the
+python-backend folder:
+
+    python benchmarks/import_time.py --runs 5 --compare-ref HEAD~1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def time_import(app_dir: Path, runs: int) -> dict:
+    """Wall-clock seconds for `import main` in a fresh interpreter."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import main"],
+            cwd=app_dir,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "runs": runs,
+        "min_s": round(min(timings), 3),
+        "median_s": round(statistics.median(timings), 3),
+        "max_s": round(max(timings), 3),
+    }
+
+
+def slowest_imports(app_dir: Path, limit: int) -> list:
+    """Top modules by cumulative import time, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=app_dir,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        # Keep only top-level imports; nested rows are already included
+        if len(module) - len(module.lstrip()) > 1:
+            continue
+        rows.append((int(cumulative_us), module.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in rows[:limit]]
+
+
+def export_revision(ref: str, target: Path) -> Path:
+    """Extract python-backend at a git revision into target."""
+    archive = subprocess.run(
+        ["git", "archive", ref, "."],
+        cwd=BACKEND_DIR,
+        check=True,
+        capture_output=True,
+    ).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+    # Reuse the local data, prompts and .env so both trees start alike
+    for name in (".env", "data", "prompts", "chroma_db"):
+        source = BACKEND_DIR / name
+        if source.exists() and not (target / name).exists():
+            (target / name).symlink_to(source)
+    return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--compare-ref", help="git revision to measure as the baseline")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"current": time_import(BACKEND_DIR, args.runs)}
+    results["current"]["slowest_imports"] = slowest_imports(BACKEND_DIR, args.top)
+
+    if args.compare_ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline_dir = export_revision(args.compare_ref, Path(tmp))
+            results[args.compare_ref] = time_import(baseline_dir, args.runs)
+
+    print(f"{'tree':<16} {'min s':>8} {'median s':>9} {'max s':>8}")
+    for name, result in results.items():
+        print(f"{name:<16} {result['min_s']:>8.3f} {result['median_s']:>9.3f} {result['max_s']:>8.3f}")
+
+    print("\nSlowest imports (current tree):")
+    for row in results["current"]["slowest_imports"]:
+        print(f"  {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Benchmark document ingestion on a synthetic corpus.
+
+Generates a corpus of text files, then builds a fresh index through the
+normal RAGSystem startup path once per (workers, batch size) setting,
+each in its own process so peak memory is measured in isolation. Run
+from the python-backend folder:
+
+    python benchmarks/ingestion_bench.py --files 500 --workers 1,4 --batch-sizes 64,512
+
+By default a hashing stub replaces the embedding model so the numbers
+reflect the pipeline itself; pass --embeddings hf to use the configured
+sentence-transformer.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+VOCABULARY = (
+    "vehicle service warranty financing lease oil change brake pads tire rotation "
+    "appointment dealership hours inspection battery transmission coolant recall "
+    "mileage trade-in credit approval insurance detailing alignment filter engine"
+).split()
+
+
+def generate_corpus(target: Path, files: int, file_kb: int, seed: int = 7) -> int:
+    """Write synthetic manuals; returns total bytes written."""
+    rng = random.Random(seed)
+    target.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for index in range(files):
+        paragraphs = []
+        size = 0
+        while size < file_kb * 1024:
+            sentence_count = rng.randint(3, 8)
+            paragraph = " ".join(
+                " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 20))).capitalize() + "."
+                for _ in range(sentence_count)
+            )
+            paragraphs.append(paragraph)
+            size += len(paragraph) + 2
+        text = "\n\n".join(paragraphs)
+        (target / f"manual_{index:05d}.txt").write_text(text, encoding="utf-8")
+        total += len(text)
+    return total
+
+
+def run_child(args) -> None:
+    """Build the index once and print measurements as JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    from rag_system import rag_system
+    from stubs import HashingEmbeddings, StubChatModel
+
+    embeddings = HashingEmbeddings() if args.embeddings == "stub" else None
+
+    started = time.perf_counter()
+    rag_system.initialize(embeddings=embeddings, llm=StubChatModel())
+    elapsed = time.perf_counter() - started
+
+    store = Path(os.environ["VECTOR_STORE_PATH"])
+    generation = (store / "CURRENT").read_text(encoding="utf-8").strip()
+    manifest = json.loads(
+        (store / f"gen-{int(generation):06d}" / "index_manifest.json").read_text(encoding="utf-8")
+    )
+    chunks = sum(len(entry["chunks"]) for entry in manifest["files"].values())
+
+    print(json.dumps({
+        "elapsed_s": round(elapsed, 3),
+        "chunks": chunks,
+        "chunks_per_s": round(chunks / elapsed, 1) if elapsed else None,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--file-kb", type=int, default=20)
+    parser.add_argument("--workers", default="1,4", help="comma-separated INGEST_WORKERS values")
+    parser.add_argument("--batch-sizes", default="64,512", help="comma-separated INGEST_BATCH_SIZE values")
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        corpus_bytes = generate_corpus(data_dir, args.files, args.file_kb)
+        print(f"Corpus: {args.files} files, {corpus_bytes / 1e6:.1f} MB\n")
+
+        for workers in (int(value) for value in args.workers.split(",")):
+            for batch_size in (int(value) for value in args.batch_sizes.split(",")):
+                store_dir = Path(tmp) / f"store-w{workers}-b{batch_size}"
+                env = {
+                    **os.environ,
+                    "DATA_FOLDER": str(data_dir),
+                    "VECTOR_STORE_PATH": str(store_dir),
+                    "INGEST_WORKERS": str(workers),
+                    "INGEST_BATCH_SIZE": str(batch_size),
+                    "PROMPTS_FOLDER": str(BACKEND_DIR / "prompts"),
+                }
+                completed = subprocess.run(
+                    [sys.executable, __file__, "--child", "--embeddings", args.embeddings],
+                    cwd=BACKEND_DIR,
+                    env=env,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+                measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+                measurement.update(workers=workers, batch_size=batch_size)
+                results.append(measurement)
+
+    print(f"{'workers':>7} {'batch':>6} {'chunks':>8} {'seconds':>8} {'chunks/s':>9} {'peak MB':>8} {'worker MB':>10}")
+    for row in results:
+        print(
+            f"{row['workers']:>7} {row['batch_size']:>6} {row['chunks']:>8} {row['elapsed_s']:>8.2f} "
+            f"{row['chunks_per_s']:>9.0f} {row['peak_rss_mb']:>8.1f} {row['peak_worker_rss_mb']:>10.1f}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"files": args.files, "file_kb": args.file_kb, "results": results}, indent=2),
+            encoding="utf-8",
+        )
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Load test for the chat pipeline, run offline and in-process.
+
+Serves the FastAPI app through httpx's ASGI transport, with a stub chat
+model that answers after a configurable latency and the hashing stub
+(or the configured sentence-transformer) for embeddings. Drives
+/api/v1/chat at each concurrency level in its own process and reports
+latency percentiles, requests/sec, peak RSS and mean time per pipeline
+stage. Run from the python-backend folder:
+
+    python benchmarks/load_test.py --concurrency 1,8,32 --requests 500 \\
+        --llm-latency lognormal:300:0.4 --output load.json
+
+Pass --baseline with an earlier --output file to print the change
+against it, e.g. to compare two commits.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+TOPICS = [
+    "oil change", "brake pads", "tire rotation", "battery replacement",
+    "transmission service", "coolant flush", "recall inspection", "detailing",
+    "extended warranty", "lease return", "trade-in appraisal", "loaner vehicle",
+]
+TEMPLATES = [
+    "How much does a {topic} cost for a {year} sedan?",
+    "Can I book a {topic} this {day}?",
+    "How long does a {topic} usually take?",
+    "Is a {topic} covered by the warranty on a {year} truck?",
+    "What do I need to bring for a {topic}?",
+]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+REPLY = (
+    "A technician can take care of that for you. Most visits take about an hour, "
+    "and you can wait in the lounge or use the shuttle. Let me know if you would "
+    "like me to book a time."
+)
+
+
+def make_queries(count: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            topic=rng.choice(TOPICS), year=rng.randint(2012, 2025), day=rng.choice(DAYS)
+        )
+        for _ in range(count)
+    ]
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_child(args) -> None:
+    """Run one concurrency level and print measurements as JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    import httpx
+
+    from main import app
+    from metrics import STAGE_SECONDS
+    from rag_system import rag_system
+    from stubs import HashingEmbeddings, StubChatModel, parse_latency
+
+    embeddings = HashingEmbeddings() if args.embeddings == "stub" else None
+    llm = StubChatModel(REPLY, latency=parse_latency(args.llm_latency, seed=args.seed))
+    rag_system.initialize(embeddings=embeddings, llm=llm)
+
+    queries = make_queries(args.requests + args.warmup, args.seed)
+    latencies = []
+    errors = 0
+
+    async def drive(warm):
+        limits = httpx.Limits(max_connections=None)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", limits=limits, timeout=None
+        ) as client:
+
+            async def send(query, session_id=None, record=True):
+                nonlocal errors
+                body = {"query": query}
+                if session_id:
+                    body["session_id"] = session_id
+                started = time.perf_counter()
+                response = await client.post("/api/v1/chat", json=body)
+                elapsed = (time.perf_counter() - started) * 1000
+                if not record:
+                    return None
+                if response.status_code != 200:
+                    errors += 1
+                    return None
+                latencies.append(elapsed)
+                return response.json().get("session_id")
+
+            for query in queries[: args.warmup]:
+                await send(query, record=False)
+            warm.update(STAGE_SECONDS.totals())
+
+            pending = iter(queries[args.warmup :])
+
+            async def worker():
+                session_id, turns = None, 0
+                for query in pending:
+                    if turns >= args.session_turns:
+                        session_id, turns = None, 0
+                    session_id = await send(query, session_id)
+                    turns += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            return time.perf_counter() - started
+
+    warm = {}
+    elapsed = asyncio.run(drive(warm))
+    latencies.sort()
+
+    # Stage means over the measured requests only
+    stages = {}
+    for key, (count, total) in sorted(STAGE_SECONDS.totals().items()):
+        warm_count, warm_total = warm.get(key, (0, 0.0))
+        if count > warm_count:
+            stages[key[0]] = round((total - warm_total) / (count - warm_count) * 1000, 3)
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round((len(latencies) + errors) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stage_mean_ms": stages,
+    }))
+
+
+def print_comparison(results, baseline_path: str) -> None:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    previous = {row["concurrency"]: row for row in baseline["results"]}
+    print(f"\nChange against {baseline_path} (commit {baseline.get('commit')})\n")
+    print(f"{'conc':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8}")
+    for row in results:
+        old = previous.get(row["concurrency"])
+        if old is None:
+            continue
+        deltas = [
+            100 * (row[key] - old[key]) / old[key] if old[key] else 0.0
+            for key in ("p50_ms", "p95_ms", "p99_ms", "rps")
+        ]
+        print(f"{row['concurrency']:>5} " + " ".join(f"{delta:>+7.1f}%" for delta in deltas))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--llm-latency", default="lognormal:300:0.4",
+        help="stub LLM latency in ms: 0 | fixed:MS | uniform:LO:HI | normal:MEAN:SD | lognormal:MEDIAN:SIGMA",
+    )
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--session-turns", type=int, default=1, help="requests per session before starting a new one")
+    parser.add_argument("--response-cache", action="store_true", help="leave the response cache enabled")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.concurrency = int(args.concurrency)
+        run_child(args)
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for level in (int(value) for value in args.concurrency.split(",")):
+            env = {
+                **os.environ,
+                "VECTOR_STORE_PATH": str(Path(tmp) / f"store-{level}"),
+                "SESSION_BACKEND": "memory",
+                "RESPONSE_CACHE_ENABLED": "true" if args.response_cache else "false",
+            }
+            command = [
+                sys.executable, __file__, "--child",
+                "--concurrency", str(level),
+                "--requests", str(args.requests),
+                "--warmup", str(args.warmup),
+                "--llm-latency", args.llm_latency,
+                "--embeddings", args.embeddings,
+                "--session-turns", str(args.session_turns),
+                "--seed", str(args.seed),
+            ]
+            completed = subprocess.run(
+                command, cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+            )
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"LLM latency {args.llm_latency}, {args.embeddings} embeddings, {args.requests} requests per level\n")
+    print(f"{'conc':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'peak MB':>8}")
+    for row in results:
+        print(
+            f"{row['concurrency']:>5} {row['rps']:>8.1f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+            f"{row['p99_ms']:>9.1f} {row['errors']:>7} {row['peak_rss_mb']:>8.1f}"
+        )
+    print("\nMean ms per stage")
+    for row in results:
+        stages = ", ".join(f"{stage} {ms:.2f}" for stage, ms in row["stage_mean_ms"].items())
+        print(f"{row['concurrency']:>5}  {stages}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {
+                key: value for key, value in vars(args).items()
+                if key not in ("output", "baseline", "child")
+            },
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
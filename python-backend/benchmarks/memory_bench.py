@@ -0,0 +1,129 @@
+"""
+Benchmark prompt size per turn for the conversation memory modes.
+
+Plays the same scripted conversation through RAGSystem.aquery once with
+MEMORY_MODE=window and once with MEMORY_MODE=summary, each in its own
+process, and reports the prompt tokens sent to the LLM on every turn. A
+stub chat model answers (and summarizes) with a fixed reply of typical
+length, and background summaries are awaited between turns, as they
+would finish while the user types. Run from the python-backend folder:
+
+    python benchmarks/memory_bench.py --turns 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+QUESTIONS = [
+    "What are your service department hours on weekends?",
+    "How often should I rotate the tires on a hybrid sedan?",
+    "Can I book an oil change for my truck next Tuesday morning?",
+    "Does the extended warranty cover transmission repairs?",
+    "What financing options do you have for a used electric car?",
+    "Is a loaner vehicle available while my brakes are replaced?",
+    "How long does a full detailing appointment usually take?",
+    "Do you check for open recalls during a routine inspection?",
+]
+
+REPLY = (
+    "Our service department is open from eight to six on weekdays and nine to "
+    "three on Saturdays. I can book that appointment for you, and a technician "
+    "will inspect the brakes, rotate the tires and check for open recalls while "
+    "the vehicle is in. A loaner or the shuttle is available if the work takes "
+    "longer than two hours. Let me know if you would like a reminder before the visit."
+)
+
+
+def run_child(args) -> None:
+    """Play the conversation once and print per-turn measurements as JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    from rag_system import rag_system
+    from stubs import HashingEmbeddings, StubChatModel
+
+    rag_system.initialize(embeddings=HashingEmbeddings(), llm=StubChatModel(REPLY))
+
+    async def converse():
+        session_id = rag_system.get_or_create_session()
+        turns = []
+        for turn in range(args.turns):
+            result = await rag_system.aquery(QUESTIONS[turn % len(QUESTIONS)], session_id)
+            # Let background summarization finish before the next question
+            if rag_system._summary_tasks:
+                await asyncio.gather(*rag_system._summary_tasks)
+            turns.append({
+                "turn": turn + 1,
+                "prompt_tokens": result["prompt_tokens"],
+                "memory_size": result["memory_size"],
+            })
+        return turns
+
+    print(json.dumps(asyncio.run(converse())))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--modes", default="window,summary", help="comma-separated MEMORY_MODE values")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    modes = args.modes.split(",")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            env = {
+                **os.environ,
+                "MEMORY_MODE": mode,
+                "VECTOR_STORE_PATH": str(Path(tmp) / f"store-{mode}"),
+                "RESPONSE_CACHE_ENABLED": "false",
+                "SESSION_BACKEND": "memory",
+            }
+            completed = subprocess.run(
+                [sys.executable, __file__, "--child", "--turns", str(args.turns)],
+                cwd=BACKEND_DIR,
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print(f"Prompt tokens per turn ({args.turns} turns)\n")
+    print(f"{'turn':>4} " + " ".join(f"{mode:>10}" for mode in modes))
+    for index in range(args.turns):
+        print(f"{index + 1:>4} " + " ".join(
+            f"{results[mode][index]['prompt_tokens']:>10}" for mode in modes
+        ))
+    print(f"{'mean':>4} " + " ".join(
+        f"{statistics.fmean(turn['prompt_tokens'] for turn in results[mode]):>10.0f}" for mode in modes
+    ))
+    print(f"{'max':>4} " + " ".join(
+        f"{max(turn['prompt_tokens'] for turn in results[mode]):>10}" for mode in modes
+    ))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
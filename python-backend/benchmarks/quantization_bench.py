@@ -0,0 +1,154 @@
+"""
+Benchmark quantized embedding storage in the NumPy vector index.
+
+Chunks the documents in the data folder exactly as ingestion does,
+embeds them once, and indexes them as float32, float16 and int8. For
+each storage mode and re-scoring factor it reports resident index
+memory, recall@k against exact float32 search, and query latency. Run
+from the python-backend folder:
+
+    python benchmarks/quantization_bench.py --embeddings hf --k 4
+
+If the data folder holds fewer than --min-chunks chunks, synthetic
+chunks are added so that the timings mean something.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from config import settings  # noqa: E402
+from ingestion import iter_source_files, split_files  # noqa: E402
+from stubs import HashingEmbeddings  # noqa: E402
+from vector_index import NumpyVectorIndex  # noqa: E402
+
+VOCABULARY = (
+    "vehicle service warranty financing lease oil change brake pads tire rotation "
+    "appointment dealership hours inspection battery transmission coolant recall "
+    "mileage trade-in credit approval insurance detailing alignment filter engine"
+).split()
+
+
+class PrecomputedEmbeddings:
+    """Serves already-computed vectors so each index build skips the model."""
+
+    def __init__(self, vectors_by_text):
+        self.vectors_by_text = vectors_by_text
+
+    def embed_documents(self, texts):
+        return [self.vectors_by_text[text] for text in texts]
+
+
+def load_chunks(min_chunks: int, rng: random.Random):
+    chunks = []
+    paths = list(iter_source_files(settings.data_folder))
+    for split in split_files(paths, settings.chunk_size, settings.chunk_overlap, workers=1):
+        chunks.extend(split.chunks)
+    real = len(chunks)
+
+    while len(chunks) < min_chunks:
+        chunks.append(" ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(40, 150))))
+    return list(dict.fromkeys(chunks)), real
+
+
+def make_embeddings(kind: str):
+    if kind == "stub":
+        return HashingEmbeddings()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=settings.embedding_model)
+
+
+def search_rows(index, query_vectors, k):
+    rows, latencies = [], []
+    for vector in query_vectors:
+        started = time.perf_counter()
+        results = index.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        rows.append([doc.metadata["row"] for doc, _distance in results])
+    return rows, statistics.median(latencies)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--k", type=int, default=settings.top_k_results)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--min-chunks", type=int, default=5000)
+    parser.add_argument("--rescore-factors", default="1,4,10")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    chunks, real_chunks = load_chunks(args.min_chunks, rng)
+    print(
+        f"{len(chunks)} chunks ({real_chunks} from {settings.data_folder}, "
+        f"{len(chunks) - real_chunks} synthetic)"
+    )
+
+    embeddings = make_embeddings(args.embeddings)
+    started = time.perf_counter()
+    vectors = embeddings.embed_documents(chunks)
+    print(f"Embedded in {time.perf_counter() - started:.1f}s")
+    replay = PrecomputedEmbeddings(dict(zip(chunks, vectors)))
+
+    # Queries: the opening words of randomly chosen chunks
+    query_texts = [
+        " ".join(chunk.split()[:12]) for chunk in rng.sample(chunks, min(args.queries, len(chunks)))
+    ]
+    query_vectors = [embeddings.embed_query(text) for text in query_texts]
+
+    results = []
+    baseline_rows = None
+    baseline_bytes = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in ("float32", "float16", "int8"):
+            index = NumpyVectorIndex(str(Path(tmp) / dtype), replay, dtype=dtype)
+            index.add_texts(chunks, metadatas=[{"row": row} for row in range(len(chunks))])
+            index.persist()
+            stats = index.stats()
+
+            factors = [1] if dtype == "float32" else [int(f) for f in args.rescore_factors.split(",")]
+            for factor in factors:
+                index.rescore_factor = factor
+                rows, p50_ms = search_rows(index, query_vectors, args.k)
+                if baseline_rows is None:
+                    baseline_rows, baseline_bytes = rows, stats["matrix_bytes"]
+
+                hits = sum(len(set(got) & set(want)) for got, want in zip(rows, baseline_rows))
+                total = sum(len(want) for want in baseline_rows)
+                results.append({
+                    "dtype": dtype,
+                    "rescore_factor": factor if dtype != "float32" else None,
+                    "index_mb": round(stats["matrix_bytes"] / 1e6, 2),
+                    "memory_saved_pct": round(100 * (1 - stats["matrix_bytes"] / baseline_bytes), 1),
+                    "recall_at_k": round(hits / total, 4) if total else 1.0,
+                    "p50_ms": round(p50_ms, 3),
+                })
+
+    print(f"\nrecall@{args.k} against exact float32 search, {len(query_vectors)} queries\n")
+    print(f"{'dtype':<8} {'rescore':>7} {'index MB':>9} {'saved %':>8} {'recall':>7} {'p50 ms':>8}")
+    for row in results:
+        rescore = "-" if row["rescore_factor"] is None else row["rescore_factor"]
+        print(
+            f"{row['dtype']:<8} {rescore:>7} {row['index_mb']:>9.2f} {row['memory_saved_pct']:>8.1f} "
+            f"{row['recall_at_k']:>7.4f} {row['p50_ms']:>8.3f}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
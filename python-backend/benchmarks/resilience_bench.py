@@ -0,0 +1,224 @@
+"""
+Exercise the LLM resilience layer against a fault-injecting stub LLM.
+
+Sends chat queries through RAGSystem.aquery at a fixed arrival rate
+while FaultyChatModel returns errors, hangs and (optionally) goes down
+for a while, once per scenario in its own process:
+
+    unprotected  no deadline, retries, breaker or fallback
+    resilient    the configured LLM_* settings (deadline, retries, breaker,
+                 retrieval-only fallback)
+    hedged       resilient plus LLM_HEDGE_ENABLED
+
+and reports how requests ended (LLM answer, retrieval-only fallback,
+error), latency percentiles, how many LLM calls were made, and the
+retry / hedge / timeout / short-circuit counters. Run from the
+python-backend folder:
+
+    python benchmarks/resilience_bench.py --rate 20 --duration 20 \\
+        --error-rate 0.05 --hang-rate 0.02 --outage 8-12
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+REPLY = "A technician can take care of that for you; most visits take about an hour."
+QUERIES = [
+    "How much does an oil change cost?",
+    "Can I book a tire rotation this Saturday?",
+    "Is the extended warranty transferable?",
+    "How long does a brake pad replacement take?",
+    "Can I get a loaner vehicle during service?",
+]
+
+UNPROTECTED = {
+    "LLM_REQUEST_BUDGET_SECONDS": "0",
+    "LLM_ATTEMPT_TIMEOUT_SECONDS": "0",
+    "LLM_MAX_RETRIES": "0",
+    "LLM_BREAKER_FAILURES": "0",
+    "LLM_RETRIEVAL_FALLBACK": "false",
+    "LLM_HEDGE_ENABLED": "false",
+}
+SCENARIOS = {
+    "unprotected": UNPROTECTED,
+    "resilient": {"LLM_HEDGE_ENABLED": "false"},
+    "hedged": {"LLM_HEDGE_ENABLED": "true"},
+}
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_child(args) -> None:
+    """Run one scenario and print measurements as JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    from metrics import LLM_HEDGES, LLM_RETRIES, LLM_SHORT_CIRCUITS, LLM_TIMEOUTS
+    from rag_system import GENERATION_ERROR_MESSAGE, RETRIEVAL_FALLBACK_MESSAGE, rag_system
+    from stubs import FaultyChatModel, HashingEmbeddings, parse_latency, parse_outages
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "service.txt").write_text(
+        "Oil changes cost $49 and take about 45 minutes. Tire rotations are "
+        "free with any service. Brake pad replacement takes about two hours. "
+        "Loaner vehicles are available for visits longer than three hours. "
+        "The extended warranty transfers to a new owner for a $50 fee.",
+        encoding="utf-8",
+    )
+
+    llm = FaultyChatModel(
+        REPLY,
+        latency=parse_latency(args.llm_latency, seed=args.seed),
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        outages=parse_outages(args.outage),
+        seed=args.seed,
+    )
+    rag_system.initialize(embeddings=HashingEmbeddings(), llm=llm)
+
+    outcomes = {"answered": 0, "fallback": 0, "error": 0}
+    latencies = []
+
+    async def one(query):
+        started = time.perf_counter()
+        try:
+            result = await rag_system.aquery(query)
+            response = result["response"]
+        except Exception:
+            response = GENERATION_ERROR_MESSAGE
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.startswith(RETRIEVAL_FALLBACK_MESSAGE):
+            outcomes["fallback"] += 1
+        elif response == GENERATION_ERROR_MESSAGE:
+            outcomes["error"] += 1
+        else:
+            outcomes["answered"] += 1
+
+    async def drive():
+        rng = random.Random(args.seed)
+        tasks = []
+        started = time.monotonic()
+        # Open-loop Poisson arrivals, so an outage does not slow the offered load
+        while time.monotonic() - started < args.duration:
+            tasks.append(asyncio.create_task(one(rng.choice(QUERIES))))
+            await asyncio.sleep(rng.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(drive())
+    latencies.sort()
+    print(json.dumps({
+        "requests": len(latencies),
+        **outcomes,
+        "llm_calls": llm.calls,
+        "retries": int(LLM_RETRIES.value()),
+        "hedges": int(LLM_HEDGES.value()),
+        "timeouts": int(LLM_TIMEOUTS.value()),
+        "short_circuits": int(LLM_SHORT_CIRCUITS.value()),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+    }))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of offered load")
+    parser.add_argument("--llm-latency", default="lognormal:400:0.5", help="see stubs.parse_latency")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--hang-rate", type=float, default=0.02)
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--outage", default="", help="START-END[,START-END] seconds with every call failing")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.scenarios.split(","):
+            env = {
+                **os.environ,
+                "DATA_FOLDER": str(Path(tmp) / "data"),
+                "VECTOR_STORE_PATH": str(Path(tmp) / f"store-{name}"),
+                "SESSION_BACKEND": "memory",
+                "RESPONSE_CACHE_ENABLED": "false",
+                "MIN_SIMILARITY_SCORE": "0",
+                **SCENARIOS[name],
+            }
+            command = [
+                sys.executable, __file__, "--child",
+                "--data-dir", env["DATA_FOLDER"],
+                "--rate", str(args.rate),
+                "--duration", str(args.duration),
+                "--llm-latency", args.llm_latency,
+                "--error-rate", str(args.error_rate),
+                "--hang-rate", str(args.hang_rate),
+                "--hang-seconds", str(args.hang_seconds),
+                "--outage", args.outage,
+                "--seed", str(args.seed),
+            ]
+            completed = subprocess.run(
+                command, cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+            )
+            results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print(
+        f"{args.rate:g} req/s for {args.duration:g}s, LLM latency {args.llm_latency}, "
+        f"errors {args.error_rate:.0%}, hangs {args.hang_rate:.0%} ({args.hang_seconds:g}s)"
+        + (f", outage {args.outage}s" if args.outage else "")
+        + "\n"
+    )
+    print(
+        f"{'scenario':<12} {'reqs':>5} {'answered':>8} {'fallback':>8} {'error':>6} "
+        f"{'calls':>6} {'retry':>6} {'hedge':>6} {'t/o':>5} {'open':>5} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for name, row in results.items():
+        print(
+            f"{name:<12} {row['requests']:>5} {row['answered']:>8} {row['fallback']:>8} "
+            f"{row['error']:>6} {row['llm_calls']:>6} {row['retries']:>6} {row['hedges']:>6} "
+            f"{row['timeouts']:>5} {row['short_circuits']:>5} {row['p50_ms']:>8.0f} "
+            f"{row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['max_ms']:>8.0f}"
+        )
+
+    if args.output:
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "child", "data_dir")},
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+Benchmark retrieval quality and latency across corpus sizes and chunking.
+
+Generates a corpus of synthetic service bulletins with labeled
+question -> source file pairs (or loads your own, see --corpus), then for
+every corpus size and (chunk size, overlap) pair builds the index through
+RAGSystem's normal ingestion path, each in its own process, and reports
+recall@k and MRR for each top-k, ingestion time, index size on disk and
+query latency percentiles. Runs fully offline with the hashing stub
+embeddings; pass --embeddings hf for the configured sentence-transformer.
+Run from the python-backend folder:
+
+    python benchmarks/retrieval_bench.py --sizes 1000,10000,100000 \\
+        --chunk-sizes 500,1000 --overlaps 100,200 --top-k 1,2,4,8
+
+Corpus sizes are target chunk counts at the default CHUNK_SIZE /
+CHUNK_OVERLAP; other chunking settings produce more or fewer chunks from
+the same files (the actual count is reported). To use your own data,
+pass --corpus with a folder of documents and --questions with a JSONL
+file of {"question": ..., "source": <file name>} lines.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+FILLER = (
+    "vehicle service warranty financing lease oil change brake pads tire rotation "
+    "appointment dealership hours inspection battery transmission coolant recall "
+    "mileage trade-in credit approval insurance detailing alignment filter engine "
+    "customer technician schedule parts labor estimate pickup shuttle loaner"
+).split()
+ATTRIBUTES = [
+    ("oil capacity", "{n}.{d} quarts"),
+    ("tire pressure", "{n}{d} psi"),
+    ("service interval", "{n},{d}00 miles"),
+    ("battery group", "group {n}{d}"),
+    ("spark plug gap", "0.0{n}{d} inches"),
+    ("coolant type", "type {n}{d} long-life coolant"),
+    ("wiper blade length", "{n}{d} inches"),
+    ("towing capacity", "{n},{d}00 pounds"),
+]
+SYLLABLES = ["var", "kel", "dor", "mi", "tra", "zen", "sol", "qua", "ren", "lo", "vex", "ta"]
+
+
+def model_name(rng: random.Random) -> str:
+    word = "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+    return f"{word} {rng.randint(100, 9999)}"
+
+
+def filler_paragraph(rng: random.Random) -> str:
+    return " ".join(
+        " ".join(rng.choice(FILLER) for _ in range(rng.randint(8, 18))).capitalize() + "."
+        for _ in range(rng.randint(3, 6))
+    )
+
+
+def generate_corpus(target: Path, chunks: int, chunk_size: int, chunk_overlap: int, seed: int):
+    """
+    Write bulletins worth roughly `chunks` chunks; returns labeled questions.
+
+    Each bulletin covers one vehicle model and states a few of its specs
+    between filler paragraphs. Each question asks for one stated spec.
+    """
+    rng = random.Random(seed)
+    target.mkdir(parents=True, exist_ok=True)
+    step = max(1, chunk_size - chunk_overlap)
+    budget = chunks * step
+
+    questions = []
+    written = 0
+    index = 0
+    while written < budget:
+        model = model_name(rng)
+        facts = rng.sample(ATTRIBUTES, 3)
+        paragraphs = [f"Service bulletin for the {model}."]
+        for attribute, value in facts:
+            paragraphs.append(filler_paragraph(rng))
+            stated = value.format(n=rng.randint(1, 9), d=rng.randint(0, 9))
+            paragraphs.append(f"The recommended {attribute} for the {model} is {stated}.")
+            questions.append({
+                "question": f"What is the {attribute} of the {model}?",
+                "source": f"bulletin_{index:06d}.txt",
+            })
+        paragraphs.append(filler_paragraph(rng))
+        text = "\n\n".join(paragraphs)
+        (target / f"bulletin_{index:06d}.txt").write_text(text, encoding="utf-8")
+        written += len(text)
+        index += 1
+    return questions
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_child(args) -> None:
+    """Build the index for one configuration, evaluate it, print JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    from config import settings
+    from rag_system import rag_system
+    from stubs import HashingEmbeddings, StubChatModel
+
+    embeddings = HashingEmbeddings() if args.embeddings == "stub" else None
+
+    started = time.perf_counter()
+    rag_system.initialize(embeddings=embeddings, llm=StubChatModel())
+    ingest_seconds = time.perf_counter() - started
+
+    questions = [
+        json.loads(line)
+        for line in Path(args.questions).read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+    top_ks = sorted(int(k) for k in args.top_k.split(","))
+    max_k = top_ks[-1]
+
+    vector_store = rag_system.vector_store
+    relevance = vector_store._select_relevance_score_fn()
+    ranks, latencies = [], []
+    for item in questions:
+        # Same steps as RAGSystem.get_scored_context, keeping the metadata
+        query_started = time.perf_counter()
+        embedding = rag_system.embed_query(item["question"])
+        results = vector_store.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=max_k
+        )
+        latencies.append((time.perf_counter() - query_started) * 1000)
+
+        sources = [
+            doc.metadata.get("source")
+            for doc, distance in results
+            if relevance(distance) >= settings.min_similarity_score
+        ]
+        ranks.append(sources.index(item["source"]) + 1 if item["source"] in sources else None)
+
+    latencies.sort()
+    quality = {}
+    for k in top_ks:
+        hits = [rank for rank in ranks if rank is not None and rank <= k]
+        quality[str(k)] = {
+            "recall": round(len(hits) / len(ranks), 4) if ranks else 0.0,
+            "mrr": round(sum(1 / rank for rank in hits) / len(ranks), 4) if ranks else 0.0,
+        }
+
+    print(json.dumps({
+        "chunks": rag_system.index_size(),
+        "ingest_s": round(ingest_seconds, 2),
+        "index_mb": round(dir_bytes(Path(settings.vector_store_path)) / 1e6, 2),
+        "questions": len(questions),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "quality": quality,
+    }))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated target chunk counts")
+    parser.add_argument("--chunk-sizes", default="1000", help="comma-separated CHUNK_SIZE values")
+    parser.add_argument("--overlaps", default="200", help="comma-separated CHUNK_OVERLAP values")
+    parser.add_argument("--top-k", default="1,2,4,8", help="comma-separated k for recall@k / MRR@k")
+    parser.add_argument("--questions-per-size", type=int, default=300)
+    parser.add_argument("--backend", default=None, help="VECTOR_BACKEND (default: configured)")
+    parser.add_argument("--embeddings", choices=["stub", "hf"], default="stub")
+    parser.add_argument("--corpus", help="folder of your own documents (skips generation)")
+    parser.add_argument("--questions", help="JSONL question -> source file, with --corpus")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+    if bool(args.corpus) != bool(args.questions):
+        parser.error("--corpus and --questions go together")
+
+    rng = random.Random(args.seed)
+    default_size, default_overlap = 1000, 200
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            corpora = [("custom", Path(args.corpus), Path(args.questions))]
+        else:
+            corpora = []
+            for size in (int(value) for value in args.sizes.split(",")):
+                corpus_dir = Path(tmp) / f"corpus-{size}"
+                questions = generate_corpus(
+                    corpus_dir, size, default_size, default_overlap, args.seed
+                )
+                questions_path = Path(tmp) / f"questions-{size}.jsonl"
+                sample = rng.sample(questions, min(args.questions_per_size, len(questions)))
+                questions_path.write_text(
+                    "".join(json.dumps(item) + "\n" for item in sample), encoding="utf-8"
+                )
+                corpora.append((size, corpus_dir, questions_path))
+
+        for size, corpus_dir, questions_path in corpora:
+            for chunk_size in (int(value) for value in args.chunk_sizes.split(",")):
+                for overlap in (int(value) for value in args.overlaps.split(",")):
+                    store_dir = Path(tmp) / f"store-{size}-{chunk_size}-{overlap}"
+                    env = {
+                        **os.environ,
+                        "DATA_FOLDER": str(corpus_dir),
+                        "VECTOR_STORE_PATH": str(store_dir),
+                        "CHUNK_SIZE": str(chunk_size),
+                        "CHUNK_OVERLAP": str(overlap),
+                        "EMBEDDING_CACHE_ENABLED": "false",
+                        "EMBEDDING_BATCH_ENABLED": "false",
+                    }
+                    if args.backend:
+                        env["VECTOR_BACKEND"] = args.backend
+                    completed = subprocess.run(
+                        [
+                            sys.executable, __file__, "--child",
+                            "--questions", str(questions_path),
+                            "--top-k", args.top_k,
+                            "--embeddings", args.embeddings,
+                        ],
+                        cwd=BACKEND_DIR,
+                        env=env,
+                        check=True,
+                        capture_output=True,
+                        text=True,
+                    )
+                    measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+                    measurement.update(size=size, chunk_size=chunk_size, chunk_overlap=overlap)
+                    results.append(measurement)
+                    # Free disk between configurations; 100k-chunk indexes add up
+                    shutil.rmtree(store_dir, ignore_errors=True)
+
+    top_ks = args.top_k.split(",")
+    header = " ".join(f"{'R@' + k:>6} {'MRR@' + k:>7}" for k in top_ks)
+    print(
+        f"{'size':>7} {'chunk':>5} {'ovl':>4} {'chunks':>7} {'ingest s':>8} {'MB':>7} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {header}"
+    )
+    for row in results:
+        quality = " ".join(
+            f"{row['quality'][k]['recall']:>6.3f} {row['quality'][k]['mrr']:>7.3f}" for k in top_ks
+        )
+        print(
+            f"{row['size']:>7} {row['chunk_size']:>5} {row['chunk_overlap']:>4} {row['chunks']:>7} "
+            f"{row['ingest_s']:>8.1f} {row['index_mb']:>7.1f} {row['p50_ms']:>7.2f} "
+            f"{row['p95_ms']:>7.2f} {row['p99_ms']:>7.2f} {quality}"
+        )
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {
+                key: value for key, value in vars(args).items() if key not in ("output", "child")
+            },
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
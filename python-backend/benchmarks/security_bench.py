@@ -0,0 +1,221 @@
+"""
+Check and time SecurityValidator against the sequential rule scan.
+
+Replays the regression corpus (benchmarks/security_corpus.jsonl: one
+{"query", "valid", "message"} object per line, recorded with the
+one-regex-per-rule validator) and random inputs built from the rules'
+keywords through SecurityValidator.check, and fails if any verdict
+differs from the recorded one or from a sequential reference that
+searches each rule on its own and counts special characters in a
+Python loop, as the validator used to. Then times, per message, that
+reference, two single-automaton alternatives (one alternation of all
+rules; one alternation of the rules' literal prefixes gating the
+per-rule search) and SecurityValidator. Run from the python-backend
+folder:
+
+    python benchmarks/security_bench.py --rules security_rules.json
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CORPUS = Path(__file__).resolve().parent / "security_corpus.jsonl"
+
+
+class SequentialValidator:
+    """Reference: one search per rule and a per-character Python loop."""
+
+    def __init__(self, injection, suspicious, max_special_char_ratio):
+        self.injection = [re.compile(pattern, re.IGNORECASE) for pattern in injection.values()]
+        self.suspicious = [re.compile(pattern, re.IGNORECASE) for pattern in suspicious.values()]
+        self.max_special_char_ratio = max_special_char_ratio
+
+    def validate_input(self, user_input, max_length=500):
+        if len(user_input) > max_length:
+            return False, f"Input exceeds maximum length of {max_length} characters"
+        if not user_input or not user_input.strip():
+            return False, "Input cannot be empty"
+        for pattern in self.injection:
+            if pattern.search(user_input):
+                return False, "Input contains suspicious content that violates security policies"
+        for pattern in self.suspicious:
+            if pattern.search(user_input):
+                return False, "Input contains potentially malicious content"
+        special = sum(1 for c in user_input if not c.isalnum() and not c.isspace())
+        if special / len(user_input) > self.max_special_char_ratio:
+            return False, "Input contains excessive special characters"
+        return True, ""
+
+
+class AlternationValidator(SequentialValidator):
+    """Timing only: every rule in one alternation (verdicts follow the leftmost match)."""
+
+    def __init__(self, injection, suspicious, max_special_char_ratio):
+        super().__init__(injection, suspicious, max_special_char_ratio)
+        branches = [f"(?P<i{n}>{p})" for n, p in enumerate(injection.values())]
+        branches += [f"(?P<s{n}>{p})" for n, p in enumerate(suspicious.values())]
+        self.combined = re.compile("|".join(branches), re.IGNORECASE)
+
+    def validate_input(self, user_input, max_length=500):
+        if len(user_input) > max_length:
+            return False, f"Input exceeds maximum length of {max_length} characters"
+        if not user_input or not user_input.strip():
+            return False, "Input cannot be empty"
+        match = self.combined.search(user_input)
+        if match:
+            if match.lastgroup.startswith("i"):
+                return False, "Input contains suspicious content that violates security policies"
+            return False, "Input contains potentially malicious content"
+        special = sum(1 for c in user_input if not c.isalnum() and not c.isspace())
+        if special / len(user_input) > self.max_special_char_ratio:
+            return False, "Input contains excessive special characters"
+        return True, ""
+
+
+class PrefixGateRules:
+    """Timing only: SecurityRules gated by one alternation of the rules' literal prefixes."""
+
+    def __init__(self, rules):
+        self.rules = rules.rules
+        self.max_special_char_ratio = rules.max_special_char_ratio
+        prefixes = sorted({re.escape(rule.prefix) for rule in rules.rules if rule.prefix})
+        self.gate = re.compile("|".join(prefixes))
+        self.unprefixed = [rule for rule in rules.rules if not rule.prefix]
+
+    def match(self, text):
+        from security import _fold
+
+        folded = _fold(text)
+        candidates = self.rules if self.gate.search(folded) else self.unprefixed
+        for rule in candidates:
+            if rule.prefix in folded and rule.regex.search(text):
+                return rule.name
+        return None
+
+
+def fuzz_queries(rules, count, seed):
+    """Random inputs built from rule keywords, odd casing and punctuation."""
+    rng = random.Random(seed)
+    words = set()
+    for pattern in rules:
+        words.update(re.findall(r"[A-Za-z]{2,}", pattern))
+    words = sorted(words) + ["car", "oil", "hours", "\u0130gnore", "\u0131gnore", "\u017fystem"]
+    pieces = [" ", "  ", "\t", "\n", ":", "=", "(", "<", "?", "!", "'", ";", "--", "*", "\u00e9"]
+    queries = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 12)):
+            word = rng.choice(words)
+            parts.append(word.upper() if rng.random() < 0.2 else word)
+            parts.append(rng.choice(pieces) if rng.random() < 0.3 else " ")
+        queries.append("".join(parts))
+    return queries
+
+
+def per_message_us(validate, queries, max_length, repeat):
+    def run():
+        for query in queries:
+            validate(query, max_length)
+
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(queries) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rules", help="rules file (default: the built-in rules)")
+    parser.add_argument("--corpus", default=str(CORPUS))
+    parser.add_argument("--max-length", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200, help="timing runs over the corpus; best is kept")
+    parser.add_argument("--fuzz", type=int, default=5000, help="random inputs compared against the reference")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from security import SecurityValidator
+
+    validator = SecurityValidator(rules_path=args.rules)
+    if args.rules:
+        data = json.loads(Path(args.rules).read_text(encoding="utf-8"))
+        injection, suspicious = data.get("injection", {}), data.get("suspicious", {})
+        ratio = float(data.get("max_special_char_ratio", 0.3))
+    else:
+        injection, suspicious = SecurityValidator.INJECTION_PATTERNS, SecurityValidator.SUSPICIOUS_PATTERNS
+        ratio = 0.3
+    reference = SequentialValidator(injection, suspicious, ratio)
+
+    corpus = [
+        json.loads(line)
+        for line in Path(args.corpus).read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+    mismatches = 0
+    fired = {}
+    for item in corpus:
+        verdict = validator.check(item["query"], args.max_length)
+        expected = (item["valid"], item["message"])
+        if (verdict.valid, verdict.message) != expected or reference.validate_input(
+            item["query"], args.max_length
+        ) != expected:
+            mismatches += 1
+            print(f"MISMATCH {item['query'][:60]!r}: got {verdict}, expected {expected}")
+        if verdict.rule:
+            fired[verdict.rule] = fired.get(verdict.rule, 0) + 1
+
+    rejected = sum(1 for item in corpus if not item["valid"])
+    print(f"Corpus: {len(corpus)} queries, {rejected} rejected, {mismatches} mismatches")
+    print("Rules fired: " + ", ".join(f"{rule} {count}" for rule, count in sorted(fired.items())))
+
+    fuzz_mismatches = 0
+    for query in fuzz_queries(list(injection.values()) + list(suspicious.values()), args.fuzz, args.seed):
+        verdict = validator.check(query, args.max_length)
+        if (verdict.valid, verdict.message) != reference.validate_input(query, args.max_length):
+            fuzz_mismatches += 1
+            print(f"MISMATCH {query[:60]!r}: got {verdict}")
+    print(f"Fuzz: {args.fuzz} random queries, {fuzz_mismatches} mismatches")
+    mismatches += fuzz_mismatches
+
+    queries = [item["query"] for item in corpus]
+    # Accepted messages near the length limit pay for every rule
+    long_benign = [
+        (query * (args.max_length // max(1, len(query))))[: args.max_length]
+        for query, item in zip(queries, corpus)
+        if item["valid"]
+    ]
+    long_benign = [
+        query for query in long_benign if reference.validate_input(query, args.max_length)[0]
+    ]
+
+    alternation = AlternationValidator(injection, suspicious, ratio)
+    prefix_gate = SecurityValidator(rules_path=args.rules)
+    prefix_gate.rules = PrefixGateRules(prefix_gate.rules)
+
+    print(
+        f"\n{'workload':<24} {'sequential us':>14} {'alternation us':>15} "
+        f"{'prefix gate us':>15} {'prefiltered us':>15} {'speedup':>8}"
+    )
+    for name, workload in (("corpus", queries), (f"benign ~{args.max_length} chars", long_benign)):
+        if not workload:
+            continue
+        before = per_message_us(reference.validate_input, workload, args.max_length, args.repeat)
+        combined = per_message_us(alternation.validate_input, workload, args.max_length, args.repeat)
+        gated = per_message_us(prefix_gate.validate_input, workload, args.max_length, args.repeat)
+        after = per_message_us(validator.validate_input, workload, args.max_length, args.repeat)
+        print(
+            f"{name:<24} {before:>14.2f} {combined:>15.2f} {gated:>15.2f} "
+            f"{after:>15.2f} {before / after:>7.1f}x"
+        )
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
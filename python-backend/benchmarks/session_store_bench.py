@@ -0,0 +1,107 @@
+"""
+Benchmark per-turn overhead of the session backends.
+
+Each simulated turn does what RAGSystem does for a chat request: read
+the session history, then append the user/assistant pair trimmed to the
+memory window. Run from the python-backend folder:
+
+    python benchmarks/session_store_bench.py --sessions 200 --turns 20
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from session_store import InMemorySessionStore  # noqa: E402
+from sqlite_session_store import SQLiteSessionStore  # noqa: E402
+
+
+WORDS = "service warranty financing oil brake tire appointment hours lease model".split()
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < chars:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)
+
+
+def run_turns(store, sessions: int, turns: int, message_chars: int, window: int) -> dict:
+    rng = random.Random(42)
+    session_ids = [f"bench-{index}" for index in range(sessions)]
+    for session_id in session_ids:
+        store.create(session_id)
+
+    # Interleave sessions the way concurrent users would
+    schedule = [session_id for session_id in session_ids for _ in range(turns)]
+    rng.shuffle(schedule)
+
+    latencies = []
+    for session_id in schedule:
+        question = _text(rng, message_chars // 4)
+        answer = _text(rng, message_chars)
+        started = time.perf_counter()
+        store.get(session_id)
+        store.append(
+            session_id,
+            [HumanMessage(content=question), AIMessage(content=answer)],
+            max_messages=window,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return {
+        "turns": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies), 4),
+        "p50_ms": round(latencies[len(latencies) // 2], 4),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 4),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 4),
+        "stats": store.stats(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20, help="turns per session")
+    parser.add_argument("--message-chars", type=int, default=800)
+    parser.add_argument("--window", type=int, default=10, help="max messages kept")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    results["memory"] = run_turns(
+        InMemorySessionStore(), args.sessions, args.turns, args.message_chars, args.window
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSessionStore(path=str(Path(tmp) / "sessions.db"))
+        results["sqlite"] = run_turns(
+            store, args.sessions, args.turns, args.message_chars, args.window
+        )
+        store.close()
+
+    print(f"{'backend':<8} {'turns':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes held':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<8} {result['turns']:>7} {result['mean_ms']:>9.3f} {result['p50_ms']:>9.3f} "
+            f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['stats']['bytes_held']:>12,}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
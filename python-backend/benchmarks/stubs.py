@@ -0,0 +1,242 @@
+"""
+Deterministic local stand-ins for the models, for offline benchmarks.
+
+HashingEmbeddings implements the langchain Embeddings interface with a
+bag-of-words hashing trick: no model download, stable across runs, and
+similar texts still get similar vectors. StubChatModel answers with a
+canned reply, optionally after a simulated latency (see parse_latency);
+FaultyChatModel also fails, hangs or goes through outages on demand;
+SaturatingChatModel slows down as concurrent calls exceed its capacity.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings:
+    """Bag-of-words hashing embeddings (unit-normalized)."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in _TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.dimensions] += sign
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+
+class _StubMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+def parse_latency(spec: str, seed: int = 0) -> Optional[Callable[[], float]]:
+    """
+    Latency sampler (seconds) from a spec in milliseconds.
+
+    "0" -> none, "fixed:200", "uniform:100:400", "normal:300:50" (mean,
+    stddev), "lognormal:300:0.5" (median, sigma of the underlying normal).
+    """
+    rng = random.Random(seed)
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(":") if value]
+
+    if kind in ("", "0", "none"):
+        return None
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Unknown latency spec '{spec}'")
+
+
+class StubChatModel:
+    """
+    Chat model stand-in that answers with a canned reply.
+
+    If latency is given (a callable returning seconds) each call takes
+    that long; streamed replies spread it evenly over the words.
+    """
+
+    def __init__(
+        self,
+        reply: str = "This is a benchmark answer.",
+        latency: Optional[Callable[[], float]] = None,
+    ):
+        self.reply = reply
+        self.latency = latency
+
+    def invoke(self, messages) -> _StubMessage:
+        if self.latency:
+            time.sleep(self.latency())
+        return _StubMessage(self.reply)
+
+    async def ainvoke(self, messages) -> _StubMessage:
+        if self.latency:
+            await asyncio.sleep(self.latency())
+        return _StubMessage(self.reply)
+
+    async def astream(self, messages):
+        words = self.reply.split(" ")
+        delay = self.latency() / len(words) if self.latency else 0.0
+        for word in words:
+            if delay:
+                await asyncio.sleep(delay)
+            yield _StubMessage(word + " ")
+
+
+class InjectedFault(RuntimeError):
+    """Error raised by FaultyChatModel."""
+
+
+class FaultyChatModel(StubChatModel):
+    """
+    StubChatModel that misbehaves like an unhealthy provider.
+
+    Each call fails with probability error_rate and hangs for
+    hang_seconds with probability hang_rate. During an outage (start,
+    end) window, in seconds since the first call, every call fails. Failures happen after the sampled latency, hangs instead of it.
+    """
+
+    def __init__(
+        self,
+        reply: str = "This is a benchmark answer.",
+        latency: Optional[Callable[[], float]] = None,
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 60.0,
+        outages: Optional[List[Tuple[float, float]]] = None,
+        seed: int = 0,
+    ):
+        super().__init__(reply, latency)
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.outages = outages or []
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._first_call: Optional[float] = None
+
+    def _fault(self) -> Optional[str]:
+        """Fault for the next call: "error", "hang" or None."""
+        self.calls += 1
+        now = time.monotonic()
+        if self._first_call is None:
+            self._first_call = now
+        elapsed = now - self._first_call
+        if any(start <= elapsed < end for start, end in self.outages):
+            return "error"
+        roll = self._rng.random()
+        if roll < self.hang_rate:
+            return "hang"
+        if roll < self.hang_rate + self.error_rate:
+            return "error"
+        return None
+
+    def invoke(self, messages) -> _StubMessage:
+        fault = self._fault()
+        if fault == "hang":
+            time.sleep(self.hang_seconds)
+        elif self.latency:
+            time.sleep(self.latency())
+        if fault == "error":
+            raise InjectedFault("injected provider error")
+        return _StubMessage(self.reply)
+
+    async def ainvoke(self, messages) -> _StubMessage:
+        fault = self._fault()
+        if fault == "hang":
+            await asyncio.sleep(self.hang_seconds)
+        elif self.latency:
+            await asyncio.sleep(self.latency())
+        if fault == "error":
+            raise InjectedFault("injected provider error")
+        return _StubMessage(self.reply)
+
+    async def astream(self, messages):
+        fault = self._fault()
+        if fault == "hang":
+            await asyncio.sleep(self.hang_seconds)
+        elif fault == "error":
+            if self.latency:
+                await asyncio.sleep(self.latency())
+            raise InjectedFault("injected provider error")
+        async for chunk in super().astream(messages):
+            yield chunk
+
+
+class SaturatingChatModel(StubChatModel):
+    """
+    StubChatModel for a provider with limited capacity.
+
+    Up to `capacity` concurrent calls each take their sampled latency;
+    beyond that the capacity is shared (processor sharing), so every
+    call in flight slows down by in_flight / capacity.
+    """
+
+    # Progress is updated at this interval, in seconds
+    TICK = 0.01
+
+    def __init__(
+        self,
+        reply: str = "This is a benchmark answer.",
+        latency: Optional[Callable[[], float]] = None,
+        capacity: int = 8,
+    ):
+        super().__init__(reply, latency)
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def _work(self) -> None:
+        remaining = self.latency() if self.latency else 0.0
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            while remaining > 0:
+                await asyncio.sleep(self.TICK)
+                remaining -= self.TICK * min(1.0, self.capacity / self.in_flight)
+        finally:
+            self.in_flight -= 1
+
+    async def ainvoke(self, messages) -> _StubMessage:
+        await self._work()
+        return _StubMessage(self.reply)
+
+    async def astream(self, messages):
+        await self._work()
+        for word in self.reply.split(" "):
+            yield _StubMessage(word + " ")
+
+
+def parse_outages(spec: str) -> List[Tuple[float, float]]:
+    """Parse "START-END,START-END" (seconds) into [(start, end), ...]."""
+    outages = []
+    for window in filter(None, spec.split(",")):
+        start, _, end = window.partition("-")
+        outages.append((float(start), float(end)))
+    return outages
@@ -0,0 +1,138 @@
+"""
+Benchmark query latency of the vector backends.
+
+Indexes the same synthetic chunks into Chroma and into NumpyVectorIndex
+(float32 and float16), then times top-k searches by vector. Embeddings
+come from the hashing stub so only the index itself is measured. Run
+from the python-backend folder:
+
+    python benchmarks/vector_index_bench.py --chunks 20000 --queries 500
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stubs import HashingEmbeddings  # noqa: E402
+from vector_index import NumpyVectorIndex  # noqa: E402
+
+VOCABULARY = (
+    "vehicle service warranty financing lease oil change brake pads tire rotation "
+    "appointment dealership hours inspection battery transmission coolant recall "
+    "mileage trade-in credit approval insurance detailing alignment filter engine "
+    "sedan truck hybrid electric charging loaner shuttle parts accessories"
+).split()
+
+BATCH_SIZE = 1000
+
+
+def make_texts(count: int, rng: random.Random):
+    return [
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(40, 120)))
+        for _ in range(count)
+    ]
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
+
+
+def open_chroma(path: Path, embeddings):
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        persist_directory=str(path),
+        embedding_function=embeddings,
+        collection_name="default",
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+
+
+def run_backend(name, store, path, texts, query_vectors, k):
+    started = time.perf_counter()
+    for start in range(0, len(texts), BATCH_SIZE):
+        batch = texts[start : start + BATCH_SIZE]
+        store.add_texts(
+            batch,
+            metadatas=[{"source": "bench"}] * len(batch),
+            ids=[f"chunk-{start + offset}" for offset in range(len(batch))],
+        )
+    if hasattr(store, "persist"):
+        store.persist()
+    build_seconds = time.perf_counter() - started
+
+    # Warm-up (first search pays for lazy loading / page faults)
+    store.similarity_search_by_vector_with_relevance_scores(query_vectors[0], k=k)
+
+    latencies = []
+    for vector in query_vectors:
+        started = time.perf_counter()
+        store.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return {
+        "backend": name,
+        "build_s": round(build_seconds, 2),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "disk_mb": round(dir_bytes(path) / 1e6, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    embeddings = HashingEmbeddings(args.dimensions)
+    texts = make_texts(args.chunks, rng)
+    query_vectors = embeddings.embed_documents(make_texts(args.queries, rng))
+
+    backends = [
+        ("numpy-float32", lambda path: NumpyVectorIndex(str(path), embeddings, "float32")),
+        ("numpy-float16", lambda path: NumpyVectorIndex(str(path), embeddings, "float16")),
+        ("chroma", lambda path: open_chroma(path, embeddings)),
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in backends:
+            path = Path(tmp) / name
+            try:
+                store = factory(path)
+            except ImportError as e:
+                print(f"Skipping {name}: {e}")
+                continue
+            results.append(run_backend(name, store, path, texts, query_vectors, args.k))
+
+    print(f"\n{args.chunks} chunks x {args.dimensions} dims, {args.queries} queries, k={args.k}\n")
+    print(f"{'backend':<15} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'disk MB':>8}")
+    for row in results:
+        print(
+            f"{row['backend']:<15} {row['build_s']:>8.2f} {row['p50_ms']:>8.3f} "
+            f"{row['p95_ms']:>8.3f} {row['mean_ms']:>8.3f} {row['disk_mb']:>8.2f}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -80,6 +80,31 @@ class Settings:
     max_generation_tokens: int = _get_int("MAX_GENERATION_TOKENS", 512)
     temperature: float = _get_float("LLM_TEMPERATURE", 0.05)
 
+    # Time a chat request may spend on LLM attempts (0 = unlimited); keep
+    # it below the Node ragService timeout (10 s). Each attempt is also
+    # cut off at LLM_ATTEMPT_TIMEOUT_SECONDS so a retry can still fit.
+    llm_request_budget_seconds: float = _get_float("LLM_REQUEST_BUDGET_SECONDS", 9.0)
+    llm_attempt_timeout_seconds: float = _get_float("LLM_ATTEMPT_TIMEOUT_SECONDS", 6.0)
+
+    # Retries of failed attempts, with jittered exponential backoff
+    # starting at LLM_RETRY_BACKOFF_MS, while the budget allows
+    llm_max_retries: int = _get_int("LLM_MAX_RETRIES", 2)
+    llm_retry_backoff_ms: float = _get_float("LLM_RETRY_BACKOFF_MS", 200.0)
+
+    # Send a second request when the first runs past the recent p95
+    # latency (never sooner than LLM_HEDGE_MIN_DELAY_MS); costs extra calls
+    llm_hedge_enabled: bool = _get_bool("LLM_HEDGE_ENABLED", False)
+    llm_hedge_min_delay_ms: float = _get_float("LLM_HEDGE_MIN_DELAY_MS", 500.0)
+
+    # Consecutive failures that open the circuit breaker (0 = off), and
+    # how long it stays open before a probe call
+    llm_breaker_failures: int = _get_int("LLM_BREAKER_FAILURES", 5)
+    llm_breaker_reset_seconds: float = _get_float("LLM_BREAKER_RESET_SECONDS", 10.0)
+
+    # When the LLM call fails, answer with the best retrieved excerpts
+    # instead of the generic error message
+    llm_retrieval_fallback: bool = _get_bool("LLM_RETRIEVAL_FALLBACK", True)
+
     # ------------------------------------------------------------------
     # Embeddings
     # ------------------------------------------------------------------
@@ -90,17 +115,59 @@ class Settings:
 
     embedding_device: str = _get_str("EMBEDDING_DEVICE", "cpu")
 
+    # torch (sentence-transformers) | onnx (ONNX Runtime, see export_onnx.py)
+    embedding_backend: str = _get_str("EMBEDDING_BACKEND", "torch")
+    # Folder written by export_onnx.py (default: models/<model>-onnx)
+    onnx_model_path: str = _get_str("ONNX_MODEL_PATH", "")
+    onnx_quantized: bool = _get_bool("ONNX_QUANTIZED", False)
+    # CPU threads used by the embedding model (0 = library default)
+    embedding_threads: int = _get_int("EMBEDDING_THREADS", 0)
+
+    # Memoized query embeddings (normalized query string -> vector)
+    embedding_cache_enabled: bool = _get_bool("EMBEDDING_CACHE_ENABLED", True)
+    embedding_cache_max_entries: int = _get_int("EMBEDDING_CACHE_MAX_ENTRIES", 10000)
+    embedding_cache_max_bytes: int = _get_int("EMBEDDING_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+
+    # Query embeddings that arrive while another batch is being embedded
+    # are collected for up to this many milliseconds and embedded in one
+    # forward pass; a lone query is embedded at once. A batch holds at
+    # most RAG_EXECUTOR_WORKERS queries (the threads that wait on it),
+    # so raise that too to make a larger EMBEDDING_BATCH_MAX_SIZE count
+    embedding_batch_enabled: bool = _get_bool("EMBEDDING_BATCH_ENABLED", True)
+    embedding_batch_window_ms: float = _get_float("EMBEDDING_BATCH_WINDOW_MS", 5.0)
+    embedding_batch_max_size: int = _get_int("EMBEDDING_BATCH_MAX_SIZE", 16)
+
     # ------------------------------------------------------------------
     # Chunking (retrieval quality)
     # ------------------------------------------------------------------
     chunk_size: int = _get_int("CHUNK_SIZE", 1000)
     chunk_overlap: int = _get_int("CHUNK_OVERLAP", 200)
 
+    # Ingestion: processes used to split files (0 = CPU count - 1) and
+    # chunks embedded / written to the vector store per batch
+    ingest_workers: int = _get_int("INGEST_WORKERS", 0)
+    ingest_batch_size: int = _get_int("INGEST_BATCH_SIZE", 256)
+
     # ------------------------------------------------------------------
     # Vector Store / Retrieval Safety
     # ------------------------------------------------------------------
     vector_store_path: str = _get_str("VECTOR_STORE_PATH", "./chroma_db")
 
+    # chroma (default) | numpy (in-process exact search, see vector_index.py)
+    vector_backend: str = _get_str("VECTOR_BACKEND", "chroma")
+    # Embedding storage for the numpy backend: float32 | float16 | int8.
+    # float16 / int8 cut index memory 2x / 4x; the top
+    # k * VECTOR_RESCORE_FACTOR candidates are re-scored in full precision
+    vector_dtype: str = _get_str("VECTOR_DTYPE", "float32")
+    vector_rescore_factor: int = _get_int("VECTOR_RESCORE_FACTOR", 4)
+
+    # Seconds a replaced index generation is kept for in-flight queries
+    index_cleanup_grace_seconds: float = _get_float("INDEX_CLEANUP_GRACE_SECONDS", 5.0)
+
+    # How often each worker checks CURRENT for a generation another
+    # worker built (0 = before every query)
+    index_watch_seconds: float = _get_float("INDEX_WATCH_SECONDS", 1.0)
+
     # Fewer, higher-quality chunks = fewer hallucinations
     top_k_results: int = _get_int("TOP_K_RESULTS", 2)
 
@@ -110,6 +177,9 @@ class Settings:
     # Hard cap on how much context the LLM can see
     max_context_chars: int = _get_int("MAX_CONTEXT_CHARS", 6000)
 
+    # Token budget for retrieved context, filled in score order
+    max_context_tokens: int = _get_int("MAX_CONTEXT_TOKENS", 1500)
+
     # ------------------------------------------------------------------
     # RAG Safety Controls
     # ------------------------------------------------------------------
@@ -122,6 +192,85 @@ class Settings:
     max_query_length: int = _get_int("MAX_QUERY_LENGTH", 500)
     enable_security_check: bool = _get_bool("ENABLE_SECURITY_CHECK", True)
 
+    # Input validation rules (see security_rules.json), checked for changes
+    # every SECURITY_RULES_RELOAD_SECONDS (0 = load at startup only). The
+    # built-in rules apply until the file loads; a broken edit keeps the
+    # last good rules
+    security_rules_path: str = _get_str("SECURITY_RULES_PATH", "./security_rules.json")
+    security_rules_reload_seconds: float = _get_float("SECURITY_RULES_RELOAD_SECONDS", 5.0)
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    # memory (per-process, default) | sqlite (shared by workers on one host)
+    session_backend: str = _get_str("SESSION_BACKEND", "memory")
+    session_sqlite_path: str = _get_str("SESSION_SQLITE_PATH", "./sessions.db")
+
+    session_max_count: int = _get_int("SESSION_MAX_COUNT", 10000)
+    session_idle_ttl_seconds: int = _get_int("SESSION_IDLE_TTL_SECONDS", 3600)
+    session_max_bytes: int = _get_int("SESSION_MAX_BYTES", 64 * 1024 * 1024)
+
+    # window: the prompt carries the most recent messages that fit
+    #   MEMORY_MAX_TOKENS
+    # summary: once a session holds MEMORY_SUMMARY_TRIGGER_MESSAGES, older
+    #   turns are folded into a running summary by the LLM, in the
+    #   background, keeping the last MEMORY_SUMMARY_KEEP_TURNS turns verbatim
+    memory_mode: str = _get_str("MEMORY_MODE", "window")
+
+    # Token budget for conversation memory in the prompt (summary plus
+    # recent messages); 0 = no limit
+    memory_max_tokens: int = _get_int("MEMORY_MAX_TOKENS", 1000)
+
+    # Messages stored per session; the token budget decides how many of
+    # them reach the prompt
+    max_memory_messages: int = _get_int("MAX_MEMORY_MESSAGES", 10)
+    memory_summary_trigger_messages: int = _get_int("MEMORY_SUMMARY_TRIGGER_MESSAGES", 8)
+    memory_summary_keep_turns: int = _get_int("MEMORY_SUMMARY_KEEP_TURNS", 2)
+
+    # ------------------------------------------------------------------
+    # Response Cache
+    # ------------------------------------------------------------------
+    response_cache_enabled: bool = _get_bool("RESPONSE_CACHE_ENABLED", True)
+
+    # Cosine similarity a new query needs to reuse a cached answer
+    response_cache_similarity: float = _get_float("RESPONSE_CACHE_SIMILARITY", 0.95)
+    response_cache_ttl_seconds: int = _get_int("RESPONSE_CACHE_TTL_SECONDS", 3600)
+    response_cache_max_entries: int = _get_int("RESPONSE_CACHE_MAX_ENTRIES", 1000)
+    response_cache_max_bytes: int = _get_int("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+
+    # ------------------------------------------------------------------
+    # Concurrency
+    # ------------------------------------------------------------------
+    # Worker threads used to run CPU-bound embedding / retrieval work
+    # off the event loop. Bounds how many of those run at once.
+    rag_executor_workers: int = _get_int("RAG_EXECUTOR_WORKERS", 4)
+
+    # /chat/batch: items accepted per request and LLM calls in flight per batch
+    chat_batch_max_items: int = _get_int("CHAT_BATCH_MAX_ITEMS", 100)
+    chat_batch_concurrency: int = _get_int("CHAT_BATCH_CONCURRENCY", 8)
+
+    # Chat requests generating an answer at once per worker (0 = no
+    # limit). Up to LLM_QUEUE_MAX more wait for a slot, follow-up turns
+    # first, then new sessions, then batch items; the rest get a 429
+    llm_max_concurrency: int = _get_int("LLM_MAX_CONCURRENCY", 16)
+    llm_queue_max: int = _get_int("LLM_QUEUE_MAX", 32)
+    # Longest wait for a slot before a 503; the wait is part of
+    # LLM_REQUEST_BUDGET_SECONDS
+    llm_queue_timeout_seconds: float = _get_float("LLM_QUEUE_TIMEOUT_SECONDS", 3.0)
+
+    # ------------------------------------------------------------------
+    # Diagnostics
+    # ------------------------------------------------------------------
+    # Per-stage timings (ms) in /chat responses:
+    # off | header (requests sending "X-Debug-Timings: 1") | always
+    debug_timings: str = _get_str("DEBUG_TIMINGS", "off")
+
+    # Profile one in N chat requests with cProfile (0 = off), keeping the
+    # newest PROFILE_MAX_FILES profiles in PROFILE_DIR
+    profile_sample_every: int = _get_int("PROFILE_SAMPLE_EVERY", 0)
+    profile_dir: str = _get_str("PROFILE_DIR", "./profiles")
+    profile_max_files: int = _get_int("PROFILE_MAX_FILES", 50)
+
     # ------------------------------------------------------------------
     # Paths
     # ------------------------------------------------------------------
@@ -0,0 +1,96 @@
+"""
+Fits retrieved chunks into the prompt's context budget.
+
+Chunks are taken in descending score order until the token budget (and
+the character cap) is used up. The first chunk that does not fit whole
+is cut back to its last complete sentence that fits, or cut mid-text
+when not even its first sentence fits; later chunks are still included
+if they fit whole.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+from token_counter import count_tokens
+
+# Chunks are joined with a blank line in the prompt
+SEPARATOR = "\n\n"
+
+# A truncated chunk shorter than this is not worth including
+MIN_TRUNCATED_TOKENS = 24
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+@dataclass
+class PackedContext:
+    chunks: List[str] = field(default_factory=list)
+    tokens: int = 0
+    dropped: int = 0
+    truncated: bool = False
+
+
+def _longest_prefix(text: str, ends: Sequence[int], max_tokens: int, max_chars: int) -> str:
+    """Longest text[:end] (ends ascending) within both limits, by binary search."""
+    best = ""
+    low, high = 0, len(ends) - 1
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = text[: ends[middle]].rstrip()
+        if len(candidate) <= max_chars and count_tokens(candidate) <= max_tokens:
+            best = candidate
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def truncate_to_budget(text: str, max_tokens: int, max_chars: int) -> str:
+    """
+    Longest prefix of text within both limits.
+
+    Ends at a sentence boundary when one fits; otherwise the text is cut
+    where the budget runs out. '' only if no character fits.
+    """
+    boundaries = [match.start() for match in _SENTENCE_END.finditer(text)]
+    best = _longest_prefix(text, boundaries + [len(text)], max_tokens, max_chars)
+    if not best:
+        best = _longest_prefix(text, range(1, len(text) + 1), max_tokens, max_chars)
+    return best
+
+
+def pack_context(
+    scored_chunks: List[Tuple[str, float]], max_tokens: int, max_chars: int
+) -> PackedContext:
+    """Pack chunks, highest score first, into max_tokens / max_chars."""
+    packed = PackedContext()
+    separator_tokens = count_tokens(SEPARATOR)
+    chars = 0
+
+    ordered = sorted(scored_chunks, key=lambda item: item[1], reverse=True)
+    for chunk, _score in ordered:
+        overhead_tokens = separator_tokens if packed.chunks else 0
+        overhead_chars = len(SEPARATOR) if packed.chunks else 0
+        remaining_tokens = max_tokens - packed.tokens - overhead_tokens
+        remaining_chars = max_chars - chars - overhead_chars
+
+        chunk_tokens = count_tokens(chunk)
+        if chunk_tokens <= remaining_tokens and len(chunk) <= remaining_chars:
+            packed.chunks.append(chunk)
+            packed.tokens += overhead_tokens + chunk_tokens
+            chars += overhead_chars + len(chunk)
+            continue
+
+        # Keep what fits of the first chunk that does not; smaller chunks
+        # further down may still fit whole
+        if not packed.truncated and remaining_tokens >= MIN_TRUNCATED_TOKENS:
+            truncated = truncate_to_budget(chunk, remaining_tokens, remaining_chars)
+            if truncated:
+                packed.chunks.append(truncated)
+                packed.tokens += overhead_tokens + count_tokens(truncated)
+                chars += overhead_chars + len(truncated)
+                packed.truncated = True
+
+    packed.dropped = len(ordered) - len(packed.chunks)
+    return packed
@@ -13,10 +13,10 @@ def create_embeddings():
     
     print("Creating embeddings from documents in data folder...")
     print("This will:")
-    print("  1. Delete existing vector store")
-    print("  2. Load all documents from data folder")
-    print("  3. Split documents into chunks")
-    print("  4. Create embeddings using HuggingFace model")
+    print("  1. Hash every document in the data folder")
+    print("  2. Split new or changed documents into chunks")
+    print("  3. Create embeddings for new chunks using HuggingFace model")
+    print("  4. Remove chunks of changed or deleted documents")
     print("  5. Store in ChromaDB vector store")
     print()
     
@@ -28,6 +28,14 @@ def create_embeddings():
             print("✓ Success!")
             print(f"  Status: {result.get('status')}")
             print(f"  Message: {result.get('message')}")
+            print(f"  Mode: {result.get('mode')}")
+            print(
+                f"  Files: {result.get('files_added', 0)} added, "
+                f"{result.get('files_changed', 0)} changed, "
+                f"{result.get('files_removed', 0)} removed, "
+                f"{result.get('files_skipped', 0)} unchanged"
+            )
+            print(f"  Time: {result.get('elapsed_seconds')}s")
             print()
             print("Embeddings are now ready for use in the chatbot.")
             return 0
@@ -0,0 +1,144 @@
+"""
+Micro-batching of concurrent query embeddings.
+
+A sentence-transformer forward pass over a small batch costs little more
+than one over a single query, so concurrent callers are collected for a
+short window and embedded together. The first caller to arrive leads
+the batch: it runs the embedding call and hands each caller its vector.
+
+A lone query never waits: when no forward pass is running, the leader
+embeds at once. Only a caller that arrives while another batch is being
+embedded opens a window, which closes after window_seconds or when the
+batch fills.
+
+Callers block until their vector is ready, so a batch can never hold
+more texts than there are threads calling embed() (the RAG executor's
+RAG_EXECUTOR_WORKERS), whatever max_batch_size says.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+class _Batch:
+    __slots__ = ("opened", "texts", "futures", "enqueued")
+
+    def __init__(self):
+        self.opened = time.monotonic()
+        self.texts: List[str] = []
+        self.futures: List[Future] = []
+        self.enqueued: List[float] = []
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embed() calls into batched embed_many() calls."""
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], List[List[float]]],
+        window_seconds: float = 0.005,
+        max_batch_size: int = 16,
+    ):
+        self.embed_many = embed_many
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._cond = threading.Condition()
+        self._open: _Batch | None = None
+        # Batches being embedded right now
+        self._running = 0
+
+        # Metrics
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.queries = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+
+    def embed(self, text: str) -> List[float]:
+        """Embed one text, sharing a forward pass with concurrent callers."""
+        future: Future = Future()
+
+        with self._cond:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+
+            batch.texts.append(text)
+            batch.futures.append(future)
+            batch.enqueued.append(time.monotonic())
+
+            if leader and self._running == 0:
+                # Nothing to share a forward pass with: embed right away
+                self._open = None
+            elif len(batch.texts) >= self.max_batch_size:
+                # Full: close it now and wake the leader
+                self._open = None
+                self._cond.notify_all()
+
+        if leader:
+            self._lead(batch)
+        return future.result()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "queries": self.queries,
+                "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "mean_queue_delay_ms": (
+                    round(self.queue_delay_total / self.queries * 1000, 3) if self.queries else 0.0
+                ),
+                "max_queue_delay_ms": round(self.queue_delay_max * 1000, 3),
+                "window_ms": self.window_seconds * 1000,
+                "max_batch_size": self.max_batch_size,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _lead(self, batch: _Batch) -> None:
+        """Wait for the batch window to close (if still open), then embed the batch."""
+        deadline = batch.opened + self.window_seconds
+        with self._cond:
+            while self._open is batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._open = None
+                    break
+                self._cond.wait(remaining)
+            self._running += 1
+
+        started = time.monotonic()
+        self._record(batch, started)
+
+        # Identical concurrent queries share one slot in the batch
+        unique = list(dict.fromkeys(batch.texts))
+        try:
+            vectors = dict(zip(unique, self.embed_many(unique)))
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        finally:
+            with self._cond:
+                self._running -= 1
+
+        for text, future in zip(batch.texts, batch.futures):
+            future.set_result(list(vectors[text]))
+
+    def _record(self, batch: _Batch, started: float) -> None:
+        size = len(batch.texts)
+        delays = [started - enqueued for enqueued in batch.enqueued]
+        with self._stats_lock:
+            self.batches += 1
+            self.queries += size
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.queue_delay_total += sum(delays)
+            self.queue_delay_max = max(self.queue_delay_max, max(delays))
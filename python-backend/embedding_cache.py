@@ -0,0 +1,99 @@
+"""
+In-process memoization of query embeddings.
+
+Repeated queries (after normalization) skip the sentence-transformer
+forward pass. Vectors are kept as compact float32 arrays in a bounded
+LRU so memory use stays predictable.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+
+# Rough per-entry bookkeeping cost on top of key and vector bytes
+_ENTRY_OVERHEAD_BYTES = 150
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: casefolded with whitespace collapsed."""
+    return " ".join(query.casefold().split())
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of query string -> float32 embedding vector."""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, array]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str) -> Optional[List[float]]:
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return vector.tolist()
+
+    def put(self, query: str, embedding: List[float]) -> None:
+        key = normalize_query(query)
+        vector = array("f", embedding)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous)
+
+            self._entries[key] = vector
+            self._bytes += self._entry_size(key, vector)
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest_key, oldest = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(oldest_key, oldest)
+                self.evictions += 1
+
+    def get_or_compute(
+        self, query: str, compute: Callable[[str], List[float]]
+    ) -> List[float]:
+        """Return the cached embedding for query, computing it on a miss."""
+        embedding = self.get(query)
+        if embedding is None:
+            embedding = compute(query)
+            self.put(query, embedding)
+        return embedding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    @staticmethod
+    def _entry_size(key: str, vector: array) -> int:
+        return len(key) + vector.itemsize * len(vector) + _ENTRY_OVERHEAD_BYTES
@@ -0,0 +1,131 @@
+"""
+Export the embedding model to ONNX for EMBEDDING_BACKEND=onnx.
+
+Saves settings.embedding_model (tokenizer and sentence-transformers
+config included) to a local folder, exports the transformer to
+model.onnx, writes a dynamically quantized int8 copy to
+model_quantized.onnx, and checks both against the PyTorch model:
+
+    python export_onnx.py [--output models/...] [--min-cosine 0.99]
+
+Exits non-zero if either export falls below the cosine threshold.
+"""
+
+import argparse
+import inspect
+import sys
+from pathlib import Path
+
+from config import settings
+from onnx_embeddings import OnnxEmbeddings, default_model_path
+
+PARITY_SENTENCES = [
+    "When does my vehicle warranty expire?",
+    "What are the service department hours on Saturday?",
+    "Can I schedule an oil change and tire rotation for tomorrow morning?",
+    "What financing options are available for a new hybrid SUV?",
+    "My check engine light came on after the last service visit.",
+    "Do you offer a loaner car while my transmission is being repaired?",
+    "How much is my trade-in worth?",
+    "ok",
+]
+
+
+def export(output: Path) -> None:
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Loading {settings.embedding_model}...")
+    model = SentenceTransformer(settings.embedding_model, device="cpu")
+    model.save(str(output))
+
+    sample = model.tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Transformer body with positional inputs, returning token embeddings."""
+
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    wrapper = TokenEmbeddings(model[0].auto_model).eval()
+    export_kwargs = dict(
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # TorchScript exporter; newer torch defaults to dynamo (needs onnxscript)
+        export_kwargs["dynamo"] = False
+
+    print("Exporting ONNX model...")
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            tuple(sample[name] for name in input_names),
+            str(output / "model.onnx"),
+            **export_kwargs,
+        )
+
+    print("Quantizing to int8...")
+    quantize_dynamic(
+        str(output / "model.onnx"),
+        str(output / "model_quantized.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+
+
+def check_parity(output: Path, min_cosine: float) -> bool:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(settings.embedding_model, device="cpu").encode(
+        PARITY_SENTENCES, normalize_embeddings=True
+    )
+
+    passed = True
+    for quantized in (False, True):
+        embeddings = OnnxEmbeddings(str(output), quantized=quantized)
+        vectors = np.asarray(embeddings.embed_documents(PARITY_SENTENCES))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        cosines = (vectors * reference).sum(axis=1)
+
+        label = "int8" if quantized else "fp32"
+        ok = bool(cosines.min() >= min_cosine)
+        passed = passed and ok
+        print(
+            f"{label}: min cosine {cosines.min():.4f}, mean {cosines.mean():.4f} "
+            f"({'ok' if ok else 'BELOW ' + str(min_cosine)})"
+        )
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--output",
+        default=settings.onnx_model_path or default_model_path(settings.embedding_model),
+    )
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--skip-export", action="store_true", help="only run the parity check")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    if not args.skip_export:
+        export(output)
+        print(f"Exported to {output}")
+
+    return 0 if check_parity(output, args.min_cosine) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
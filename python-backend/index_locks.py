@@ -0,0 +1,86 @@
+"""
+Cross-process coordination of vector index generations.
+
+Every uvicorn worker opens the same VECTOR_STORE_PATH. Two file locks
+keep them from stepping on each other:
+
+- store_lock(): an exclusive flock on <store>/.lock, held while a
+  generation is built, while a worker switches to the generation named
+  by CURRENT, and while old generations are deleted. Workers starting
+  together therefore build the first generation once; the others wait
+  and load it.
+- GenerationPin: a shared flock on <generation>/.readers, held by each
+  worker for as long as it serves that generation. A generation is
+  only deleted once an exclusive lock on that file succeeds, i.e. no
+  worker (including this one) still has it pinned.
+
+Locks are released by the kernel when a worker exits, so a crashed
+worker cannot keep a generation alive. Without fcntl (Windows) the
+locks are no-ops; run a single worker there.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STORE_LOCK_FILENAME = ".lock"
+READERS_FILENAME = ".readers"
+
+
+@contextmanager
+def store_lock(root: Path, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold the store-wide lock for the enclosed block.
+
+    Yields True once held; with blocking=False, yields False instead of
+    waiting if another worker holds it.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / STORE_LOCK_FILENAME, "a+b") as handle:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class GenerationPin:
+    """Marks a generation directory as in use by this process until released."""
+
+    def __init__(self, index_path: Path):
+        index_path.mkdir(parents=True, exist_ok=True)
+        self.index_path = index_path
+        self._handle: Optional[object] = open(index_path / READERS_FILENAME, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_SH)
+
+    def release(self) -> None:
+        """Drop the pin (closing the file releases the lock); idempotent."""
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.close()
+
+
+def generation_unused(index_path: Path) -> bool:
+    """True if no process has the generation pinned (call under store_lock)."""
+    if fcntl is None or not index_path.is_dir():
+        return True
+    with open(index_path / READERS_FILENAME, "a+b") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(handle, fcntl.LOCK_UN)
+    return True
@@ -0,0 +1,209 @@
+"""
+Streaming document ingestion pipeline.
+
+Files are discovered and hashed one at a time, split into chunks in a
+process pool with a bounded number of files in flight, and written to
+the vector store in fixed-size batches, so peak memory depends on the
+batch size rather than on the size of the corpus.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+SOURCE_SUFFIXES = {".txt", ".md"}
+EXCLUDED_FILES = {"README.md"}
+
+# Files split per worker before results must be consumed
+_IN_FLIGHT_PER_WORKER = 2
+
+
+# ------------------------------------------------------------------
+# Discovery
+# ------------------------------------------------------------------
+
+def iter_source_files(data_folder: str) -> Iterator[Path]:
+    """Yield indexable files in the data folder, in a stable order."""
+    data_path = Path(data_folder)
+    if not data_path.exists():
+        return
+
+    for file_path in sorted(data_path.glob("*")):
+        if file_path.suffix not in SOURCE_SUFFIXES:
+            continue
+        if file_path.name in EXCLUDED_FILES:
+            continue
+        yield file_path
+
+
+def file_digest(file_path: Path) -> str:
+    """SHA-256 of a file, read in blocks so large files are not loaded whole."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids(source: str, chunks: List[str]) -> List[str]:
+    """Content-derived chunk IDs; repeats within a file get a suffix."""
+    ids: List[str] = []
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        base = hashlib.sha256(f"{source}\0{chunk}".encode("utf-8")).hexdigest()[:32]
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        ids.append(base if count == 0 else f"{base}-{count}")
+    return ids
+
+
+# ------------------------------------------------------------------
+# Splitting
+# ------------------------------------------------------------------
+
+@dataclass
+class SplitFile:
+    name: str
+    chunks: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+_splitters: Dict[tuple, object] = {}
+
+
+def _split_file(path: str, chunk_size: int, chunk_overlap: int) -> SplitFile:
+    """Read and chunk one file (runs inside pool workers)."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    name = os.path.basename(path)
+    try:
+        content = Path(path).read_text(encoding="utf-8")
+    except Exception as e:
+        return SplitFile(name=name, error=str(e))
+
+    key = (chunk_size, chunk_overlap)
+    splitter = _splitters.get(key)
+    if splitter is None:
+        splitter = _splitters[key] = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+    return SplitFile(name=name, chunks=splitter.split_text(content))
+
+
+def split_files(
+    paths: List[Path], chunk_size: int, chunk_overlap: int, workers: int
+) -> Iterator[SplitFile]:
+    """
+    Yield the chunks of each file, in input order.
+
+    With more than one worker and more than one file the splitting runs in
+    a process pool; at most a few files per worker are in flight so
+    results never pile up in memory.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield _split_file(str(path), chunk_size, chunk_overlap)
+        return
+
+    # spawn: the server process has threads, which do not survive fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        remaining = iter(paths)
+        limit = workers * _IN_FLIGHT_PER_WORKER
+
+        for path in remaining:
+            pending.append(pool.submit(_split_file, str(path), chunk_size, chunk_overlap))
+            if len(pending) >= limit:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append(
+                    pool.submit(_split_file, str(next_path), chunk_size, chunk_overlap)
+                )
+            yield result
+
+
+# ------------------------------------------------------------------
+# Writing
+# ------------------------------------------------------------------
+
+class ChunkWriter:
+    """
+    Buffers new chunks and upserts them into the vector store in batches.
+
+    Each flush embeds one batch (the store's embedding function is called
+    once per batch), so the batch size bounds both memory and the size
+    of each embedding forward pass.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        batch_size: int = 256,
+        total_files: int = 0,
+        progress: Optional[Callable[[str], None]] = print,
+    ):
+        self.vector_store = vector_store
+        self.batch_size = max(1, batch_size)
+        self.total_files = total_files
+        self.progress = progress
+
+        self.added = 0
+        self.files_done = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._started = time.perf_counter()
+
+    def add(self, chunk_id: str, text: str, metadata: dict) -> None:
+        self._ids.append(chunk_id)
+        self._texts.append(text)
+        self._metadatas.append(metadata)
+        if len(self._ids) >= self.batch_size:
+            self.flush()
+
+    def file_done(self) -> None:
+        self.files_done += 1
+
+    def flush(self) -> None:
+        if not self._ids:
+            return
+
+        self.vector_store.add_texts(
+            self._texts, metadatas=self._metadatas, ids=self._ids
+        )
+        self.added += len(self._ids)
+        self._ids, self._texts, self._metadatas = [], [], []
+
+        if self.progress is not None:
+            elapsed = time.perf_counter() - self._started
+            rate = self.added / elapsed if elapsed else 0.0
+            self.progress(
+                f"Indexed {self.added} chunks from "
+                f"{self.files_done}/{self.total_files} files ({rate:.0f} chunks/s)"
+            )
+
+
+def delete_in_batches(vector_store, ids: Iterable[str], batch_size: int) -> int:
+    """Delete chunk IDs from the vector store, batch_size at a time."""
+    ids = list(ids)
+    batch_size = max(1, batch_size)
+    for start in range(0, len(ids), batch_size):
+        vector_store.delete(ids=ids[start : start + batch_size])
+    return len(ids)
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
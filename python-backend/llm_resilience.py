@@ -0,0 +1,355 @@
+"""
+Deadlines, retries, hedging and a circuit breaker around the chat LLM.
+
+ResilientLLM wraps the LangChain chat model used by RAGSystem:
+
+- Every request gets a budget (LLM_REQUEST_BUDGET_SECONDS); each attempt
+  is cut off at LLM_ATTEMPT_TIMEOUT_SECONDS or the end of the budget,
+  whichever comes first, so a hung provider call cannot hold a request.
+- Failed attempts are retried up to LLM_MAX_RETRIES times with full
+  jitter backoff, but only while the rest of the budget can still fit a
+  typical (median) call.
+- With LLM_HEDGE_ENABLED, a second identical request is sent once the
+  first has run longer than the recent p95 latency; whichever answers
+  first wins and the other is cancelled.
+- After LLM_BREAKER_FAILURES consecutive failures the circuit opens and
+  calls fail immediately with CircuitOpenError for
+  LLM_BREAKER_RESET_SECONDS; then a single probe call decides whether it
+  closes again. RAGSystem answers from the retrieved documents meanwhile.
+
+Streams get the same deadline and breaker, and are retried only until
+their first chunk has arrived. Blocking invoke() enforces the deadline
+between attempts only, as a running synchronous call cannot be cut off.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+
+from metrics import LLM_HEDGES, LLM_RETRIES, LLM_SHORT_CIRCUITS, LLM_TIMEOUTS
+
+# Upper bound for a single retry backoff, in seconds
+MAX_BACKOFF_SECONDS = 2.0
+
+# Successful call durations kept for the hedge delay and retry estimates
+LATENCY_WINDOW = 256
+# Samples needed before those estimates replace the configured defaults
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class LLMTimeoutError(TimeoutError):
+    """An LLM call ran past its deadline."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls go through. open: calls are refused until reset_seconds
+    have passed. half_open: one probe call goes through; its success
+    closes the circuit, its failure opens it again. A threshold of 0
+    disables the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return "open"
+            return "half_open"
+
+    def allow(self) -> bool:
+        """True if a call may go ahead now."""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            # Half-open: let one probe through. A probe that never reports
+            # back (e.g. its request was cancelled) is replaced after a while.
+            if self._probe_started is not None and now - self._probe_started < self.reset_seconds:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._opened_at is not None:
+                print("LLM circuit breaker closed")
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._probe_started is not None
+            if probe_failed or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                if not probe_failed:
+                    print(f"LLM circuit breaker opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+
+
+class LatencyTracker:
+    """Recent successful call durations (seconds), for percentile estimates."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until there are enough samples."""
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class ResilientLLM:
+    """Chat model wrapper adding deadlines, retries, hedging and a breaker."""
+
+    def __init__(
+        self,
+        llm,
+        request_budget: float = 0.0,
+        attempt_timeout: float = 0.0,
+        max_retries: int = 0,
+        backoff_base: float = 0.2,
+        hedge_enabled: bool = False,
+        hedge_min_delay: float = 0.5,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            llm: LangChain chat model (invoke / ainvoke / astream)
+            request_budget: Seconds per request across all attempts (0 = none)
+            attempt_timeout: Seconds per attempt (0 = only the budget)
+            max_retries: Attempts after the first
+            backoff_base: First retry backoff ceiling in seconds, doubled per retry
+            hedge_enabled: Send a second request when the first runs past p95
+            hedge_min_delay: Hedge delay floor, and the delay until p95 is known
+            breaker: Circuit breaker shared by all calls (default: disabled)
+        """
+        self.llm = llm
+        self.request_budget = request_budget
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker(0, 0.0)
+        self.latency = LatencyTracker()
+
+    # ------------------------------------------------------------------
+    # Deadlines and retry policy
+    # ------------------------------------------------------------------
+
+    def deadline(self) -> Optional[float]:
+        """time.monotonic() deadline for a request starting now (None = no budget)."""
+        if self.request_budget <= 0:
+            return None
+        return time.monotonic() + self.request_budget
+
+    def _attempt_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        timeout = self.attempt_timeout if self.attempt_timeout > 0 else None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError("LLM request budget exhausted")
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _check_breaker(self) -> None:
+        if not self.breaker.allow():
+            LLM_SHORT_CIRCUITS.inc()
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+    def _retry_delay(self, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        """Backoff before the next attempt, or None if it should not be retried."""
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+        delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff_base * 2 ** attempt))
+        if deadline is not None:
+            typical = self.latency.percentile(0.5) or 0.0
+            if time.monotonic() + delay + typical >= deadline:
+                return None
+        return delay
+
+    def _failed(self, error: Exception) -> Exception:
+        self.breaker.record_failure()
+        if isinstance(error, asyncio.TimeoutError):
+            LLM_TIMEOUTS.inc()
+            return LLMTimeoutError("LLM call exceeded its deadline")
+        return error
+
+    def _succeeded(self, started: float) -> None:
+        self.breaker.record_success()
+        self.latency.add(time.monotonic() - started)
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    async def ainvoke(self, messages, deadline: Optional[float] = None, hedge: bool = True):
+        """LLM response for messages, within the deadline (default: a fresh budget)."""
+        if deadline is None:
+            deadline = self.deadline()
+        attempt = 0
+        while True:
+            self._check_breaker()
+            timeout = self._attempt_timeout(deadline)
+            started = time.monotonic()
+            try:
+                if hedge and self.hedge_enabled and self.breaker.state == "closed":
+                    response = await self._hedged(messages, timeout)
+                else:
+                    response = await asyncio.wait_for(self.llm.ainvoke(messages), timeout)
+            except Exception as e:
+                error = self._failed(e)
+                delay = self._retry_delay(attempt, deadline)
+                if delay is None:
+                    raise error from e
+                print(f"LLM attempt {attempt + 1} failed ({error!r}), retrying in {delay:.2f}s")
+                LLM_RETRIES.inc()
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._succeeded(started)
+            return response
+
+    async def _hedged(self, messages, timeout: Optional[float]):
+        """Race the call against a second one started after the hedge delay."""
+        loop = asyncio.get_running_loop()
+        expires = None if timeout is None else loop.time() + timeout
+        delay = max(self.hedge_min_delay, self.latency.percentile(0.95) or 0.0)
+
+        pending = {asyncio.ensure_future(self.llm.ainvoke(messages))}
+        error: Optional[BaseException] = None
+        hedged = False
+        try:
+            while pending:
+                wait = None if expires is None else max(0.0, expires - loop.time())
+                if not hedged:
+                    wait = delay if wait is None else min(delay, wait)
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+                if not done and expires is not None and loop.time() >= expires:
+                    raise asyncio.TimeoutError()
+                if not hedged and not done:
+                    # Still running past the usual p95: send a second request
+                    hedged = True
+                    LLM_HEDGES.inc()
+                    pending.add(asyncio.ensure_future(self.llm.ainvoke(messages)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def invoke(self, messages, deadline: Optional[float] = None):
+        """Blocking variant of ainvoke (no hedging; deadline checked between attempts)."""
+        if deadline is None:
+            deadline = self.deadline()
+        attempt = 0
+        while True:
+            self._check_breaker()
+            self._attempt_timeout(deadline)
+            started = time.monotonic()
+            try:
+                response = self.llm.invoke(messages)
+            except Exception as e:
+                error = self._failed(e)
+                delay = self._retry_delay(attempt, deadline)
+                if delay is None:
+                    raise error from e
+                print(f"LLM attempt {attempt + 1} failed ({error!r}), retrying in {delay:.2f}s")
+                LLM_RETRIES.inc()
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._succeeded(started)
+            return response
+
+    async def astream(self, messages, deadline: Optional[float] = None) -> AsyncIterator:
+        """
+        Stream the LLM response within the deadline.
+
+        Attempts are retried until the first chunk arrives; after that a
+        failure is raised to the caller, who has already forwarded text.
+        """
+        if deadline is None:
+            deadline = self.deadline()
+        attempt = 0
+        while True:
+            self._check_breaker()
+            timeout = self._attempt_timeout(deadline)
+            started = time.monotonic()
+            # aclosing: an abandoned stream cancels the provider request now,
+            # not whenever the generator is garbage collected
+            async with aclosing(self.llm.astream(messages)) as stream:
+                try:
+                    first = await asyncio.wait_for(stream.__anext__(), timeout)
+                except StopAsyncIteration:
+                    self._succeeded(started)
+                    return
+                except Exception as e:
+                    error = self._failed(e)
+                    delay = self._retry_delay(attempt, deadline)
+                    if delay is None:
+                        raise error from e
+                else:
+                    yield first
+                    while True:
+                        try:
+                            timeout = self._attempt_timeout(deadline)
+                            chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        except Exception as e:
+                            raise self._failed(e) from e
+                        yield chunk
+                    self._succeeded(started)
+                    return
+
+            print(f"LLM stream attempt {attempt + 1} failed ({error!r}), retrying in {delay:.2f}s")
+            LLM_RETRIES.inc()
+            attempt += 1
+            await asyncio.sleep(delay)
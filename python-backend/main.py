@@ -1,24 +1,59 @@
 """FastAPI application for RAG-based chatbot."""
 
 
-from typing import Any, Dict
+import asyncio
+import json
+import time
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from typing import Any, AsyncIterator, Dict, Optional
 
 from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.background import BackgroundTask
 
+from admission import FOLLOW_UP, NEW_SESSION, AdmissionRejected, admission_controller
 from config import settings
-from rag_system import rag_system
-from security import security_validator
+from metrics import (
+    CONTENT_TYPE,
+    ERRORS,
+    REFUSALS,
+    SECURITY_RULE_HITS,
+    collect_timings,
+    observe_request,
+    observe_stage,
+    registry,
+)
+from profiling import request_profiler
+from rag_system import BUSY_MESSAGE, rag_system
+from security import StreamSanitizer, security_validator
+
+
+
+def _warm_up() -> None:
+    """Load models and the vector store; failures are reported by /ready."""
+    try:
+        rag_system.initialize()
+    except Exception as e:
+        print(f"RAG system failed to initialize: {e}")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy initialization runs in the background so the port binds
+    # immediately; /ready reports when chats can be served.
+    asyncio.get_running_loop().run_in_executor(None, _warm_up)
+    yield
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="RAG-based chatbot for automotive dealership customer support"
+    description="RAG-based chatbot for automotive dealership customer support",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -34,6 +69,41 @@ app.add_middleware(
 # Templates for simple UI
 templates  = Jinja2Templates(directory="templates")
 
+# Gauges read when /metrics is scraped
+registry.gauge(
+    "chat_sessions_live",
+    "Sessions held by the session store.",
+    lambda: len(rag_system.sessions),
+)
+registry.gauge(
+    "vector_index_chunks",
+    "Chunks in the live vector index.",
+    rag_system.index_size,
+)
+registry.gauge(
+    "vector_index_generation",
+    "Index generation currently served.",
+    lambda: rag_system.index_generation if rag_system.is_ready else None,
+)
+registry.gauge(
+    "llm_circuit_breaker_state",
+    "LLM circuit breaker: 0 = closed, 1 = half-open (probing), 2 = open.",
+    lambda: {"closed": 0, "half_open": 1, "open": 2}[rag_system.llm_breaker.state],
+)
+# LLM calls (chats, batch items, summaries) wait for admission_controller
+rag_system.admission = admission_controller
+
+registry.gauge(
+    "llm_admission_in_flight",
+    "LLM calls holding a slot.",
+    lambda: admission_controller.in_flight,
+)
+registry.gauge(
+    "llm_admission_queue_depth",
+    "LLM calls waiting for a slot.",
+    lambda: admission_controller.queued,
+)
+
 
 def _parse_chat_request(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Lightweight validation for the chat payload without pydantic."""
@@ -85,6 +155,102 @@ def _parse_chat_request(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _ensure_ready() -> None:
+    """Reject work that needs the models until startup has finished."""
+    if not rag_system.is_ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is starting up, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+
+
+async def _admission_priority(session_id: Optional[str]) -> int:
+    """Follow-up turns of sessions this worker holds get LLM slots first."""
+    if session_id and await rag_system.ahas_session(session_id):
+        return FOLLOW_UP
+    return NEW_SESSION
+
+
+def _overloaded(e: AdmissionRejected) -> HTTPException:
+    """
+    Shed a request admission control rejected, with Retry-After: 429 when
+    the queue is full, 503 when it was pushed out or waited too long.
+    """
+    REFUSALS.inc(reason="overloaded")
+    return HTTPException(
+        status_code=(
+            status.HTTP_429_TOO_MANY_REQUESTS
+            if e.reason == "queue_full"
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        detail=BUSY_MESSAGE,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+async def _prepend(first: Dict[str, Any], rest: AsyncIterator[Dict[str, Any]]):
+    """Yield `first`, then everything from `rest`."""
+    yield first
+    async for item in rest:
+        yield item
+
+
+async def _read_chat_request(request: Request) -> Dict[str, Any]:
+    """Parse, validate and security-check a chat request body."""
+    try:
+        with observe_stage("parse_json"):
+            payload = await request.json()
+    except Exception:
+        REFUSALS.inc(reason="invalid_request")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid JSON payload"
+        )
+
+    return _validate_chat_request(payload)
+
+
+def _validate_chat_request(payload: Any) -> Dict[str, Any]:
+    """Validate and security-check one parsed chat request."""
+    try:
+        chat_request = _parse_chat_request(payload)
+    except HTTPException:
+        REFUSALS.inc(reason="invalid_request")
+        raise
+
+    # Validate input for security
+    if settings.enable_security_check:
+        with observe_stage("validate_input"):
+            verdict = security_validator.check(
+                chat_request["query"],
+                settings.max_query_length
+            )
+        if not verdict.valid:
+            REFUSALS.inc(reason="security")
+            SECURITY_RULE_HITS.inc(rule=verdict.rule)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=verdict.message
+            )
+
+    return chat_request
+
+
+def _debug_timings(request: Request):
+    """collect_timings() if this request should report stage timings, else a no-op."""
+    mode = settings.debug_timings.lower()
+    header = request.headers.get("x-debug-timings", "").lower()
+    if mode == "always" or (mode == "header" and header in {"1", "true", "yes", "on"}):
+        return collect_timings()
+    return nullcontext()
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 # API Endpoints
 @app.get("/", tags=["Root"])
 async def root():
@@ -106,6 +272,22 @@ async def health_check():
     }
 
 
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness endpoint: 200 once models and the vector store are loaded."""
+    if rag_system.is_ready:
+        return {"status": "ready", "index_generation": rag_system.index_generation}
+
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "failed" if rag_system.startup_error else "starting",
+            "error": rag_system.startup_error,
+        },
+        headers={"Retry-After": "5"},
+    )
+
+
 @app.post(
     f"{settings.api_prefix}/chat",
     tags=["Chat"],
@@ -125,53 +307,218 @@ async def chat(request: Request):
     - **session_id**: The session ID used
     - **context_used**: Number of context chunks retrieved and used
     - **memory_size**: Number of messages in the session history
+    - **memory_tokens**: Tokens of session history included in the prompt
+    - **prompt_tokens**: Estimated tokens sent to the LLM (0 when cached)
+    - **cached**: Whether the answer was served from the response cache
     - **status**: Status of the request
+    - **timings**: Per-stage durations in ms plus `total`, only in debug
+      mode (DEBUG_TIMINGS=always, or =header with `X-Debug-Timings: 1`)
+
+    When all LLM slots are busy the request waits in a queue; if it is
+    shed instead, the answer is 429 (queue full) or 503 (waited too
+    long) with a `Retry-After` header.
     """
-    try:
+    started = time.perf_counter()
+    with observe_request("chat"), request_profiler.sample("chat"), _debug_timings(request) as timings:
         try:
-            payload = await request.json()
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid JSON payload"
-            )
+            _ensure_ready()
+            chat_request = await _read_chat_request(request)
+            # Process query through RAG system (non-blocking); only the
+            # LLM call waits for an admission slot
+            try:
+                result = await rag_system.aquery(
+                    user_query=chat_request["query"],
+                    session_id=chat_request.get("session_id"),
+                    user_data=chat_request.get("user_data"),
+                    additional_context=chat_request.get("additional_context"),
+                    priority=await _admission_priority(chat_request.get("session_id")),
+                )
+            except AdmissionRejected as e:
+                raise _overloaded(e)
 
-        chat_request = _parse_chat_request(payload)
+            # Sanitize output
+            if settings.enable_security_check:
+                with observe_stage("sanitize_output"):
+                    result["response"] = security_validator.sanitize_output(result["response"])
 
-        # Validate input for security
-        if settings.enable_security_check:
-            is_valid, error_message = security_validator.validate_input(
-                chat_request["query"],
-                settings.max_query_length
+            if timings is not None:
+                timings["total"] = (time.perf_counter() - started) * 1000
+                result["timings"] = {stage: round(ms, 3) for stage, ms in timings.items()}
+
+            return result
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            ERRORS.inc(endpoint="chat")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An error occurred while processing your request"
             )
-            if not is_valid:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=error_message
-                )
 
-        # Process query through RAG system
-        result = rag_system.query(
-            user_query=chat_request["query"],
-            session_id=chat_request.get("session_id"),
-            user_data=chat_request.get("user_data"),
-            additional_context=chat_request.get("additional_context")
-        )
 
-        # Sanitize output
-        if settings.enable_security_check:
-            result["response"] = security_validator.sanitize_output(result["response"])
+@app.post(f"{settings.api_prefix}/chat/stream", tags=["Chat"])
+async def chat_stream(request: Request):
+    """
+    Streaming variant of the chat endpoint (Server-Sent Events).
 
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+    Accepts the same body as `/chat`. Emits:
+    - **start**: `session_id` and `context_used`, before generation begins
+    - **token**: `content` delta, already sanitized
+    - **done**: final `session_id`, `context_used`, `memory_size`, `memory_tokens`, `prompt_tokens`, `cached`, `status`
+    - **error**: `detail`, if generation fails mid-stream
+
+    The turn is added to the session history only after the full
+    response has been streamed. Requests shed by admission control get
+    a 429 / 503 with `Retry-After` before the stream starts, as on `/chat`.
+    """
+    _ensure_ready()
+    chat_request = await _read_chat_request(request)
+    events = rag_system.astream_query(
+        user_query=chat_request["query"],
+        session_id=chat_request.get("session_id"),
+        user_data=chat_request.get("user_data"),
+        additional_context=chat_request.get("additional_context"),
+        priority=await _admission_priority(chat_request.get("session_id")),
+    )
+    # Retrieval and admission happen before the first event, so a shed
+    # request still gets its status code
+    try:
+        first = await events.__anext__()
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except Exception:
+        ERRORS.inc(endpoint="chat_stream")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while processing your request"
         )
 
+    async def event_stream():
+        sanitizer = StreamSanitizer() if settings.enable_security_check else None
+
+        with observe_request("chat_stream"):
+            try:
+                async with aclosing(events):
+                    async for event in _prepend(first, events):
+                        kind = event.pop("event")
+
+                        if kind == "token":
+                            text = sanitizer.feed(event["content"]) if sanitizer else event["content"]
+                            if text:
+                                yield _sse_event("token", {"content": text})
+                            continue
+
+                        if kind == "done" and sanitizer:
+                            tail = sanitizer.flush()
+                            if tail:
+                                yield _sse_event("token", {"content": tail})
+
+                        if kind == "error":
+                            ERRORS.inc(endpoint="chat_stream")
+                        yield _sse_event(kind, event)
+            except Exception:
+                ERRORS.inc(endpoint="chat_stream")
+                yield _sse_event(
+                    "error",
+                    {"detail": "An error occurred while processing your request"}
+                )
+
+    # The background task frees the LLM slot if the stream never started
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(events.aclose),
+    )
+
+
+@app.post(f"{settings.api_prefix}/chat/batch", tags=["Chat"])
+async def chat_batch(request: Request):
+    """
+    Answer a list of chat requests in one call (bulk evaluation / replay).
+
+    Body: `{"requests": [...]}`, each item with the same fields as `/chat`,
+    at most CHAT_BATCH_MAX_ITEMS items. All queries are embedded and
+    retrieved together; LLM calls run CHAT_BATCH_CONCURRENCY at a time,
+    and items with the same `session_id` run in order.
+
+    Returns `results` in request order. Each result carries its `index`
+    and either the `/chat` response fields or `status: "error"` with a
+    `detail` (invalid item or failed generation); one bad item does not
+    fail the batch. Items queue for LLM slots behind interactive chats,
+    and items shed by admission control also carry `retry_after`.
+    """
+    _ensure_ready()
+
+    with observe_request("chat_batch"):
+        return await _answer_batch(request)
+
+
+async def _answer_batch(request: Request) -> Dict[str, Any]:
+    """Validate and answer a batch request (the body of chat_batch)."""
+    try:
+        with observe_stage("parse_json"):
+            payload = await request.json()
+    except Exception:
+        REFUSALS.inc(reason="invalid_request")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid JSON payload"
+        )
+
+    items = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        REFUSALS.inc(reason="invalid_request")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'requests' is required and must be a non-empty list"
+        )
+    if len(items) > settings.chat_batch_max_items:
+        REFUSALS.inc(reason="invalid_request")
+        raise HTTPException(
+            status_code=413,  # Content Too Large
+            detail=f"At most {settings.chat_batch_max_items} requests per batch"
+        )
+
+    results = [None] * len(items)
+    valid_indexes = []
+    valid_requests = []
+    for index, item in enumerate(items):
+        try:
+            valid_requests.append(_validate_chat_request(item))
+            valid_indexes.append(index)
+        except HTTPException as e:
+            results[index] = {"status": "error", "detail": e.detail}
+
+    if valid_requests:
+        try:
+            answers = await rag_system.aquery_batch(valid_requests)
+        except Exception:
+            ERRORS.inc(endpoint="chat_batch")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An error occurred while processing your request"
+            )
+
+        for index, answer in zip(valid_indexes, answers):
+            if settings.enable_security_check and answer.get("response"):
+                with observe_stage("sanitize_output"):
+                    answer["response"] = security_validator.sanitize_output(answer["response"])
+            # Items shed by admission control are counted there, not as errors
+            if answer["status"] != "success" and "retry_after" not in answer:
+                ERRORS.inc(endpoint="chat_batch")
+            results[index] = answer
+
+    results = [{"index": index, **result} for index, result in enumerate(results)]
+    failed = sum(1 for result in results if result["status"] != "success")
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
+
+
 @app.get(f"{settings.api_prefix}/ui", response_class=HTMLResponse, tags=["UI"]) 
 async def ui(request: Request):
     """Serve a simple HTML UI to exercise the API endpoints."""
@@ -191,7 +538,7 @@ async def clear_session(request: Request):
                 detail="'session_id' is required and must be a string"
             )
         
-        rag_system.clear_session(session_id)
+        await rag_system.session_io(rag_system.clear_session, session_id)
         return {
             "status": "success",
             "message": f"Session {session_id} cleared"
@@ -205,11 +552,17 @@ async def clear_session(request: Request):
         )
 
 
+@app.get(f"{settings.api_prefix}/session/stats", tags=["Session"])
+async def get_session_stats():
+    """Live, evicted and expired session counts and bytes held in memory."""
+    return await rag_system.session_io(rag_system.sessions.stats)
+
+
 @app.get(f"{settings.api_prefix}/session/{{session_id}}/history", tags=["Session"])
 async def get_session_history(session_id: str):
     """Get conversation history for a specific session."""
     try:
-        history = rag_system.get_session_history(session_id)
+        history = await rag_system.session_io(rag_system.get_session_history, session_id)
         # Convert message objects to dicts for JSON serialization
         history_dicts = []
         for msg in history:
@@ -233,17 +586,25 @@ async def get_session_history(session_id: str):
     tags=["Admin"],
     status_code=status.HTTP_200_OK
 )
-async def reload_documents():
+async def reload_documents(full: bool = False):
     """
-    Reload documents from the data folder and rebuild the vector store.
-    
-    This endpoint should be called after adding new documents to the data folder.
+    Re-index documents from the data folder.
+
+    This endpoint should be called after adding, changing or removing
+    documents in the data folder. Only new or changed files are
+    re-embedded, into a copy of the index published as a new
+    generation; pass `full=true` to rebuild the whole index instead.
+    The live index keeps answering chats during the reload.
+    The response reports files added/changed/removed/skipped, the time
+    spent and the index generation now being served.
     """
+    _ensure_ready()
     try:
-        rag_system.reload_documents()
+        report = await run_in_threadpool(rag_system.reload_documents, full)
         return {
             "status": "success",
-            "message": "Documents reloaded and vector store rebuilt successfully"
+            "message": "Documents reloaded and vector store updated successfully",
+            **report,
         }
     except Exception as e:
         raise HTTPException(
@@ -252,6 +613,26 @@ async def reload_documents():
         )
 
 
+@app.get(f"{settings.api_prefix}/cache/stats", tags=["Info"])
+async def get_cache_stats():
+    """Cache hit/miss counters and memory usage, plus query embedding batch sizes."""
+    caches = {
+        "response_cache": rag_system.response_cache,
+        "embedding_cache": rag_system.embedding_cache,
+        "embedding_batcher": rag_system.embedding_batcher,
+    }
+    return {
+        name: cache.stats() if cache is not None else {"enabled": False}
+        for name, cache in caches.items()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    """Request, stage latency, error and index metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
 @app.get(f"{settings.api_prefix}/info", tags=["Info"])
 async def get_info():
     """Get information about the RAG system configuration."""
@@ -260,8 +641,12 @@ async def get_info():
         "version": settings.app_version,
         "model": settings.openai_model,
         "embedding_model": settings.embedding_model,
+        "vector_backend": settings.vector_backend,
         "top_k_results": settings.top_k_results,
-        "security_enabled": settings.enable_security_check
+        "security_enabled": settings.enable_security_check,
+        "security_rules_revision": security_validator.rules.revision,
+        "llm_max_concurrency": settings.llm_max_concurrency,
+        "index_generation": rag_system.index_generation
     }
 
 
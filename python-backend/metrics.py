@@ -0,0 +1,316 @@
+"""
+Prometheus metrics for the chat pipeline.
+
+A small in-process registry rendered by /metrics in the Prometheus text
+exposition format (0.0.4), so no client library is needed. Recording a
+counter or histogram sample is a dict lookup and a few additions under
+a per-metric lock; gauges are read from callbacks only when scraped.
+Metrics are per process: with several workers, scrape each one.
+
+observe_stage also adds each stage's duration to the current request's
+timings when collect_timings() is active (debug mode). The timings live
+in a context variable, so work handed to a thread pool must run in a
+copy of the caller's context to be included.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def totals(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """(count, sum) of observations per label set."""
+        with self._lock:
+            return {key: (sum(counts), total) for key, (counts, total) in self._series.items()}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+
+        lines = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time (no sample if it returns None)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Optional[float]]):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def _samples(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"Metrics: could not read {self.name}: {e}")
+            return []
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(
+        self, name: str, documentation: str, read: Callable[[], Optional[float]]
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, read))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ------------------------------------------------------------------
+# Chat pipeline metrics
+# ------------------------------------------------------------------
+
+STAGE_SECONDS = registry.histogram(
+    "chat_stage_duration_seconds",
+    "Time spent in each stage of a chat request.",
+    labels=("stage",),
+)
+REQUEST_SECONDS = registry.histogram(
+    "chat_request_duration_seconds",
+    "End-to-end chat request latency, per endpoint.",
+    labels=("endpoint",),
+)
+REQUESTS = registry.counter(
+    "chat_requests_total",
+    "Chat requests received, per endpoint.",
+    labels=("endpoint",),
+)
+ERRORS = registry.counter(
+    "chat_errors_total",
+    "Chat requests or items that failed with a server-side error.",
+    labels=("endpoint",),
+)
+REFUSALS = registry.counter(
+    "chat_refusals_total",
+    "Chat requests rejected before retrieval, by reason.",
+    labels=("reason",),
+)
+SECURITY_RULE_HITS = registry.counter(
+    "chat_security_rule_hits_total",
+    "Chat requests rejected by input validation, by the rule that fired.",
+    labels=("rule",),
+)
+LLM_ERRORS = registry.counter(
+    "llm_errors_total",
+    "LLM calls that raised, answered with the generic error message.",
+)
+LLM_RETRIES = registry.counter(
+    "llm_retries_total",
+    "LLM calls retried after a failed attempt.",
+)
+LLM_TIMEOUTS = registry.counter(
+    "llm_timeouts_total",
+    "LLM attempts cut off at their deadline.",
+)
+LLM_HEDGES = registry.counter(
+    "llm_hedged_requests_total",
+    "Second LLM requests sent because the first ran past the recent p95 latency.",
+)
+LLM_SHORT_CIRCUITS = registry.counter(
+    "llm_short_circuited_total",
+    "LLM calls refused because the circuit breaker was open.",
+)
+LLM_FALLBACKS = registry.counter(
+    "llm_fallback_answers_total",
+    "Chat answers built from retrieved documents because the LLM call failed.",
+)
+ADMISSION_WAIT_SECONDS = registry.histogram(
+    "llm_admission_wait_seconds",
+    "Time chat requests waited for an LLM slot before being admitted, by priority.",
+    labels=("priority",),
+)
+ADMISSION_REJECTIONS = registry.counter(
+    "llm_admission_rejected_total",
+    "Chat requests shed instead of waiting for an LLM slot, by reason and priority.",
+    labels=("reason", "priority"),
+)
+
+
+# Per-request stage durations in milliseconds, when requested
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Collect the stage durations (ms) of the enclosed request into a dict."""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Time the enclosed block into chat_stage_duration_seconds{stage=...}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed * 1000
+
+
+@contextmanager
+def observe_request(endpoint: str) -> Iterator[None]:
+    """Count a request and time it into chat_request_duration_seconds."""
+    REQUESTS.inc(endpoint=endpoint)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
@@ -0,0 +1,128 @@
+"""
+Sentence-transformer embeddings on ONNX Runtime.
+
+Runs an ONNX export of the embedding model (see export_onnx.py) on the
+CPU, optionally dynamically quantized to int8, without loading PyTorch.
+Implements the langchain Embeddings methods RAGSystem uses, with the
+same mean pooling / normalization as the sentence-transformers model, so
+vectors are interchangeable with HuggingFaceEmbeddings.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+MODEL_FILENAME = "model.onnx"
+QUANTIZED_MODEL_FILENAME = "model_quantized.onnx"
+
+
+class OnnxEmbeddings:
+    """Mean-pooled transformer embeddings computed with ONNX Runtime."""
+
+    def __init__(
+        self,
+        model_path: str,
+        quantized: bool = False,
+        threads: int = 0,
+        batch_size: int = 32,
+        max_length: Optional[int] = None,
+    ):
+        import numpy as np
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self._np = np
+        self.model_path = Path(model_path)
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length or self._configured_max_length()
+
+        model_file = self.model_path / (QUANTIZED_MODEL_FILENAME if quantized else MODEL_FILENAME)
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"{model_file} not found; run export_onnx.py to create it"
+            )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+
+        self.session = onnxruntime.InferenceSession(
+            str(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_path))
+        self.normalize = self._uses_normalize_module()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        # Batch texts of similar length together to keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[List[float]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start : start + self.batch_size]
+            embedded = self._embed_batch([texts[i] for i in batch])
+            for i, vector in zip(batch, embedded):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _embed_batch(self, texts: List[str]):
+        np = self._np
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        feeds = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self.input_names and name in encoded
+        }
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+        return pooled
+
+    def _configured_max_length(self) -> int:
+        """max_seq_length saved with the sentence-transformers model (256 if absent)."""
+        config_path = self.model_path / "sentence_bert_config.json"
+        if config_path.exists():
+            config = json.loads(config_path.read_text(encoding="utf-8"))
+            return int(config.get("max_seq_length") or 256)
+        return 256
+
+    def _uses_normalize_module(self) -> bool:
+        """Whether the sentence-transformers pipeline ends with Normalize."""
+        modules_path = self.model_path / "modules.json"
+        if not modules_path.exists():
+            return True
+        modules = json.loads(modules_path.read_text(encoding="utf-8"))
+        return any(module.get("type", "").endswith("Normalize") for module in modules)
+
+
+def default_model_path(model_name: str) -> str:
+    """Local directory export_onnx.py writes model_name to by default."""
+    return os.path.join("models", model_name.replace("/", "__") + "-onnx")
@@ -0,0 +1,111 @@
+"""
+Sampling request profiler.
+
+With PROFILE_SAMPLE_EVERY=N, one in N chat requests runs under cProfile
+and its stats are written to PROFILE_DIR: a .prof file (load it with
+pstats or snakeviz) and a .txt summary of the hottest functions. Only
+the newest PROFILE_MAX_FILES profiles are kept.
+
+cProfile follows the thread it was enabled on, i.e. the event loop:
+work handed to the worker pool (embedding, vector search) shows up as
+time waiting on it, and coroutines of other requests that run while the
+sampled one awaits are included too. One profile is taken at a time; a
+sample that comes due while another is running is skipped.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from config import settings
+
+# Functions listed in the text summary
+SUMMARY_LINES = 40
+
+
+class RequestProfiler:
+    """Profiles one in `every` requests and writes the stats to a directory."""
+
+    def __init__(self, every: int, directory: str, max_files: int = 50):
+        self.every = every
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._active = False
+        self.written = 0
+
+    @contextmanager
+    def sample(self, label: str) -> Iterator[None]:
+        """Profile the enclosed block if this request is due for sampling."""
+        if self.every <= 0:
+            yield
+            return
+
+        with self._lock:
+            self._requests += 1
+            due = self._requests % self.every == 0 and not self._active
+            if due:
+                self._active = True
+
+        if not due:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) owns this thread
+            with self._lock:
+                self._active = False
+            yield
+            return
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            try:
+                self._write(profiler, label, elapsed_ms)
+            except OSError as e:
+                print(f"Could not write request profile: {e}")
+            finally:
+                with self._lock:
+                    self._active = False
+
+    def _write(self, profiler: cProfile.Profile, label: str, elapsed_ms: float) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._requests}-{label}"
+        profiler.dump_stats(str(self.directory / f"{stem}.prof"))
+
+        summary = io.StringIO()
+        summary.write(f"{label}: {elapsed_ms:.1f} ms\n\n")
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+        (self.directory / f"{stem}.txt").write_text(summary.getvalue(), encoding="utf-8")
+
+        self.written += 1
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = sorted(self.directory.glob("*.prof"), key=lambda path: path.stat().st_mtime)
+        for path in profiles[: max(0, len(profiles) - self.max_files)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".txt").unlink(missing_ok=True)
+
+
+request_profiler = RequestProfiler(
+    every=settings.profile_sample_every,
+    directory=settings.profile_dir,
+    max_files=settings.profile_max_files,
+)
@@ -2,27 +2,102 @@
 RAG (Retrieval Augmented Generation) system for document-based chat.
 Updated for Google Gemini, HuggingFace embeddings (CPU-safe),
 and conversational memory support.
+
+Heavy dependencies (torch, langchain integrations, the embedding model
+and the vector store) are only loaded by RAGSystem.initialize(), so
+importing this module is cheap and the server can bind immediately.
 """
 
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import gc
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
 from pathlib import Path
-from typing import List, Optional, Dict
-import torch
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 import uuid
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_google_genai import ChatGoogleGenerativeAI
+from admission import BATCH, NEW_SESSION, AdmissionController, AdmissionRejected
+from config import settings
+from context_packer import pack_context
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from index_locks import (
+    READERS_FILENAME,
+    STORE_LOCK_FILENAME,
+    GenerationPin,
+    generation_unused,
+    store_lock,
+)
+from ingestion import (
+    ChunkWriter,
+    chunk_ids,
+    default_workers,
+    delete_in_batches,
+    file_digest,
+    iter_source_files,
+    split_files,
+)
+from llm_resilience import CircuitBreaker, ResilientLLM
+from metrics import LLM_ERRORS, LLM_FALLBACKS, observe_stage
+from response_cache import ResponseCache, context_fingerprint
+from session_store import SessionBackend, create_session_store
+from token_counter import count_message_tokens, load_encoding
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain_huggingface import HuggingFaceEmbeddings
 
-from langchain_core.documents import Document
-from langchain_core.messages import (
-    SystemMessage,
-    HumanMessage,
-    AIMessage,
+    from vector_index import NumpyVectorIndex
+
+
+LLM_NOT_CONFIGURED_MESSAGE = "LLM not configured."
+GENERATION_ERROR_MESSAGE = "Unable to generate a response at this time."
+BUSY_MESSAGE = "The assistant is busy right now, please try again shortly."
+
+# Retrieval-only answer used when the LLM call fails (LLM_RETRIEVAL_FALLBACK)
+RETRIEVAL_FALLBACK_MESSAGE = (
+    "I can't put together a full answer right now, but this is the most "
+    "relevant information I found:"
+)
+RETRIEVAL_FALLBACK_MAX_CHARS = 1200
+
+# Used when the prompts folder has no summary_prompt.txt (MEMORY_MODE=summary)
+DEFAULT_SUMMARY_PROMPT = (
+    "Update the summary of a conversation between a customer and a "
+    "dealership assistant.\n\nCurrent summary:\n{summary}\n\n"
+    "New messages:\n{conversation}\n\n"
+    "Write the updated summary in under 120 words. Keep names, vehicles, "
+    "dates, preferences and open questions.\n\nUpdated summary:"
 )
-from langchain_core.prompts import ChatPromptTemplate
 
-from config import settings
+# Chroma collection holding the document chunks. Cosine space makes the
+# relevance score (1 - distance) the cosine similarity, as on the numpy
+# backend, so MIN_SIMILARITY_SCORE means the same on both.
+COLLECTION_NAME = "default"
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
+# Distance recorded in the manifest; Chroma indexes without it are in the
+# default l2 space and get rebuilt
+INDEX_DISTANCE = "cosine"
+
+# Per-file / per-chunk content hashes used for incremental re-indexing
+MANIFEST_FILENAME = "index_manifest.json"
+MANIFEST_VERSION = 1
+
+# Each full rebuild goes into its own generation directory; the pointer
+# file names the generation currently being served.
+GENERATION_PREFIX = "gen-"
+CURRENT_GENERATION_FILENAME = "CURRENT"
 
 
 class RAGSystem:
@@ -30,29 +105,177 @@ class RAGSystem:
 
     def __init__(self):
         self.embeddings: HuggingFaceEmbeddings | None = None
-        self.vector_store: Chroma | None = None
+        self.vector_store: Chroma | NumpyVectorIndex | None = None
         self.llm: ChatGoogleGenerativeAI | None = None
 
+        # Deadlines, retries, hedging and circuit breaking around self.llm,
+        # wrapped by initialize() once the model is loaded
+        self.llm_client: ResilientLLM | None = None
+        self.llm_breaker = CircuitBreaker(
+            settings.llm_breaker_failures, settings.llm_breaker_reset_seconds
+        )
+        # Caps concurrent LLM calls (set by the API; None = no limit). Only
+        # the async LLM calls take a slot, retrieval and cache hits do not.
+        self.admission: AdmissionController | None = None
+
+        # Live index generation; swapped atomically by full rebuilds
+        self.index_generation: int = 0
+        self._index_path: Path = Path(settings.vector_store_path)
+        self._index_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        # Shared lock on the served generation (see index_locks), and the
+        # CURRENT file as last seen, to notice generations other workers build
+        self._pin: GenerationPin | None = None
+        self._current_stamp: Optional[Tuple[int, int, int]] = None
+        self._next_current_check = 0.0
+
         self.system_prompt: str = ""
         self.chat_prompt_template: ChatPromptTemplate | None = None
+        self.summary_prompt_template: PromptTemplate | None = None
 
         # 🧠 Conversation memory (per-session history)
-        self.sessions: Dict[str, List] = {}  # session_id -> message history
-        self.max_memory_messages: int = 10  # configurable window
+        self.sessions: SessionBackend = create_session_store()  # session_id -> message history
+        self.max_memory_messages: int = settings.max_memory_messages
+        # Async paths call a blocking session store (SQLite) from here; one
+        # thread, as the store serializes calls on its connection anyway
+        self._session_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="rag-session"
+        )
+
+        # Sessions with a summarization running in the background, and
+        # the asyncio tasks doing it (kept referenced until they finish)
+        self._summarizing: set = set()
+        self._summary_lock = threading.Lock()
+        self._summary_tasks: set = set()
+        self._summary_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="rag-summary"
+        )
+
+        # Memoized query embeddings, shared by retrieval and the response cache
+        self.embedding_cache: EmbeddingCache | None = None
+        if settings.embedding_cache_enabled:
+            self.embedding_cache = EmbeddingCache(
+                max_entries=settings.embedding_cache_max_entries,
+                max_bytes=settings.embedding_cache_max_bytes,
+            )
+
+        # Coalesces concurrent cache-miss query embeddings (set up once
+        # the embedding model is loaded)
+        self.embedding_batcher: EmbeddingBatcher | None = None
+
+        # Semantic cache of LLM answers for repeated first-turn questions
+        self.response_cache: ResponseCache | None = None
+        if settings.response_cache_enabled:
+            self.response_cache = ResponseCache(
+                similarity_threshold=settings.response_cache_similarity,
+                ttl_seconds=settings.response_cache_ttl_seconds,
+                max_entries=settings.response_cache_max_entries,
+                max_bytes=settings.response_cache_max_bytes,
+            )
+
+        # Bounded pool for blocking embedding / retrieval work so the
+        # async request path never runs it on the event loop thread.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.rag_executor_workers),
+            thread_name_prefix="rag-worker",
+        )
 
-        self._initialize()
+        # Models and the vector store are loaded by initialize()
+        self._ready = threading.Event()
+        self._init_lock = threading.Lock()
+        self.startup_error: Optional[str] = None
 
     # ------------------------------------------------------------------
     # Initialization
     # ------------------------------------------------------------------
 
-    def _initialize(self) -> None:
+    @property
+    def is_ready(self) -> bool:
+        """True once models and the vector store are loaded."""
+        return self._ready.is_set()
+
+    def initialize(self, embeddings=None, llm=None) -> None:
+        """
+        Load prompts, models and the vector store.
+
+        Kept out of __init__ so that importing the module does not pay for
+        model loading; safe to call more than once. Pre-built embeddings
+        or LLM objects (e.g. local stubs for offline benchmarks) can be
+        passed in place of the configured models.
+        """
+        with self._init_lock:
+            if self._ready.is_set():
+                return
+
+            started = time.perf_counter()
+            try:
+                self._initialize(embeddings=embeddings, llm=llm)
+            except Exception as e:
+                self.startup_error = str(e)
+                raise
+
+            self.startup_error = None
+            self._ready.set()
+            print(f"RAG system ready in {time.perf_counter() - started:.1f}s")
+
+    def _initialize(self, embeddings=None, llm=None) -> None:
         self._load_prompts()
-        self._initialize_embeddings()
-        self._initialize_llm()
+        # tiktoken may download its encoding: do it here, not in a request
+        load_encoding()
+
+        if embeddings is not None:
+            self.embeddings = embeddings
+        else:
+            self._initialize_embeddings()
+
+        if settings.embedding_batch_enabled:
+            self.embedding_batcher = EmbeddingBatcher(
+                self.embeddings.embed_documents,
+                window_seconds=settings.embedding_batch_window_ms / 1000,
+                max_batch_size=settings.embedding_batch_max_size,
+            )
+
+        if llm is not None:
+            self.llm = llm
+        else:
+            self._initialize_llm()
+        self.llm_client = ResilientLLM(
+            self.llm,
+            request_budget=settings.llm_request_budget_seconds,
+            attempt_timeout=settings.llm_attempt_timeout_seconds,
+            max_retries=settings.llm_max_retries,
+            backoff_base=settings.llm_retry_backoff_ms / 1000,
+            hedge_enabled=settings.llm_hedge_enabled,
+            hedge_min_delay=settings.llm_hedge_min_delay_ms / 1000,
+            breaker=self.llm_breaker,
+        )
+
         self._initialize_vector_store()
 
     def _initialize_embeddings(self) -> None:
+        if settings.embedding_backend == "onnx":
+            from onnx_embeddings import OnnxEmbeddings, default_model_path
+
+            model_path = settings.onnx_model_path or default_model_path(
+                settings.embedding_model
+            )
+            print(f"Loading ONNX embedding model from {model_path}...")
+            self.embeddings = OnnxEmbeddings(
+                model_path,
+                quantized=settings.onnx_quantized,
+                threads=settings.embedding_threads,
+            )
+            return
+
+        if settings.embedding_backend != "torch":
+            print(f"Unknown EMBEDDING_BACKEND '{settings.embedding_backend}', using torch")
+
+        import torch
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        if settings.embedding_threads > 0:
+            torch.set_num_threads(settings.embedding_threads)
+
         device = "cuda" if torch.cuda.is_available() else "cpu"
         self.embeddings = HuggingFaceEmbeddings(
             model_name=settings.embedding_model,
@@ -60,11 +283,17 @@ class RAGSystem:
         )
 
     def _initialize_llm(self) -> None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         print("Initializing Google Gemini LLM...")
         self.llm = ChatGoogleGenerativeAI(
             model=settings.gemini_model,
             api_key=settings.google_api_key,
             temperature=0.2,
+            # Single attempt per call: retries and timeouts are handled by
+            # llm_resilience within the request budget
+            max_retries=1,
+            timeout=settings.llm_attempt_timeout_seconds or None,
         )
         print(f"LLM initialized: {self.llm}")
 
@@ -73,6 +302,8 @@ class RAGSystem:
     # ------------------------------------------------------------------
 
     def _load_prompts(self) -> None:
+        from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+
         prompts_path = Path(settings.prompts_folder)
 
         system_prompt_path = prompts_path / "system_prompt.txt"
@@ -92,101 +323,713 @@ class RAGSystem:
                 "Context:\n{context}\n\nQuestion:\n{query}\n\nAnswer:"
             )
 
+        summary_prompt_path = prompts_path / "summary_prompt.txt"
+        if summary_prompt_path.exists():
+            template = summary_prompt_path.read_text(encoding="utf-8").strip()
+        else:
+            template = DEFAULT_SUMMARY_PROMPT
+        self.summary_prompt_template = PromptTemplate.from_template(template)
+
     # ------------------------------------------------------------------
     # Vector Store
     # ------------------------------------------------------------------
 
     def _initialize_vector_store(self) -> None:
-        vector_store_path = Path(settings.vector_store_path)
-
-        if vector_store_path.exists() and any(vector_store_path.iterdir()):
-            print("Loading existing vector store...")
-            self.vector_store = Chroma(
-                persist_directory=settings.vector_store_path,
-                embedding_function=self.embeddings,
-                collection_name="default",
+        root = Path(settings.vector_store_path)
+        # Workers starting together build the first generation only once;
+        # the others wait here and load it
+        with store_lock(root):
+            generation = self._read_current_generation()
+
+            if generation is not None and not self._storage_matches(
+                self._generation_path(generation)
+            ):
+                # Other backend, dtype or distance: build the next generation instead
+                print("Vector store settings changed; rebuilding vector store...")
+                self.index_generation = generation
+                self._rebuild_vector_store()
+            elif generation is not None:
+                print(f"Loading existing vector store (generation {generation})...")
+                self._activate_generation(generation, self._generation_path(generation))
+            elif settings.vector_backend == "chroma" and (root / "chroma.sqlite3").exists():
+                # Single-directory layout from before generations, in l2 space:
+                # rebuild as generation 1 and remove it afterwards.
+                print("Vector store predates cosine distance; rebuilding vector store...")
+                self._rebuild_vector_store()
+                self._schedule_retire(None, root, None)
+            else:
+                print("Creating new vector store from documents...")
+                self._rebuild_vector_store()
+
+            # Generations left behind by workers that exited
+            self._remove_unused_generations()
+
+    def _open_vector_store(self, index_path: Path) -> Chroma | NumpyVectorIndex:
+        if settings.vector_backend == "numpy":
+            from vector_index import NumpyVectorIndex
+
+            return NumpyVectorIndex(
+                str(index_path),
+                self.embeddings,
+                dtype=settings.vector_dtype,
+                rescore_factor=settings.vector_rescore_factor,
             )
-        else:
-            print("Creating new vector store from documents...")
-            self._create_vector_store()
 
-    def _create_vector_store(self) -> None:
-        documents = self._load_documents()
+        if settings.vector_backend != "chroma":
+            print(f"Unknown VECTOR_BACKEND '{settings.vector_backend}', using chroma")
 
-        if not documents:
-            print("Warning: No documents found.")
-            self.vector_store = Chroma(
-                persist_directory=settings.vector_store_path,
-                embedding_function=self.embeddings,
-            )
-            return
+        from langchain_community.vectorstores import Chroma
 
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
+        return Chroma(
+            persist_directory=str(index_path),
+            embedding_function=self.embeddings,
+            collection_name=COLLECTION_NAME,
+            collection_metadata=COLLECTION_METADATA,
         )
 
-        split_docs = splitter.split_documents(documents)
+    def _activate_generation(
+        self,
+        generation: int,
+        index_path: Path,
+        vector_store: Chroma | NumpyVectorIndex | None = None,
+    ) -> Tuple[Chroma | NumpyVectorIndex | None, Path, GenerationPin | None]:
+        """Serve a generation (opened here unless given); returns the one it replaced."""
+        pin = GenerationPin(index_path)
+        if vector_store is None:
+            vector_store = self._open_vector_store(index_path)
+        with self._index_lock:
+            replaced = (self.vector_store, self._index_path, self._pin)
+            self.vector_store = vector_store
+            self._index_path = index_path
+            self._pin = pin
+            self.index_generation = generation
+        self._current_stamp = self._read_current_stamp()
+        return replaced
+
+    def _rebuild_vector_store(self) -> dict:
+        """
+        Build a fresh index generation next to the live one, then swap.
+
+        The current generation keeps serving queries while the new one is
+        embedded; the pointer swap is a single assignment under a lock and
+        the old generation is removed in the background afterwards. Call
+        with store_lock held.
+        """
+        generation, index_path = self._next_generation()
+        vector_store = self._open_vector_store(index_path)
+        report = self._sync_documents(vector_store, index_path, self._new_manifest())
+        self._publish_generation(generation, index_path, vector_store)
+
+        print(
+            f"Vector store generation {generation} created with "
+            f"{report['chunks_added']} chunks"
+        )
+        return report
+
+    def _update_vector_store(self, manifest: dict) -> dict:
+        """
+        Copy the live generation, sync changed files into the copy, then swap.
+
+        Other workers have the live generation open (numpy memmaps,
+        Chroma's in-memory HNSW index), so it is never written in place;
+        they switch to the copy through CURRENT. Call with store_lock held.
+        """
+        source_generation = self.index_generation
+        generation, index_path = self._next_generation()
+        shutil.copytree(
+            self._index_path, index_path, ignore=shutil.ignore_patterns(READERS_FILENAME)
+        )
+        vector_store = self._open_vector_store(index_path)
+        report = self._sync_documents(vector_store, index_path, manifest)
+        self._publish_generation(generation, index_path, vector_store)
 
-        self.vector_store = Chroma.from_documents(
-            documents=split_docs,
-            embedding=self.embeddings,
-            persist_directory=settings.vector_store_path,
+        print(
+            f"Vector store generation {generation} updated from generation "
+            f"{source_generation}"
         )
-        self.vector_store.persist()
+        return report
+
+    def _next_generation(self) -> Tuple[int, Path]:
+        """Number and (empty) directory for the next generation."""
+        # Another worker may have published newer generations than ours
+        generation = max(self.index_generation, self._read_current_generation() or 0) + 1
+        index_path = self._generation_path(generation)
+        if index_path.exists():
+            # Leftover from an interrupted build (builds hold the store lock)
+            shutil.rmtree(index_path, ignore_errors=True)
+        return generation, index_path
+
+    def _publish_generation(
+        self, generation: int, index_path: Path, vector_store: Chroma | NumpyVectorIndex
+    ) -> None:
+        """Point CURRENT at a finished generation and serve it."""
+        self._write_current_generation(generation)
+        old_store, old_path, old_pin = self._activate_generation(
+            generation, index_path, vector_store
+        )
+        if old_store is not None:
+            self._schedule_retire(old_store, old_path, old_pin)
+
+    def _schedule_retire(
+        self,
+        vector_store: Chroma | NumpyVectorIndex | None,
+        index_path: Path,
+        pin: GenerationPin | None,
+    ) -> None:
+        threading.Thread(
+            target=self._retire_generation,
+            args=(vector_store, index_path, pin),
+            name="rag-index-cleanup",
+            daemon=True,
+        ).start()
+
+    def _retire_generation(
+        self,
+        vector_store: Chroma | NumpyVectorIndex | None,
+        index_path: Path,
+        pin: GenerationPin | None,
+    ) -> None:
+        """
+        Let go of a replaced generation once in-flight queries have drained.
+
+        Its directory is deleted only when no worker has it pinned any
+        more; otherwise the last worker to let go of it deletes it.
+        """
+        time.sleep(settings.index_cleanup_grace_seconds)
+        if pin is not None:
+            pin.release()
+
+        root = Path(settings.vector_store_path)
+        with store_lock(root):
+            current = self._read_current_generation()
+            if index_path == root:
+                self._remove_legacy_layout(root)
+            elif (
+                vector_store is not None
+                and current is not None
+                and index_path != self._generation_path(current)
+                and generation_unused(index_path)
+            ):
+                try:
+                    # Delete the collection to release file handles
+                    vector_store.delete_collection()
+                except Exception:
+                    pass
+            del vector_store
+            gc.collect()
+            self._remove_unused_generations()
+
+    def _remove_unused_generations(self) -> None:
+        """Delete generations other than CURRENT that no worker has pinned (under store_lock)."""
+        current = self._read_current_generation()
+        if current is None:
+            return
+        live_path = self._generation_path(current)
+        root = Path(settings.vector_store_path)
+        for index_path in sorted(root.glob(f"{GENERATION_PREFIX}*")):
+            if index_path == live_path or not index_path.is_dir():
+                continue
+            if not generation_unused(index_path):
+                continue
+            try:
+                shutil.rmtree(index_path)
+                print(f"Removed previous vector store generation at {index_path}")
+            except Exception as e:
+                print(f"Warning: Could not remove {index_path}: {e}")
+
+    def _remove_legacy_layout(self, root: Path) -> None:
+        """Delete the pre-generation single-directory index (under store_lock)."""
+        # Pre-generation layout: everything except the generations
+        targets = [
+            entry for entry in root.iterdir()
+            if not entry.name.startswith(GENERATION_PREFIX)
+            and entry.name not in (CURRENT_GENERATION_FILENAME, STORE_LOCK_FILENAME)
+        ]
+        for target in targets:
+            try:
+                if target.is_dir():
+                    shutil.rmtree(target)
+                else:
+                    target.unlink()
+            except Exception as e:
+                print(f"Warning: Could not remove {target}: {e}")
+        print(f"Removed previous vector store at {root}")
+
+    def _check_current(self) -> None:
+        """
+        Switch to a generation another worker published, if any.
+
+        CURRENT is checked at most every INDEX_WATCH_SECONDS. A query never
+        waits for another worker's rebuild: if the store lock is busy, a
+        later query tries again.
+        """
+        now = time.monotonic()
+        if self.vector_store is None or now < self._next_current_check:
+            return
+        self._next_current_check = now + settings.index_watch_seconds
+        if self._read_current_stamp() == self._current_stamp:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            with store_lock(Path(settings.vector_store_path), blocking=False) as locked:
+                if locked:
+                    self._follow_current()
+        except Exception as e:
+            print(f"Warning: Could not switch index generation: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def _follow_current(self) -> None:
+        """Serve the generation named by CURRENT if it is not ours (under store_lock)."""
+        generation = self._read_current_generation()
+        if generation is None or generation == self.index_generation:
+            self._current_stamp = self._read_current_stamp()
+            return
 
-        print(f"Vector store created with {len(split_docs)} chunks")
+        print(f"Switching to index generation {generation} built by another worker")
+        old_store, old_path, old_pin = self._activate_generation(
+            generation, self._generation_path(generation)
+        )
+        if old_store is not None:
+            self._schedule_retire(old_store, old_path, old_pin)
+        # Cached answers were grounded in the old documents
+        if self.response_cache is not None:
+            self.response_cache.clear()
 
     # ------------------------------------------------------------------
-    # Document Loading
+    # Index Generations
     # ------------------------------------------------------------------
 
-    def _load_documents(self) -> List[Document]:
-        documents: List[Document] = []
-        data_path = Path(settings.data_folder)
+    def _generation_path(self, generation: int) -> Path:
+        return Path(settings.vector_store_path) / f"{GENERATION_PREFIX}{generation:06d}"
 
-        if not data_path.exists():
-            return documents
+    def _read_current_generation(self) -> Optional[int]:
+        pointer = Path(settings.vector_store_path) / CURRENT_GENERATION_FILENAME
+        try:
+            generation = int(pointer.read_text(encoding="utf-8").strip())
+        except (OSError, ValueError):
+            return None
+        return generation if self._generation_path(generation).exists() else None
 
-        for file_path in data_path.glob("*"):
-            if file_path.suffix not in {".txt", ".md"}:
+    def _read_current_stamp(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime, size) of CURRENT; every write replaces the file."""
+        try:
+            stat = (Path(settings.vector_store_path) / CURRENT_GENERATION_FILENAME).stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _write_current_generation(self, generation: int) -> None:
+        pointer = Path(settings.vector_store_path) / CURRENT_GENERATION_FILENAME
+        tmp_path = pointer.with_suffix(".tmp")
+        tmp_path.write_text(str(generation), encoding="utf-8")
+        os.replace(tmp_path, pointer)
+
+    def _sync_documents(
+        self, vector_store: Chroma | NumpyVectorIndex, index_path: Path, manifest: dict
+    ) -> dict:
+        """
+        Bring the vector store in line with the data folder.
+
+        Files whose content hash matches the manifest are skipped. Changed
+        files are re-split (in a process pool) and only chunks whose
+        content hash is new get embedded, in batches of
+        settings.ingest_batch_size; chunks that disappeared (or whose file
+        was removed) are deleted. Untouched vectors stay in place.
+        """
+        started = time.perf_counter()
+        previous = manifest.get("files", {})
+
+        report = {
+            "files_added": 0,
+            "files_changed": 0,
+            "files_removed": 0,
+            "files_skipped": 0,
+            "chunks_added": 0,
+            "chunks_removed": 0,
+        }
+        files: Dict[str, dict] = {}
+        pending: Dict[str, Tuple[Path, str]] = {}
+        seen = set()
+
+        for file_path in iter_source_files(settings.data_folder):
+            try:
+                digest = file_digest(file_path)
+            except OSError as e:
+                print(f"Failed to read {file_path.name}: {e}")
                 continue
-            if file_path.name == "README.md":
+
+            seen.add(file_path.name)
+            entry = previous.get(file_path.name)
+            if entry and entry["sha256"] == digest:
+                files[file_path.name] = entry
+                report["files_skipped"] += 1
+            else:
+                pending[file_path.name] = (file_path, digest)
+
+        if not seen:
+            print("Warning: No documents found.")
+
+        writer = ChunkWriter(
+            vector_store,
+            batch_size=settings.ingest_batch_size,
+            total_files=len(pending),
+        )
+        stale_ids: List[str] = []
+
+        for split in split_files(
+            [file_path for file_path, _ in pending.values()],
+            settings.chunk_size,
+            settings.chunk_overlap,
+            settings.ingest_workers or default_workers(),
+        ):
+            name = split.name
+            entry = previous.get(name)
+
+            if split.error is not None:
+                # Keep serving the previous version of an unreadable file
+                print(f"Failed to load {name}: {split.error}")
+                if entry:
+                    files[name] = entry
                 continue
 
+            ids = chunk_ids(name, split.chunks)
+            known_ids = set(entry["chunks"]) if entry else set()
+            for text, chunk_id in zip(split.chunks, ids):
+                if chunk_id not in known_ids:
+                    writer.add(chunk_id, text, {"source": name})
+            stale_ids.extend(known_ids.difference(ids))
+
+            files[name] = {"sha256": pending[name][1], "chunks": ids}
+            report["files_changed" if entry else "files_added"] += 1
+            writer.file_done()
+
+        writer.flush()
+
+        for name in previous.keys() - seen:
+            stale_ids.extend(previous[name]["chunks"])
+            report["files_removed"] += 1
+
+        delete_in_batches(vector_store, stale_ids, settings.ingest_batch_size)
+        if stale_ids or writer.added:
+            vector_store.persist()
+
+        manifest["files"] = files
+        self._write_manifest(index_path, manifest)
+
+        report["chunks_added"] = writer.added
+        report["chunks_removed"] = len(stale_ids)
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    def _documents_changed(self, manifest: dict) -> bool:
+        """Whether any file was added, changed or removed since the manifest."""
+        previous = manifest.get("files", {})
+        seen = set()
+        for file_path in iter_source_files(settings.data_folder):
             try:
-                content = file_path.read_text(encoding="utf-8")
-                documents.append(
-                    Document(
-                        page_content=content,
-                        metadata={"source": file_path.name},
-                    )
-                )
-                print(f"Loaded: {file_path.name}")
-            except Exception as e:
-                print(f"Failed to load {file_path.name}: {e}")
+                digest = file_digest(file_path)
+            except OSError:
+                return True
+            seen.add(file_path.name)
+            entry = previous.get(file_path.name)
+            if not entry or entry["sha256"] != digest:
+                return True
+        return seen != previous.keys()
+
+    # ------------------------------------------------------------------
+    # Index Manifest
+    # ------------------------------------------------------------------
+
+    def _new_manifest(self) -> dict:
+        """Empty manifest for the current embedding / chunking settings."""
+        return {
+            "version": MANIFEST_VERSION,
+            "embedding_model": settings.embedding_model,
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "vector_backend": settings.vector_backend,
+            "vector_dtype": settings.vector_dtype,
+            "distance": INDEX_DISTANCE,
+            "files": {},
+        }
 
-        return documents
+    def _read_manifest(self, index_path: Path) -> Optional[dict]:
+        """Manifest of an index, or None if it cannot be reused."""
+        manifest_path = index_path / MANIFEST_FILENAME
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        expected = self._new_manifest()
+        for key in ("version", "embedding_model", "chunk_size", "chunk_overlap"):
+            if manifest.get(key) != expected[key]:
+                return None
+        if not self._storage_matches(index_path, manifest):
+            return None
+        return manifest
+
+    def _storage_matches(self, index_path: Path, manifest: Optional[dict] = None) -> bool:
+        """Whether an index was written by the configured vector backend (and distance)."""
+        if manifest is None:
+            try:
+                manifest = json.loads(
+                    (index_path / MANIFEST_FILENAME).read_text(encoding="utf-8")
+                )
+            except (OSError, ValueError):
+                # No manifest: a Chroma index in l2 space
+                return False
+
+        # Manifests from before the numpy backend describe Chroma indexes
+        backend = manifest.get("vector_backend", "chroma")
+        if backend != settings.vector_backend:
+            return False
+        if backend == "chroma":
+            return manifest.get("distance") == INDEX_DISTANCE
+        return manifest.get("vector_dtype") == settings.vector_dtype
+
+    def _write_manifest(self, index_path: Path, manifest: dict) -> None:
+        manifest_path = index_path / MANIFEST_FILENAME
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
 
     # ------------------------------------------------------------------
     # Retrieval
     # ------------------------------------------------------------------
 
-    def get_relevant_context(
-        self, query: str, top_k: Optional[int] = None
-    ) -> List[str]:
-        if not self.vector_store:
+    def index_size(self) -> Optional[int]:
+        """Chunks in the live vector index (None before it is loaded)."""
+        vector_store = self.vector_store
+        if vector_store is None:
+            return None
+        if hasattr(vector_store, "_collection"):
+            return vector_store._collection.count()
+        return len(vector_store)
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a user query for retrieval and cache lookups."""
+        with observe_stage("embed_query"):
+            if self.embedding_cache is None:
+                return self._embed_uncached(query)
+            return self.embedding_cache.get_or_compute(query, self._embed_uncached)
+
+    def _embed_uncached(self, query: str) -> List[float]:
+        if self.embedding_batcher is None:
+            return self.embeddings.embed_query(query)
+        return self.embedding_batcher.embed(query)
+
+    def get_scored_context(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Chunks scoring at least min_similarity_score, best first, with scores."""
+        self._check_current()
+        # Single read: a concurrent rebuild may swap the live index
+        vector_store = self.vector_store
+        if not vector_store:
             return []
 
         k = top_k or settings.top_k_results
 
         try:
-            results = self.vector_store.similarity_search(query, k=k)
-            return [doc.page_content for doc in results]
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            with observe_stage("vector_search"):
+                results = vector_store.similarity_search_by_vector_with_relevance_scores(
+                    query_embedding, k=k
+                )
+            return self._filter_scored(vector_store, results)
         except Exception as e:
             print(f"Retrieval error: {e}")
             return []
 
+    def _filter_scored(self, vector_store, results: List) -> List[Tuple[str, float]]:
+        """(document, distance) pairs -> (text, relevance) above the threshold, best first."""
+        # Distances are converted the same way the store's own
+        # similarity_search_with_relevance_scores does (0..1, higher is closer)
+        relevance = vector_store._select_relevance_score_fn()
+        scored = [(doc.page_content, relevance(distance)) for doc, distance in results]
+        scored = [item for item in scored if item[1] >= settings.min_similarity_score]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
+
+    def get_relevant_context(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[str]:
+        return [
+            chunk
+            for chunk, _score in self.get_scored_context(query, top_k, query_embedding)
+        ]
+
+    def _retrieve(
+        self, query: str
+    ) -> Tuple[Optional[List[float]], List[Tuple[str, float]]]:
+        """Embed the query once and reuse it for retrieval and caching."""
+        try:
+            query_embedding = self.embed_query(query)
+        except Exception as e:
+            print(f"Embedding error: {e}")
+            return None, []
+        scored = self.get_scored_context(query, query_embedding=query_embedding)
+        return query_embedding, scored
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries; cache misses share one embedding call."""
+        embeddings: List[Optional[List[float]]] = [None] * len(queries)
+        misses: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            cached = self.embedding_cache.get(query) if self.embedding_cache else None
+            if cached is not None:
+                embeddings[index] = cached
+            else:
+                misses.setdefault(query, []).append(index)
+
+        if misses:
+            texts = list(misses)
+            with observe_stage("embed_query"):
+                vectors = self.embeddings.embed_documents(texts)
+            for text, vector in zip(texts, vectors):
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put(text, vector)
+                for index in misses[text]:
+                    embeddings[index] = vector
+        return embeddings
+
+    def _retrieve_batch(
+        self, queries: List[str]
+    ) -> List[Tuple[Optional[List[float]], List[Tuple[str, float]]]]:
+        """_retrieve for many queries: one embedding call, one search pass."""
+        try:
+            embeddings = self.embed_queries(queries)
+        except Exception as e:
+            print(f"Embedding error: {e}")
+            return [(None, []) for _ in queries]
+
+        self._check_current()
+        vector_store = self.vector_store
+        search_many = getattr(
+            vector_store, "similarity_search_by_vectors_with_relevance_scores", None
+        )
+        if search_many is None:
+            # Chroma: one search per query, still on this worker thread
+            return [
+                (embedding, self.get_scored_context(query, query_embedding=embedding))
+                for query, embedding in zip(queries, embeddings)
+            ]
+
+        try:
+            with observe_stage("vector_search"):
+                results = search_many(embeddings, k=settings.top_k_results)
+            return [
+                (embedding, self._filter_scored(vector_store, result))
+                for embedding, result in zip(embeddings, results)
+            ]
+        except Exception as e:
+            print(f"Retrieval error: {e}")
+            return [(embedding, []) for embedding in embeddings]
+
+    async def _run_blocking(self, func, *args):
+        """
+        Run blocking work on the worker pool.
+
+        The call runs in a copy of the caller's context, so per-request
+        state such as debug timings (see metrics.collect_timings) follows it.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, func, *args)
+        )
+
+    def _pack_context(
+        self, scored: List[Tuple[str, float]], additional_context: Optional[str] = None
+    ) -> List[str]:
+        """Fit retrieved chunks into the context budget; caller context goes first."""
+        if additional_context:
+            scored = [(additional_context, float("inf"))] + scored
+        packed = pack_context(
+            scored, settings.max_context_tokens, settings.max_context_chars
+        )
+        return packed.chunks
+
+    # ------------------------------------------------------------------
+    # Response Cache
+    # ------------------------------------------------------------------
+
+    def _response_cache_key(
+        self,
+        query_embedding: Optional[List[float]],
+        context: List[str],
+        session_id: str,
+    ) -> Optional[str]:
+        """
+        Cache key for this turn, or None if it must not be cached.
+
+        Only turns without prior history are cacheable: later answers may
+        depend on the conversation, which the key does not capture.
+        """
+        if self.response_cache is None or query_embedding is None:
+            return None
+        if self.sessions.message_count(session_id):
+            return None
+        return context_fingerprint(context)
+
+    def _cached_response(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]],
+        cache_key: Optional[str],
+        session_id: str,
+    ) -> Optional[str]:
+        """Serve a cached answer (recording the turn) if one matches."""
+        response = self._cache_lookup(query_embedding, cache_key)
+        if response is not None:
+            self._record_turn(session_id, query, response)
+        return response
+
+    async def _acached_response(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]],
+        cache_key: Optional[str],
+        session_id: str,
+    ) -> Optional[str]:
+        """Async variant of _cached_response."""
+        response = self._cache_lookup(query_embedding, cache_key)
+        if response is not None:
+            await self._arecord_turn(session_id, query, response)
+        return response
+
+    def _cache_lookup(
+        self, query_embedding: Optional[List[float]], cache_key: Optional[str]
+    ) -> Optional[str]:
+        if cache_key is None:
+            return None
+        return self.response_cache.get(query_embedding, cache_key)
+
+    def _cache_response(
+        self,
+        query_embedding: Optional[List[float]],
+        cache_key: Optional[str],
+        response: str,
+    ) -> None:
+        if cache_key is None or not response:
+            return
+        if response in (LLM_NOT_CONFIGURED_MESSAGE, GENERATION_ERROR_MESSAGE):
+            return
+        if response.startswith(RETRIEVAL_FALLBACK_MESSAGE):
+            return
+        self.response_cache.put(query_embedding, cache_key, response)
+
     # ------------------------------------------------------------------
     # Session Management
     # ------------------------------------------------------------------
@@ -196,27 +1039,80 @@ class RAGSystem:
         if session_id and session_id in self.sessions:
             return session_id
         new_id = session_id or str(uuid.uuid4())
-        self.sessions[new_id] = []
+        self.sessions.create(new_id)
         return new_id
 
+    async def aget_or_create_session(self, session_id: Optional[str] = None) -> str:
+        """Async variant of get_or_create_session."""
+        return await self.session_io(self.get_or_create_session, session_id)
+
+    async def ahas_session(self, session_id: str) -> bool:
+        """Whether session_id is live, without blocking the event loop."""
+        return await self.session_io(self.sessions.__contains__, session_id)
+
+    async def session_io(self, func, *args):
+        """
+        Call func(*args), which uses the session store, from an async path.
+
+        Stores that may block (see SessionBackend.blocking_io) are called
+        on the session thread, in a copy of the caller's context; the
+        in-memory store is called inline.
+        """
+        if not self.sessions.blocking_io:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._session_executor, functools.partial(context.run, func, *args)
+        )
+
     def get_session_history(self, session_id: str) -> List:
         """Get message history for a session."""
-        return self.sessions.get(session_id, [])
+        return self.sessions.get(session_id)
+
+    def _memory_window(self, session_id: str) -> Tuple[List, int]:
+        """
+        Session memory to put in the prompt, and its token count.
+
+        The running summary (summary mode) comes first, then the most
+        recent messages that fit settings.memory_max_tokens, using the
+        token counts stored with each message.
+        """
+        from langchain_core.messages import AIMessage, SystemMessage
+
+        history = self.sessions.snapshot(session_id)
+        memory: List = []
+        if history.summary:
+            memory.append(
+                SystemMessage(
+                    content=f"Summary of the earlier conversation:\n{history.summary}"
+                )
+            )
+        used = count_message_tokens(memory)
 
-    def _trim_memory(self, session_id: str) -> None:
-        """Trim session memory to max size."""
-        if len(self.sessions[session_id]) > self.max_memory_messages:
-            self.sessions[session_id] = self.sessions[session_id][-self.max_memory_messages :]
+        budget = settings.memory_max_tokens
+        start = len(history.messages)
+        while start > 0 and (budget <= 0 or used + history.tokens[start - 1] <= budget):
+            start -= 1
+            used += history.tokens[start]
 
-    def generate_response(
+        # Don't open the history with an answer whose question was cut off
+        if start < len(history.messages) and isinstance(history.messages[start], AIMessage):
+            used -= history.tokens[start]
+            start += 1
+
+        memory.extend(history.messages[start:])
+        return memory, used
+
+    def _build_messages(
         self,
         query: str,
         context: List[str],
         session_id: str,
-        user_data: Optional[dict] = None,
-    ) -> str:
-        if not self.llm or not self.chat_prompt_template:
-            return "LLM not configured."
+        memory: Optional[List] = None,
+    ) -> List:
+        """Assemble system prompt, session memory and the current turn."""
+        from langchain_core.messages import HumanMessage, SystemMessage
 
         combined_context = "\n\n".join(context)
 
@@ -226,8 +1122,10 @@ class RAGSystem:
         if self.system_prompt:
             messages.append(SystemMessage(content=self.system_prompt))
 
-        # Previous conversation memory for this session
-        messages.extend(self.sessions[session_id])
+        # Previous conversation memory for this session, within the token budget
+        if memory is None:
+            memory, _ = self._memory_window(session_id)
+        messages.extend(memory)
 
         # Current user input
         messages.append(
@@ -238,28 +1136,251 @@ class RAGSystem:
                 )
             )
         )
+        return messages
+
+    def _prepare_prompt(
+        self, query: str, context: List[str], session_id: str
+    ) -> Tuple[Optional[List], int, int]:
+        """
+        Build the prompt messages and count their tokens.
+
+        Returns (messages, prompt tokens, of which session memory), or
+        (None, 0, 0) before initialization.
+        """
+        if not self.chat_prompt_template:
+            return None, 0, 0
+        memory, memory_tokens = self._memory_window(session_id)
+        messages = self._build_messages(query, context, session_id, memory)
+
+        # Memory tokens were counted when the messages were stored
+        others = messages[: len(messages) - len(memory) - 1] + messages[-1:]
+        return messages, memory_tokens + count_message_tokens(others), memory_tokens
+
+    def _record_turn(self, session_id: str, query: str, response_text: str) -> None:
+        """Save a completed turn to session memory, trimmed to the window."""
+        if self._store_turn(session_id, query, response_text):
+            self._schedule_summary(session_id)
+
+    async def _arecord_turn(self, session_id: str, query: str, response_text: str) -> None:
+        """Async variant of _record_turn."""
+        if await self.session_io(self._store_turn, session_id, query, response_text):
+            self._schedule_summary(session_id)
+
+    def _store_turn(self, session_id: str, query: str, response_text: str) -> bool:
+        """Append the turn to the session; returns whether a summary is due."""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        if settings.memory_mode == "summary":
+            # Summarization normally keeps sessions well below this; the
+            # cap only bites if it falls behind or keeps failing.
+            max_messages = max(
+                self.max_memory_messages, 2 * settings.memory_summary_trigger_messages
+            )
+        else:
+            max_messages = self.max_memory_messages
+
+        self.sessions.append(
+            session_id,
+            [HumanMessage(content=query), AIMessage(content=response_text)],
+            max_messages=max_messages,
+        )
+        return self._summary_due(session_id)
+
+    def generate_response(
+        self,
+        query: str,
+        context: List[str],
+        session_id: str,
+        user_data: Optional[dict] = None,
+        messages: Optional[List] = None,
+        deadline: Optional[float] = None,
+    ) -> str:
+        if not self.llm or not self.chat_prompt_template:
+            return LLM_NOT_CONFIGURED_MESSAGE
+
+        if messages is None:
+            messages = self._build_messages(query, context, session_id)
 
         try:
-            response = self.llm.invoke(messages)
+            with observe_stage("llm"):
+                response = self.llm_client.invoke(messages, deadline)
 
             # Extract content from the response (ChatGoogleGenerativeAI returns AIMessage)
             response_text = response.content if hasattr(response, 'content') else str(response)
 
-            # Save to session memory
-            self.sessions[session_id].append(HumanMessage(content=query))
-            self.sessions[session_id].append(AIMessage(content=response_text))
-            self._trim_memory(session_id)
+            self._record_turn(session_id, query, response_text)
 
             return response_text
 
         except Exception as e:
             print(f"Generation error: {e}")
-            return "Unable to generate a response at this time."
+            LLM_ERRORS.inc()
+            return GENERATION_ERROR_MESSAGE
+
+    async def agenerate_response(
+        self,
+        query: str,
+        context: List[str],
+        session_id: str,
+        user_data: Optional[dict] = None,
+        messages: Optional[List] = None,
+        deadline: Optional[float] = None,
+        priority: int = NEW_SESSION,
+    ) -> str:
+        """
+        Async variant of generate_response using the LLM's native async call.
+
+        The call waits for an admission slot of `priority`; AdmissionRejected
+        propagates so the caller can shed the request.
+        """
+        if not self.llm or not self.chat_prompt_template:
+            return LLM_NOT_CONFIGURED_MESSAGE
+
+        if messages is None:
+            messages = await self.session_io(self._build_messages, query, context, session_id)
+
+        try:
+            async with self._llm_slot(priority, deadline):
+                with observe_stage("llm"):
+                    response = await self.llm_client.ainvoke(messages, deadline)
+
+            response_text = response.content if hasattr(response, 'content') else str(response)
+
+            await self._arecord_turn(session_id, query, response_text)
+
+            return response_text
+
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            print(f"Generation error: {e}")
+            LLM_ERRORS.inc()
+            return GENERATION_ERROR_MESSAGE
+
+    @asynccontextmanager
+    async def _llm_slot(self, priority: int, deadline: Optional[float] = None):
+        """Hold an admission slot around an LLM call (see self.admission)."""
+        if self.admission is None:
+            yield
+            return
+        with observe_stage("admission"):
+            ticket = await self.admission.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    def _fallback_response(self, scored: List[Tuple[str, float]]) -> str:
+        """
+        Retrieval-only answer for when the LLM call failed.
+
+        Quotes the best retrieved excerpts (never the caller's additional
+        context); the generic error message if disabled or nothing matched.
+        """
+        if not settings.llm_retrieval_fallback or not scored:
+            return GENERATION_ERROR_MESSAGE
+        LLM_FALLBACKS.inc()
+        excerpts = "\n\n".join(text for text, _score in scored)
+        return f"{RETRIEVAL_FALLBACK_MESSAGE}\n\n{excerpts[:RETRIEVAL_FALLBACK_MAX_CHARS].strip()}"
+
+    # ------------------------------------------------------------------
+    # Rolling summary (MEMORY_MODE=summary)
+    # ------------------------------------------------------------------
+
+    def _summary_due(self, session_id: str) -> bool:
+        """Whether the session has grown enough to fold turns into the summary."""
+        if settings.memory_mode != "summary" or not self.llm or not self.summary_prompt_template:
+            return False
+        return self.sessions.message_count(session_id) >= settings.memory_summary_trigger_messages
+
+    def _schedule_summary(self, session_id: str) -> None:
+        """Start folding older turns into the summary, off the request path."""
+        with self._summary_lock:
+            if session_id in self._summarizing:
+                return
+            self._summarizing.add(session_id)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            task = loop.create_task(self._asummarize(session_id))
+            self._summary_tasks.add(task)
+            task.add_done_callback(self._summary_tasks.discard)
+        else:
+            self._summary_executor.submit(self._summarize, session_id)
+
+    def _summary_request(self, session_id: str) -> Optional[Tuple[List, int]]:
+        """
+        Prompt that folds all but the last few turns into the summary.
+
+        Returns the prompt messages and the history position the new
+        summary covers up to, or None if there is nothing to fold.
+        """
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        history = self.sessions.snapshot(session_id)
+        keep = 2 * max(1, settings.memory_summary_keep_turns)
+        if len(history.messages) <= keep:
+            return None
+
+        older = history.messages[:-keep]
+        conversation = "\n".join(
+            f"{'Assistant' if isinstance(message, AIMessage) else 'Customer'}: {message.content}"
+            for message in older
+        )
+        prompt = self.summary_prompt_template.format(
+            summary=history.summary or "(none yet)",
+            conversation=conversation,
+        )
+        return [HumanMessage(content=prompt)], history.offset + len(older)
+
+    def _store_summary(self, session_id: str, response, covered: int) -> None:
+        summary = response.content if hasattr(response, 'content') else str(response)
+        if isinstance(summary, str) and summary.strip():
+            self.sessions.compact(session_id, summary.strip(), covered)
+
+    def _summarize(self, session_id: str) -> None:
+        try:
+            request = self._summary_request(session_id)
+            if request is not None:
+                messages, covered = request
+                self._store_summary(session_id, self.llm_client.invoke(messages), covered)
+        except Exception as e:
+            print(f"Summarization error: {e}")
+        finally:
+            with self._summary_lock:
+                self._summarizing.discard(session_id)
+
+    async def _asummarize(self, session_id: str) -> None:
+        try:
+            request = await self.session_io(self._summary_request, session_id)
+            if request is not None:
+                messages, covered = request
+                # Background work: queues behind (and is shed before) chats
+                async with self._llm_slot(BATCH):
+                    response = await self.llm_client.ainvoke(messages, hedge=False)
+                await self.session_io(self._store_summary, session_id, response, covered)
+        except Exception as e:
+            print(f"Summarization error: {e}")
+        finally:
+            with self._summary_lock:
+                self._summarizing.discard(session_id)
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
+    def request_deadline(self) -> Optional[float]:
+        """
+        time.monotonic() deadline for the LLM calls of a request starting
+        now (None = no budget). The budget covers the whole request,
+        retrieval and any wait for an admission slot included.
+        """
+        return self.llm_client.deadline() if self.llm_client else None
+
     def query(
         self,
         user_query: str,
@@ -267,65 +1388,357 @@ class RAGSystem:
         user_data: Optional[dict] = None,
         additional_context: Optional[str] = None,
     ) -> dict:
+        self.initialize()
+        deadline = self.request_deadline()
         session_id = self.get_or_create_session(session_id)
-        context = self.get_relevant_context(user_query)
+        query_embedding, scored = self._retrieve(user_query)
+        context = self._pack_context(scored, additional_context)
 
-        if additional_context:
-            context.insert(0, additional_context)
+        cache_key = self._response_cache_key(query_embedding, context, session_id)
+        response = self._cached_response(
+            user_query, query_embedding, cache_key, session_id
+        )
+        cached = response is not None
+        prompt_tokens = memory_tokens = 0
 
-        response = self.generate_response(user_query, context, session_id, user_data)
+        if not cached:
+            messages, prompt_tokens, memory_tokens = self._prepare_prompt(
+                user_query, context, session_id
+            )
+            response = self.generate_response(
+                user_query, context, session_id, user_data, messages=messages, deadline=deadline
+            )
+            if response == GENERATION_ERROR_MESSAGE:
+                response = self._fallback_response(scored)
+            self._cache_response(query_embedding, cache_key, response)
 
         return {
             "response": response,
             "context_used": len(context),
             "session_id": session_id,
-            "memory_size": len(self.sessions[session_id]),
+            "memory_size": self.sessions.message_count(session_id),
+            "memory_tokens": memory_tokens,
+            "prompt_tokens": prompt_tokens,
+            "cached": cached,
+            "status": "success",
+        }
+
+    async def aquery(
+        self,
+        user_query: str,
+        session_id: Optional[str] = None,
+        user_data: Optional[dict] = None,
+        additional_context: Optional[str] = None,
+        deadline: Optional[float] = None,
+        priority: int = NEW_SESSION,
+    ) -> dict:
+        """
+        Non-blocking variant of query for use from async request handlers.
+
+        Query embedding and vector search run on the bounded worker pool;
+        the LLM call is awaited directly, so the event loop stays free.
+        `deadline` (default: request_deadline()) bounds the LLM calls.
+        Only the LLM call waits for an admission slot of `priority`; raises
+        AdmissionRejected if it is shed.
+        """
+        if deadline is None:
+            deadline = self.request_deadline()
+        session_id = await self.aget_or_create_session(session_id)
+
+        query_embedding, scored = await self._run_blocking(self._retrieve, user_query)
+        return await self._answer(
+            user_query, session_id, query_embedding, scored, user_data, additional_context,
+            deadline, priority,
+        )
+
+    async def aquery_batch(
+        self,
+        items: List[dict],
+        concurrency: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Answer many chat requests (dicts with aquery's arguments) together.
+
+        All queries are embedded in one model call and retrieved in one
+        pass on the worker pool; LLM calls then run concurrently, at most
+        `concurrency` at a time. Items sharing a session_id run in order,
+        so each sees the previous turn. Results come back in input order;
+        a failed item gets status "error" without affecting the others.
+        Each LLM call also needs a BATCH admission slot; items shed by
+        admission control fail with BUSY_MESSAGE and a `retry_after`.
+        """
+        session_ids = [await self.aget_or_create_session(item.get("session_id")) for item in items]
+
+        retrieved = await self._run_blocking(
+            self._retrieve_batch, [item["query"] for item in items]
+        )
+
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.chat_batch_concurrency))
+        results: List[Optional[dict]] = [None] * len(items)
+
+        groups: Dict[str, List[int]] = {}
+        for index, session_id in enumerate(session_ids):
+            groups.setdefault(session_id, []).append(index)
+
+        async def answer_in_order(indexes: List[int]) -> None:
+            for index in indexes:
+                item = items[index]
+                query_embedding, scored = retrieved[index]
+                try:
+                    async with semaphore:
+                        result = await self._answer(
+                            item["query"],
+                            session_ids[index],
+                            query_embedding,
+                            scored,
+                            item.get("user_data"),
+                            item.get("additional_context"),
+                            priority=BATCH,
+                        )
+                except AdmissionRejected as e:
+                    result = {
+                        "session_id": session_ids[index],
+                        "status": "error",
+                        "detail": BUSY_MESSAGE,
+                        "retry_after": e.retry_after,
+                    }
+                except Exception as e:
+                    print(f"Batch item {index} failed: {e}")
+                    result = {
+                        "session_id": session_ids[index],
+                        "status": "error",
+                        "detail": GENERATION_ERROR_MESSAGE,
+                    }
+                else:
+                    failed = (GENERATION_ERROR_MESSAGE, LLM_NOT_CONFIGURED_MESSAGE)
+                    if result["response"] in failed:
+                        result["status"] = "error"
+                results[index] = result
+
+        await asyncio.gather(*(answer_in_order(indexes) for indexes in groups.values()))
+        return results
+
+    async def _answer(
+        self,
+        user_query: str,
+        session_id: str,
+        query_embedding: Optional[List[float]],
+        scored: List[Tuple[str, float]],
+        user_data: Optional[dict] = None,
+        additional_context: Optional[str] = None,
+        deadline: Optional[float] = None,
+        priority: int = NEW_SESSION,
+    ) -> dict:
+        """
+        Generate (or serve from cache) the answer for retrieved context.
+
+        Falls back to a retrieval-only answer if the LLM call fails.
+        """
+        context = self._pack_context(scored, additional_context)
+
+        cache_key = await self.session_io(
+            self._response_cache_key, query_embedding, context, session_id
+        )
+        response = await self._acached_response(
+            user_query, query_embedding, cache_key, session_id
+        )
+        cached = response is not None
+        prompt_tokens = memory_tokens = 0
+
+        if not cached:
+            messages, prompt_tokens, memory_tokens = await self.session_io(
+                self._prepare_prompt, user_query, context, session_id
+            )
+            response = await self.agenerate_response(
+                user_query, context, session_id, user_data,
+                messages=messages, deadline=deadline, priority=priority,
+            )
+            if response == GENERATION_ERROR_MESSAGE:
+                response = self._fallback_response(scored)
+            self._cache_response(query_embedding, cache_key, response)
+
+        return {
+            "response": response,
+            "context_used": len(context),
+            "session_id": session_id,
+            "memory_size": await self.session_io(self.sessions.message_count, session_id),
+            "memory_tokens": memory_tokens,
+            "prompt_tokens": prompt_tokens,
+            "cached": cached,
+            "status": "success",
+        }
+
+    async def astream_query(
+        self,
+        user_query: str,
+        session_id: Optional[str] = None,
+        user_data: Optional[dict] = None,
+        additional_context: Optional[str] = None,
+        deadline: Optional[float] = None,
+        priority: int = NEW_SESSION,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of aquery.
+
+        Yields a ``start`` event, one ``token`` event per LLM chunk and a
+        final ``done`` (or ``error``) event. The turn is only written to
+        session memory once the LLM stream has completed, so an aborted
+        stream leaves the history untouched.
+
+        An admission slot of `priority` is held from ``start`` until the
+        LLM stream ends. If the request is shed, AdmissionRejected is
+        raised before the first event.
+        """
+        if deadline is None:
+            deadline = self.request_deadline()
+        session_id = await self.aget_or_create_session(session_id)
+
+        query_embedding, scored = await self._run_blocking(self._retrieve, user_query)
+        context = self._pack_context(scored, additional_context)
+        start = {
+            "event": "start",
+            "session_id": session_id,
+            "context_used": len(context),
+        }
+
+        cache_key = await self.session_io(
+            self._response_cache_key, query_embedding, context, session_id
+        )
+        cached_response = await self._acached_response(
+            user_query, query_embedding, cache_key, session_id
+        )
+        if cached_response is not None:
+            yield start
+            yield {"event": "token", "content": cached_response}
+            yield {
+                "event": "done",
+                "session_id": session_id,
+                "context_used": len(context),
+                "memory_size": await self.session_io(self.sessions.message_count, session_id),
+                "memory_tokens": 0,
+                "prompt_tokens": 0,
+                "cached": True,
+                "status": "success",
+            }
+            return
+
+        if not self.llm or not self.chat_prompt_template:
+            yield start
+            yield {"event": "error", "detail": LLM_NOT_CONFIGURED_MESSAGE}
+            return
+
+        messages, prompt_tokens, memory_tokens = await self.session_io(
+            self._prepare_prompt, user_query, context, session_id
+        )
+        parts: List[str] = []
+
+        try:
+            async with self._llm_slot(priority, deadline):
+                yield start
+                # aclosing: a disconnected client stops the LLM request right away
+                with observe_stage("llm"):
+                    async with aclosing(self.llm_client.astream(messages, deadline)) as stream:
+                        async for chunk in stream:
+                            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                            if not isinstance(text, str) or not text:
+                                continue
+                            parts.append(text)
+                            yield {"event": "token", "content": text}
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            print(f"Generation error: {e}")
+            LLM_ERRORS.inc()
+            if parts:
+                yield {"event": "error", "detail": GENERATION_ERROR_MESSAGE}
+                return
+            fallback = self._fallback_response(scored)
+            if fallback == GENERATION_ERROR_MESSAGE:
+                yield {"event": "error", "detail": GENERATION_ERROR_MESSAGE}
+                return
+            # Nothing streamed yet: answer from the documents instead
+            yield {"event": "token", "content": fallback}
+            yield {
+                "event": "done",
+                "session_id": session_id,
+                "context_used": len(context),
+                "memory_size": await self.session_io(self.sessions.message_count, session_id),
+                "memory_tokens": memory_tokens,
+                "prompt_tokens": prompt_tokens,
+                "cached": False,
+                "status": "success",
+            }
+            return
+
+        response_text = "".join(parts)
+        await self._arecord_turn(session_id, user_query, response_text)
+        self._cache_response(query_embedding, cache_key, response_text)
+
+        yield {
+            "event": "done",
+            "session_id": session_id,
+            "context_used": len(context),
+            "memory_size": await self.session_io(self.sessions.message_count, session_id),
+            "memory_tokens": memory_tokens,
+            "prompt_tokens": prompt_tokens,
+            "cached": False,
             "status": "success",
         }
 
     def clear_session(self, session_id: str) -> None:
         """Clear message history for a specific session."""
-        if session_id in self.sessions:
-            self.sessions[session_id].clear()
+        self.sessions.clear(session_id)
 
     def clear_all_sessions(self) -> None:
         """Clear all session histories."""
-        self.sessions.clear()
-
-    def reload_documents(self) -> None:
-        import shutil
-        import gc
-
-        print("Reloading documents...")
-        
-        # Close and release the vector store before deleting
-        if self.vector_store is not None:
-            try:
-                # Delete the collection to release file handles
-                self.vector_store.delete_collection()
-                print("Vector store collection deleted")
-            except:
-                pass
-            
-            # Clear the reference
-            self.vector_store = None
-            
-            # Force garbage collection to release file handles
-            gc.collect()
-        
-        # Now safely delete the directory
-        path = Path(settings.vector_store_path)
-        if path.exists():
-            try:
-                shutil.rmtree(path)
-                print("Vector store directory removed")
-            except Exception as e:
-                print(f"Warning: Could not remove directory: {e}")
-                # Try to continue anyway
-
-        # Recreate the vector store
-        self._create_vector_store()
-        print("Reload complete.")
+        self.sessions.clear_all()
+
+    def reload_documents(self, full: bool = False) -> dict:
+        """
+        Re-index the data folder and return a summary of what changed.
+
+        Only new or changed files are re-embedded, into a copy of the
+        live index published as the next generation. A full rebuild
+        happens when requested or when there is no usable manifest (first
+        run, or the embedding model / chunking settings changed). Queries
+        keep being answered from the live index throughout, and other
+        workers switch to the new generation through CURRENT.
+        """
+        self.initialize()
+        # The store lock serializes reloads across workers
+        with self._reload_lock, store_lock(Path(settings.vector_store_path)):
+            print("Reloading documents...")
+            # Start from the newest generation, wherever it was built
+            self._follow_current()
+
+            manifest = None
+            if self.vector_store is not None and not full:
+                manifest = self._read_manifest(self._index_path)
+
+            if manifest is not None and not self._documents_changed(manifest):
+                # Nothing to embed or delete: the live generation stays as is
+                report = self._sync_documents(self.vector_store, self._index_path, manifest)
+                report["mode"] = "incremental"
+            elif manifest is not None:
+                report = self._update_vector_store(manifest)
+                report["mode"] = "incremental"
+            else:
+                report = self._rebuild_vector_store()
+                report["mode"] = "full"
+            report["index_generation"] = self.index_generation
+
+            # Cached answers were grounded in the old documents
+            changed = report["chunks_added"] or report["chunks_removed"] or full
+            if changed and self.response_cache is not None:
+                self.response_cache.clear()
+
+            print(
+                f"Reload complete ({report['mode']}): "
+                f"{report['files_added']} added, {report['files_changed']} changed, "
+                f"{report['files_removed']} removed, {report['files_skipped']} skipped "
+                f"in {report['elapsed_seconds']}s"
+            )
+            return report
 
 
 # Singleton instance
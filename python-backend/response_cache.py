@@ -0,0 +1,166 @@
+"""
+Semantic response cache placed in front of the LLM.
+
+Answers are keyed on the query embedding (matched by cosine similarity),
+a fingerprint of the retrieved context and any additional context, so a
+rephrased question that retrieves the same chunks reuses the answer
+instead of paying for another LLM round trip.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+
+# Rough per-entry bookkeeping cost on top of payload bytes
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def context_fingerprint(context: List[str]) -> str:
+    """Stable digest of the context chunks handed to the LLM."""
+    digest = hashlib.sha256()
+    for chunk in context:
+        digest.update(chunk.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _normalize(embedding: List[float]) -> array:
+    norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+    return array("f", (value / norm for value in embedding))
+
+
+@dataclass
+class _CacheEntry:
+    embedding: array
+    context_key: str
+    response: str
+    size: int
+    expires_at: float
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache of LLM responses with a byte budget."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._by_context: Dict[str, Set[int]] = {}
+        self._next_id = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ------------------------------------------------------------------
+    # Lookup / insert
+    # ------------------------------------------------------------------
+
+    def get(self, embedding: List[float], context_key: str) -> Optional[str]:
+        """Return a cached response for a similar query, if any."""
+        query = _normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id in list(self._by_context.get(context_key, ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                score = sum(a * b for a, b in zip(query, entry.embedding))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id].response
+
+    def put(self, embedding: List[float], context_key: str, response: str) -> None:
+        """Cache a response for the given query embedding and context."""
+        vector = _normalize(embedding)
+        size = (
+            len(response.encode("utf-8"))
+            + len(context_key)
+            + vector.itemsize * len(vector)
+            + _ENTRY_OVERHEAD_BYTES
+        )
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _CacheEntry(
+                embedding=vector,
+                context_key=context_key,
+                response=response,
+                size=size,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            self._by_context.setdefault(context_key, set()).add(entry_id)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached response (e.g. after the documents change)."""
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry.size
+        siblings = self._by_context.get(entry.context_key)
+        if siblings is not None:
+            siblings.discard(entry_id)
+            if not siblings:
+                del self._by_context[entry.context_key]
@@ -1,53 +1,273 @@
 """Security utilities for input validation and prompt injection prevention."""
 
+import json
+import os
 import re
-from typing import Tuple
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, NamedTuple, Optional, Pattern, Tuple
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+from config import settings
+
+# Rules file format understood by SecurityValidator (see security_rules.json)
+RULES_FORMAT_VERSION = 1
+
+# ASCII letters, digits and whitespace, as str.isalnum / str.isspace see
+# them: deleted in one C-level str.translate pass before counting
+_PLAIN_ASCII = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if c.isalnum() or c.isspace())
+)
+
+
+def special_char_count(text: str) -> int:
+    """Characters that are neither alphanumeric nor whitespace."""
+    rest = text.translate(_PLAIN_ASCII)
+    # Only punctuation and non-ASCII characters are left to classify
+    return sum(1 for c in rest if not c.isalnum() and not c.isspace())
+
+
+@dataclass(frozen=True)
+class SecurityVerdict:
+    """Outcome of SecurityValidator.check."""
+
+    valid: bool
+    message: str = ""
+    # Why the input was rejected: length | empty | special_chars |
+    # injection:<rule id> | suspicious:<rule id>
+    rule: Optional[str] = None
+
+
+class Rule(NamedTuple):
+    """One validation rule and the literal every match of it starts with."""
+
+    name: str  # <category>:<rule id>
+    prefix: str
+    regex: Pattern
+
+
+@dataclass(frozen=True)
+class SecurityRules:
+    """
+    A compiled rule set.
+
+    Matching runs in two steps: the input is case-folded once and each
+    rule's leading literal is looked up with a C-level substring search;
+    only rules whose literal occurs, usually none, run their regex.
+
+    This deliberately is not one combined automaton. CPython's re has no
+    multi-pattern matcher: it tries every branch of an alternation at
+    every position. Timed with benchmarks/security_bench.py (per message,
+    corpus / 500-character benign input):
+
+        per-rule literal prefilter (this)         5 /  22 us
+        alternation of the literal prefixes      6 /  27 us
+        alternation of the full rules           27 / 490 us
+
+    The full alternation would also report the leftmost match rather than
+    the first rule in precedence order.
+    """
+
+    revision: str
+    rules: Tuple[Rule, ...]
+    max_special_char_ratio: float
+
+    @classmethod
+    def compile(
+        cls,
+        injection: Dict[str, str],
+        suspicious: Dict[str, str],
+        max_special_char_ratio: float = 0.3,
+        revision: str = "builtin",
+    ) -> "SecurityRules":
+        rules = []
+        # Injection rules take precedence, as they always have
+        for category, patterns in (("injection", injection), ("suspicious", suspicious)):
+            for rule_id, pattern in patterns.items():
+                try:
+                    regex = re.compile(pattern, re.IGNORECASE)
+                except re.error as e:
+                    raise ValueError(f"rule '{rule_id}': {e}") from None
+                rules.append(Rule(f"{category}:{rule_id}", _literal_prefix(pattern), regex))
+        return cls(revision, tuple(rules), max_special_char_ratio)
+
+    @classmethod
+    def load(cls, path: str) -> "SecurityRules":
+        """Read and compile a rules file; raises ValueError if it is invalid."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        if data.get("version") != RULES_FORMAT_VERSION:
+            raise ValueError(f"unsupported rules format version {data.get('version')!r}")
+        for key in ("injection", "suspicious"):
+            patterns = data.get(key, {})
+            if not isinstance(patterns, dict) or not all(
+                isinstance(pattern, str) for pattern in patterns.values()
+            ):
+                raise ValueError(f"'{key}' must map rule ids to regex strings")
+        return cls.compile(
+            data.get("injection", {}),
+            data.get("suspicious", {}),
+            float(data.get("max_special_char_ratio", 0.3)),
+            str(data.get("revision", "unversioned")),
+        )
+
+    def match(self, text: str) -> Optional[str]:
+        """Name of the first rule that matches, else None."""
+        folded = _fold(text)
+        for rule in self.rules:
+            if rule.prefix in folded and rule.regex.search(text):
+                return rule.name
+        return None
+
+
+# re.IGNORECASE matches these to "i"; casefold() does not
+_DOTTED_I = str.maketrans({"\u0130": "i", "\u0131": "i"})
+
+
+def _fold(text: str) -> str:
+    """Case-fold text so it contains every prefix a case-insensitive rule could match."""
+    if not text.isascii():
+        text = text.translate(_DOTTED_I)
+    return text.casefold()
+
+
+def _literal_prefix(pattern: str) -> str:
+    """
+    Lower-case ASCII literal that every match of `pattern` starts with.
+
+    Empty when the pattern starts with anything else (a group, a class,
+    an alternation...), in which case the rule always runs.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, re.IGNORECASE)
+    except Exception:
+        return ""
+    prefix = []
+    for op, value in parsed:
+        if op is not _sre_parse.LITERAL or value > 127:
+            break
+        prefix.append(chr(value))
+    return "".join(prefix).lower()
 
 
 class SecurityValidator:
     """Validates user input for security threats."""
     
+    # Built-in rules, used when no rules file is configured or it cannot
+    # be read. security_rules.json ships the same set.
+
     # Patterns that indicate potential prompt injection
-    INJECTION_PATTERNS = [
-        r"ignore\s+(previous|above|all|prior)\s+instructions?",
-        r"disregard\s+(previous|above|all|prior)\s+instructions?",
-        r"forget\s+(previous|above|all|prior)\s+instructions?",
-        r"system\s*:\s*",
-        r"override\s+(all\s+)?instructions?",
-        r"new\s+instructions?",
-        r"you\s+are\s+now",
-        r"act\s+as\s+if",
-        r"pretend\s+to\s+be",
-        r"simulate\s+being",
-        r"roleplay\s+as",
-        r"reveal\s+(the\s+)?(prompt|instruction|system)",
-        r"show\s+(me\s+)?(the\s+)?(prompt|instruction|system)",
-        r"what\s+(is|are)\s+your\s+(system\s+)?(instructions|rules|prompts)(\s*\?|$)",
-        r"your\s+(system\s+)?(instructions|rules|prompts)(\s*\?|$)",
-        r"bypass\s+security",
-        r"disable\s+safety",
-    ]
+    INJECTION_PATTERNS = {
+        "ignore_instructions": r"ignore\s+(previous|above|all|prior)\s+instructions?",
+        "disregard_instructions": r"disregard\s+(previous|above|all|prior)\s+instructions?",
+        "forget_instructions": r"forget\s+(previous|above|all|prior)\s+instructions?",
+        "system_prefix": r"system\s*:\s*",
+        "override_instructions": r"override\s+(all\s+)?instructions?",
+        "new_instructions": r"new\s+instructions?",
+        "you_are_now": r"you\s+are\s+now",
+        "act_as_if": r"act\s+as\s+if",
+        "pretend_to_be": r"pretend\s+to\s+be",
+        "simulate_being": r"simulate\s+being",
+        "roleplay_as": r"roleplay\s+as",
+        "reveal_prompt": r"reveal\s+(the\s+)?(prompt|instruction|system)",
+        "show_prompt": r"show\s+(me\s+)?(the\s+)?(prompt|instruction|system)",
+        "ask_instructions": r"what\s+(is|are)\s+your\s+(system\s+)?(instructions|rules|prompts)(\s*\?|$)",
+        "your_instructions": r"your\s+(system\s+)?(instructions|rules|prompts)(\s*\?|$)",
+        "bypass_security": r"bypass\s+security",
+        "disable_safety": r"disable\s+safety",
+    }
     
     # Suspicious patterns that might indicate attacks
-    SUSPICIOUS_PATTERNS = [
-        r"<script",
-        r"javascript:",
-        r"onerror\s*=",
-        r"onclick\s*=",
-        r"SELECT\s+.*\s+FROM",
-        r"DROP\s+TABLE",
-        r"INSERT\s+INTO",
-        r"DELETE\s+FROM",
-        r"<\s*iframe",
-        r"eval\s*\(",
-        r"exec\s*\(",
-    ]
+    SUSPICIOUS_PATTERNS = {
+        "script_tag": r"<script",
+        "javascript_url": r"javascript:",
+        "onerror_handler": r"onerror\s*=",
+        "onclick_handler": r"onclick\s*=",
+        "sql_select": r"SELECT\s+.*\s+FROM",
+        "sql_drop": r"DROP\s+TABLE",
+        "sql_insert": r"INSERT\s+INTO",
+        "sql_delete": r"DELETE\s+FROM",
+        "iframe_tag": r"<\s*iframe",
+        "eval_call": r"eval\s*\(",
+        "exec_call": r"exec\s*\(",
+    }
     
-    def __init__(self):
-        self.injection_regex = [re.compile(pattern, re.IGNORECASE) for pattern in self.INJECTION_PATTERNS]
-        self.suspicious_regex = [re.compile(pattern, re.IGNORECASE) for pattern in self.SUSPICIOUS_PATTERNS]
-    
-    def validate_input(self, user_input: str, max_length: int = 500) -> Tuple[bool, str]:
+    def __init__(self, rules_path: Optional[str] = None, reload_seconds: float = 0.0):
+        """
+        Args:
+            rules_path: JSON rules file (see security_rules.json); the
+                built-in rules are used until it loads, and a broken or
+                removed file keeps the last rules that did
+            reload_seconds: How often to check the file for changes
+                (0 = load once)
+        """
+        self.rules_path = rules_path
+        self.reload_seconds = reload_seconds
+        self.rules = SecurityRules.compile(self.INJECTION_PATTERNS, self.SUSPICIOUS_PATTERNS)
+
+        self._reload_lock = threading.Lock()
+        self._file_stamp: Optional[Tuple[float, int]] = None
+        self._checked_at = time.monotonic()
+        if rules_path:
+            self.reload()
+
+    # ------------------------------------------------------------------
+    # Rules file
+    # ------------------------------------------------------------------
+
+    def reload(self) -> bool:
+        """Load the rules file if it changed since the last load; True if swapped in."""
+        if not self.rules_path:
+            return False
+        # One thread checks; the others keep validating with the current rules
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                stat = os.stat(self.rules_path)
+            except OSError:
+                if self._file_stamp is None:
+                    print(f"Security rules file {self.rules_path} not found, using built-in rules")
+                    self._file_stamp = (0.0, -1)
+                return False
+
+            stamp = (stat.st_mtime, stat.st_size)
+            if stamp == self._file_stamp:
+                return False
+            self._file_stamp = stamp
+
+            try:
+                rules = SecurityRules.load(self.rules_path)
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Invalid security rules in {self.rules_path}, keeping revision {self.rules.revision}: {e}")
+                return False
+
+            self.rules = rules
+            print(f"Loaded security rules revision {rules.revision} ({len(rules.rules)} rules)")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _current_rules(self) -> SecurityRules:
+        if self.rules_path and self.reload_seconds > 0:
+            now = time.monotonic()
+            if now - self._checked_at >= self.reload_seconds:
+                self._checked_at = now
+                self.reload()
+        return self.rules
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def check(self, user_input: str, max_length: int = 500) -> SecurityVerdict:
         """
         Validate user input for security threats.
         
@@ -56,34 +276,49 @@ class SecurityValidator:
             max_length: Maximum allowed input length
             
         Returns:
-            Tuple of (is_valid, error_message)
+            SecurityVerdict naming the rule that rejected the input, if any
         """
         # Check length
         if len(user_input) > max_length:
-            return False, f"Input exceeds maximum length of {max_length} characters"
+            return SecurityVerdict(
+                False, f"Input exceeds maximum length of {max_length} characters", "length"
+            )
         
         # Check for empty input
         if not user_input or not user_input.strip():
-            return False, "Input cannot be empty"
-        
-        # Check for prompt injection attempts
-        for pattern in self.injection_regex:
-            if pattern.search(user_input):
-                return False, "Input contains suspicious content that violates security policies"
+            return SecurityVerdict(False, "Input cannot be empty", "empty")
         
-        # Check for suspicious patterns
-        for pattern in self.suspicious_regex:
-            if pattern.search(user_input):
-                return False, "Input contains potentially malicious content"
+        rules = self._current_rules()
+
+        # Prompt injection and other suspicious patterns, one scan each
+        rule = rules.match(user_input)
+        if rule is not None:
+            if rule.startswith("injection:"):
+                message = "Input contains suspicious content that violates security policies"
+            else:
+                message = "Input contains potentially malicious content"
+            return SecurityVerdict(False, message, rule)
         
         # Check for excessive special characters (potential encoding attacks)
-        # Note: Empty input already checked above, but added safety check
-        if len(user_input) > 0:
-            special_char_ratio = sum(1 for c in user_input if not c.isalnum() and not c.isspace()) / len(user_input)
-            if special_char_ratio > 0.3:
-                return False, "Input contains excessive special characters"
+        special_char_ratio = special_char_count(user_input) / len(user_input)
+        if special_char_ratio > rules.max_special_char_ratio:
+            return SecurityVerdict(False, "Input contains excessive special characters", "special_chars")
+        
+        return SecurityVerdict(True)
+
+    def validate_input(self, user_input: str, max_length: int = 500) -> Tuple[bool, str]:
+        """
+        Validate user input for security threats.
         
-        return True, ""
+        Args:
+            user_input: The user's input text
+            max_length: Maximum allowed input length
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        verdict = self.check(user_input, max_length)
+        return verdict.valid, verdict.message
     
     def sanitize_output(self, output: str) -> str:
         """
@@ -105,5 +340,99 @@ class SecurityValidator:
         return sanitized.strip()
 
 
+class _MarkerBlockFilter:
+    """Streaming equivalent of removing one kind of marker block."""
+
+    def __init__(self, open_marker: str, close_marker: str):
+        self.open_marker = open_marker.lower()
+        self._open_regex = re.compile(re.escape(open_marker), re.IGNORECASE)
+        self._close_regex = re.compile(re.escape(close_marker), re.IGNORECASE)
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        emitted = []
+
+        while self._buffer:
+            opening = self._open_regex.search(self._buffer)
+
+            if opening is None:
+                # Hold back a tail that could still grow into a marker
+                hold = self._partial_marker_length()
+                emitted.append(self._buffer[: len(self._buffer) - hold])
+                self._buffer = self._buffer[len(self._buffer) - hold :]
+                break
+
+            emitted.append(self._buffer[: opening.start()])
+            closing = self._close_regex.search(self._buffer, opening.end())
+            if closing is None:
+                # Block not closed yet: wait for more chunks
+                self._buffer = self._buffer[opening.start() :]
+                break
+            self._buffer = self._buffer[closing.end() :]
+
+        return "".join(emitted)
+
+    def flush(self) -> str:
+        # Unclosed blocks never match the batch pattern, so they stay
+        remaining, self._buffer = self._buffer, ""
+        return remaining
+
+    def _partial_marker_length(self) -> int:
+        for size in range(len(self.open_marker) - 1, 0, -1):
+            if self._buffer[-size:].lower() == self.open_marker[:size]:
+                return size
+        return 0
+
+
+class StreamSanitizer:
+    """
+    Incremental counterpart of SecurityValidator.sanitize_output.
+
+    Feed streamed chunks in order; the returned text is safe to forward.
+    Text that might be the start of a [SYSTEM]/[INTERNAL] marker, or that
+    sits inside an open marker block, is held back until it can be
+    decided, so markers split across chunk boundaries are still removed.
+    """
+
+    def __init__(self):
+        # Chained in the same order sanitize_output applies its patterns
+        self._filters = [
+            _MarkerBlockFilter("[SYSTEM]", "[/SYSTEM]"),
+            _MarkerBlockFilter("[INTERNAL]", "[/INTERNAL]"),
+        ]
+        self._pending_whitespace = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a streamed chunk and return the text that can be emitted."""
+        for marker_filter in self._filters:
+            chunk = marker_filter.feed(chunk)
+        return self._emit(chunk)
+
+    def flush(self) -> str:
+        """Return whatever is still buffered once the stream has ended."""
+        text = ""
+        for marker_filter in self._filters:
+            text = marker_filter.feed(text) + marker_filter.flush()
+        return self._emit(text).rstrip()
+
+    def _emit(self, text: str) -> str:
+        # Mirror the final .strip(): drop leading whitespace of the whole
+        # stream and defer trailing whitespace until more text follows.
+        text = self._pending_whitespace + text
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        stripped = text.rstrip()
+        self._pending_whitespace = text[len(stripped) :]
+        return stripped
+
+
 # Global instance
-security_validator = SecurityValidator()
+security_validator = SecurityValidator(
+    rules_path=settings.security_rules_path or None,
+    reload_seconds=settings.security_rules_reload_seconds,
+)
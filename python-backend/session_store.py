@@ -0,0 +1,360 @@
+"""
+Session history storage.
+
+SessionBackend defines what RAGSystem needs from a session store. The
+default InMemorySessionStore keeps histories in-process; sessions are
+kept in LRU order and dropped when they sit idle past the TTL, when the
+session count exceeds its cap, or when the approximate bytes held exceed
+the memory budget. SQLiteSessionStore (sqlite_session_store.py) shares
+histories between worker processes on one host.
+
+Besides its messages a session can hold a running summary of older turns
+(MEMORY_MODE=summary). Message positions count from the first message
+ever appended to the session, so a summary written in the background
+can name exactly which messages it replaces even if turns were added or
+trimmed while it was being generated.
+
+Each message's prompt token count is computed once, when it is stored,
+so the token budget for memory can be applied on every turn cheaply.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from config import settings
+from token_counter import message_tokens
+
+
+# Rough bookkeeping cost of a session / message on top of content bytes
+_SESSION_OVERHEAD_BYTES = 200
+_MESSAGE_OVERHEAD_BYTES = 100
+
+
+@dataclass
+class SessionSnapshot:
+    """Summary and messages of a session, read together."""
+
+    summary: str = ""
+    # Position of messages[0] in the session's full history
+    offset: int = 0
+    messages: List = field(default_factory=list)
+    # Prompt tokens of each message (see token_counter.message_tokens)
+    tokens: List[int] = field(default_factory=list)
+
+
+def message_size(message) -> int:
+    """Approximate memory held by one stored message."""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return len(content.encode("utf-8")) + _MESSAGE_OVERHEAD_BYTES
+
+
+class SessionBackend(ABC):
+    """Interface for per-session conversation history storage."""
+
+    # Whether calls may wait on disk or on other processes; RAGSystem then
+    # makes them from a worker thread instead of the event loop
+    blocking_io = False
+
+    @abstractmethod
+    def __contains__(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def create(self, session_id: str) -> None:
+        """Start an empty history for session_id (replacing any existing one)."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> List:
+        """Messages for session_id (oldest first); empty if unknown."""
+
+    @abstractmethod
+    def snapshot(self, session_id: str) -> SessionSnapshot:
+        """Summary and messages for session_id; empty if unknown."""
+
+    @abstractmethod
+    def message_count(self, session_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def append(
+        self, session_id: str, messages: List, max_messages: Optional[int] = None
+    ) -> None:
+        """
+        Append messages, recreating the session if it was evicted meanwhile.
+
+        If max_messages is given, only that many of the most recent
+        messages are kept, as part of the same write.
+        """
+
+    @abstractmethod
+    def trim(self, session_id: str, max_messages: int) -> None:
+        """Keep only the most recent max_messages messages."""
+
+    @abstractmethod
+    def compact(self, session_id: str, summary: str, covered: int) -> bool:
+        """
+        Replace the first ``covered`` messages of the history with summary.
+
+        Messages before position ``covered`` still held are dropped. Does
+        nothing (returns False) if the session is gone or already has a
+        summary covering as much.
+        """
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        """Empty the history (and summary) of a session but keep the session itself."""
+
+    @abstractmethod
+    def clear_all(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+@dataclass
+class _Session:
+    messages: List = field(default_factory=list)
+    tokens: List[int] = field(default_factory=list)
+    size: int = _SESSION_OVERHEAD_BYTES
+    last_access: float = field(default_factory=time.monotonic)
+    summary: str = ""
+    # Position of messages[0], and of the first message not in the summary
+    offset: int = 0
+    summarized: int = 0
+
+
+class InMemorySessionStore(SessionBackend):
+    """Thread-safe LRU + idle-TTL store of session message histories."""
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        idle_ttl_seconds: float = 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    # ------------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------------
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return self._touch(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def create(self, session_id: str) -> None:
+        with self._lock:
+            self._drop(session_id)
+            self._sessions[session_id] = _Session()
+            self._bytes += _SESSION_OVERHEAD_BYTES
+            self.created += 1
+            self._enforce_limits()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._drop(session_id)
+
+    # ------------------------------------------------------------------
+    # History access
+    # ------------------------------------------------------------------
+
+    def get(self, session_id: str) -> List:
+        with self._lock:
+            session = self._touch(session_id)
+            return list(session.messages) if session else []
+
+    def snapshot(self, session_id: str) -> SessionSnapshot:
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                return SessionSnapshot()
+            return SessionSnapshot(
+                session.summary, session.offset, list(session.messages), list(session.tokens)
+            )
+
+    def message_count(self, session_id: str) -> int:
+        with self._lock:
+            session = self._touch(session_id)
+            return len(session.messages) if session else 0
+
+    def append(
+        self, session_id: str, messages: List, max_messages: Optional[int] = None
+    ) -> None:
+        tokens = [message_tokens(message) for message in messages]
+
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                self.create(session_id)
+                session = self._sessions[session_id]
+
+            added = sum(message_size(message) for message in messages)
+            session.messages.extend(messages)
+            session.tokens.extend(tokens)
+            session.size += added
+            self._bytes += added
+
+            if max_messages is not None:
+                self.trim(session_id, max_messages)
+            self._enforce_limits()
+
+    def trim(self, session_id: str, max_messages: int) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or len(session.messages) <= max_messages:
+                return
+            self._drop_oldest(session, len(session.messages) - max_messages)
+
+    def compact(self, session_id: str, summary: str, covered: int) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or covered <= session.summarized:
+                return False
+
+            self._drop_oldest(session, min(covered - session.offset, len(session.messages)))
+            added = len(summary.encode("utf-8")) - len(session.summary.encode("utf-8"))
+            session.summary = summary
+            session.summarized = covered
+            session.size += added
+            self._bytes += added
+            self._enforce_limits()
+            return True
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            self._bytes -= session.size - _SESSION_OVERHEAD_BYTES
+            session.offset += len(session.messages)
+            session.summarized = session.offset
+            session.messages.clear()
+            session.tokens.clear()
+            session.summary = ""
+            session.size = _SESSION_OVERHEAD_BYTES
+
+    def clear_all(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire_idle()
+            return {
+                "backend": "memory",
+                "sessions_live": len(self._sessions),
+                "sessions_created": self.created,
+                "sessions_evicted": self.evicted,
+                "sessions_expired": self.expired,
+                "bytes_held": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold the lock)
+    # ------------------------------------------------------------------
+
+    def _touch(self, session_id: str) -> Optional[_Session]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        now = time.monotonic()
+        if now - session.last_access > self.idle_ttl_seconds:
+            self._drop(session_id)
+            self.expired += 1
+            return None
+
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _drop_oldest(self, session: _Session, count: int) -> None:
+        if count <= 0:
+            return
+        dropped = session.messages[:count]
+        del session.messages[:count]
+        del session.tokens[:count]
+        session.offset += count
+        removed = sum(message_size(message) for message in dropped)
+        session.size -= removed
+        self._bytes -= removed
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.size
+
+    def _expire_idle(self) -> None:
+        # Least recently used sessions sit at the front
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            self._drop(session_id)
+            self.expired += 1
+
+    def _enforce_limits(self) -> None:
+        self._expire_idle()
+        # Never evict the most recently used session to make room
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            session_id = next(iter(self._sessions))
+            self._drop(session_id)
+            self.evicted += 1
+
+
+def create_session_store() -> SessionBackend:
+    """Build the session backend selected by settings.session_backend."""
+    backend = settings.session_backend.lower()
+
+    if backend == "sqlite":
+        from sqlite_session_store import SQLiteSessionStore
+
+        return SQLiteSessionStore(
+            path=settings.session_sqlite_path,
+            max_sessions=settings.session_max_count,
+            idle_ttl_seconds=settings.session_idle_ttl_seconds,
+        )
+
+    if backend != "memory":
+        print(f"Unknown SESSION_BACKEND '{settings.session_backend}', using memory")
+
+    return InMemorySessionStore(
+        max_sessions=settings.session_max_count,
+        idle_ttl_seconds=settings.session_idle_ttl_seconds,
+        max_bytes=settings.session_max_bytes,
+    )
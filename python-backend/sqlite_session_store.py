@@ -0,0 +1,432 @@
+"""
+SQLite-backed session store shared by worker processes on one host.
+
+The database runs in WAL mode so readers in one worker never block the
+writer in another. Only last-access updates (needed only for TTL/LRU
+eviction) are buffered and flushed in batches; every turn is still
+written in a transaction of its own. Writers in different workers queue
+on the database lock for up to 10 s, so calls may block: RAGSystem runs
+them off the event loop (see SessionBackend.blocking_io). Messages are stored as a one-byte role tag followed
+by UTF-8 content, zlib-compressed when that is smaller. A message's seq
+is its position in the session's full history, which is what summaries
+written by compact() refer to.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from session_store import SessionBackend, SessionSnapshot
+from token_counter import message_tokens
+
+
+# Role tags; the upper-case variant marks zlib-compressed content
+_ROLE_TAGS = {HumanMessage: b"h", AIMessage: b"a", SystemMessage: b"s"}
+_TAG_ROLES = {tag: role for role, tag in _ROLE_TAGS.items()}
+
+# Content shorter than this is never worth compressing
+_COMPRESS_MIN_BYTES = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id  TEXT PRIMARY KEY,
+    last_access REAL NOT NULL,
+    size        INTEGER NOT NULL DEFAULT 0,
+    next_seq    INTEGER NOT NULL DEFAULT 0,
+    summary     TEXT NOT NULL DEFAULT '',
+    summarized  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    seq        INTEGER NOT NULL,
+    body       BLOB NOT NULL,
+    tokens     INTEGER,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# Columns added after the first release, for existing databases
+_ADDED_COLUMNS = {
+    "sessions": {
+        "summary": "TEXT NOT NULL DEFAULT ''",
+        "summarized": "INTEGER NOT NULL DEFAULT 0",
+    },
+    # Prompt tokens of the message; NULL for rows stored before it existed
+    "messages": {"tokens": "INTEGER"},
+}
+
+
+def encode_message(message) -> bytes:
+    """Compact binary encoding of a chat message."""
+    tag = _ROLE_TAGS.get(type(message), b"h")
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    data = content.encode("utf-8")
+
+    if len(data) >= _COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return tag.upper() + compressed
+    return tag + data
+
+
+def decode_message(body: bytes):
+    tag, data = body[:1], body[1:]
+    if tag.isupper():
+        tag, data = tag.lower(), zlib.decompress(data)
+    role = _TAG_ROLES.get(tag, HumanMessage)
+    return role(content=data.decode("utf-8"))
+
+
+class SQLiteSessionStore(SessionBackend):
+    """Session histories persisted in a WAL-mode SQLite database."""
+
+    blocking_io = True
+
+    def __init__(
+        self,
+        path: str = "./sessions.db",
+        max_sessions: int = 10000,
+        idle_ttl_seconds: float = 3600,
+        touch_flush_seconds: float = 5.0,
+        sweep_interval_seconds: float = 30.0,
+    ):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.touch_flush_seconds = touch_flush_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=10.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._lock = threading.RLock()
+
+        # session_id -> last access time not yet written to the database
+        self._pending_touches: Dict[str, float] = {}
+        self._last_touch_flush = time.monotonic()
+        self._last_sweep = 0.0
+
+        # Per-process counters
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    # ------------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------------
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return self._touch(session_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def create(self, session_id: str) -> None:
+        with self._lock:
+            self._pending_touches.pop(session_id, None)
+            with self._transaction():
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+                )
+                self._conn.execute(
+                    "INSERT INTO sessions (session_id, last_access) VALUES (?, ?)",
+                    (session_id, time.time()),
+                )
+            self.created += 1
+            self._maybe_sweep()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._pending_touches.pop(session_id, None)
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    # ------------------------------------------------------------------
+    # History access
+    # ------------------------------------------------------------------
+
+    def get(self, session_id: str) -> List:
+        with self._lock:
+            if not self._touch(session_id):
+                return []
+            rows = self._conn.execute(
+                "SELECT body FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        return [decode_message(body) for (body,) in rows]
+
+    def snapshot(self, session_id: str) -> SessionSnapshot:
+        with self._lock:
+            if not self._touch(session_id):
+                return SessionSnapshot()
+            summary, next_seq = self._conn.execute(
+                "SELECT summary, next_seq FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            rows = self._conn.execute(
+                "SELECT seq, body, tokens FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        offset = rows[0][0] if rows else next_seq
+        messages = [decode_message(body) for _, body, _ in rows]
+        tokens = [
+            message_tokens(message) if count is None else count
+            for message, (_, _, count) in zip(messages, rows)
+        ]
+        return SessionSnapshot(summary, offset, messages, tokens)
+
+    def message_count(self, session_id: str) -> int:
+        with self._lock:
+            if not self._touch(session_id):
+                return 0
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def append(
+        self, session_id: str, messages: List, max_messages: Optional[int] = None
+    ) -> None:
+        bodies = [encode_message(message) for message in messages]
+        tokens = [message_tokens(message) for message in messages]
+        now = time.time()
+
+        with self._lock:
+            self._pending_touches.pop(session_id, None)
+            with self._transaction():
+                row = self._conn.execute(
+                    "SELECT next_seq FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO sessions (session_id, last_access) VALUES (?, ?)",
+                        (session_id, now),
+                    )
+                    self.created += 1
+                    next_seq = 0
+                else:
+                    next_seq = row[0]
+
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, body, tokens) VALUES (?, ?, ?, ?)",
+                    [
+                        (session_id, next_seq + offset, body, count)
+                        for offset, (body, count) in enumerate(zip(bodies, tokens))
+                    ],
+                )
+                self._conn.execute(
+                    "UPDATE sessions SET next_seq = ?, last_access = ?, size = size + ? "
+                    "WHERE session_id = ?",
+                    (next_seq + len(bodies), now, sum(map(len, bodies)), session_id),
+                )
+                if max_messages is not None:
+                    self._trim(session_id, max_messages)
+
+    def trim(self, session_id: str, max_messages: int) -> None:
+        with self._lock:
+            with self._transaction():
+                self._trim(session_id, max_messages)
+
+    def compact(self, session_id: str, summary: str, covered: int) -> bool:
+        with self._lock:
+            with self._transaction():
+                row = self._conn.execute(
+                    "SELECT summary, summarized FROM sessions WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                if row is None or covered <= row[1]:
+                    return False
+
+                removed = self._delete_before(session_id, covered)
+                added = len(summary.encode("utf-8")) - len(row[0].encode("utf-8"))
+                self._conn.execute(
+                    "UPDATE sessions SET summary = ?, summarized = ?, size = size + ? "
+                    "WHERE session_id = ?",
+                    (summary, covered, added - removed, session_id),
+                )
+                return True
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            with self._transaction():
+                self._conn.execute(
+                    "DELETE FROM messages WHERE session_id = ?", (session_id,)
+                )
+                self._conn.execute(
+                    "UPDATE sessions SET size = 0, summary = '', summarized = next_seq "
+                    "WHERE session_id = ?",
+                    (session_id,),
+                )
+
+    def clear_all(self) -> None:
+        with self._lock:
+            self._pending_touches.clear()
+            self._conn.execute("DELETE FROM sessions")
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._flush_touches()
+            live, held = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions"
+            ).fetchone()
+        db_path = Path(self.path)
+        db_bytes = sum(
+            candidate.stat().st_size
+            for candidate in (db_path, Path(f"{self.path}-wal"))
+            if candidate.exists()
+        )
+        return {
+            "backend": "sqlite",
+            "sessions_live": live,
+            "sessions_created": self.created,
+            "sessions_evicted": self.evicted,
+            "sessions_expired": self.expired,
+            "bytes_held": held,
+            "db_bytes": db_bytes,
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold the lock)
+    # ------------------------------------------------------------------
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def _migrate(self) -> None:
+        """Add columns missing from a database created by an older version."""
+        with self._transaction():
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {
+                    row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")
+                }
+                for column, definition in columns.items():
+                    if column not in existing:
+                        self._conn.execute(
+                            f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                        )
+
+    def _touch(self, session_id: str) -> bool:
+        """Check the session is live and record the access (batched)."""
+        now = time.time()
+        last_access = self._pending_touches.get(session_id)
+        if last_access is None:
+            row = self._conn.execute(
+                "SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            last_access = row[0]
+
+        if now - last_access > self.idle_ttl_seconds:
+            self.delete(session_id)
+            self.expired += 1
+            return False
+
+        self._pending_touches[session_id] = now
+        if time.monotonic() - self._last_touch_flush >= self.touch_flush_seconds:
+            self._flush_touches()
+        return True
+
+    def _flush_touches(self) -> None:
+        self._last_touch_flush = time.monotonic()
+        if not self._pending_touches:
+            return
+        touches, self._pending_touches = self._pending_touches, {}
+        with self._transaction():
+            self._conn.executemany(
+                "UPDATE sessions SET last_access = MAX(last_access, ?) WHERE session_id = ?",
+                [(last_access, session_id) for session_id, last_access in touches.items()],
+            )
+
+    def _trim(self, session_id: str, max_messages: int) -> None:
+        row = self._conn.execute(
+            "SELECT seq FROM messages WHERE session_id = ? "
+            "ORDER BY seq DESC LIMIT 1 OFFSET ?",
+            (session_id, max_messages),
+        ).fetchone()
+        if row is None:
+            return
+        removed = self._delete_before(session_id, row[0] + 1)
+        self._conn.execute(
+            "UPDATE sessions SET size = size - ? WHERE session_id = ?",
+            (removed, session_id),
+        )
+
+    def _delete_before(self, session_id: str, seq: int) -> int:
+        """Delete messages with seq below ``seq``; returns the bytes removed."""
+        removed = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(body)), 0) FROM messages "
+            "WHERE session_id = ? AND seq < ?",
+            (session_id, seq),
+        ).fetchone()[0]
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id = ? AND seq < ?",
+            (session_id, seq),
+        )
+        return removed
+
+    def _maybe_sweep(self) -> None:
+        """Expire idle sessions and enforce max_sessions, at most once per interval."""
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        self._last_sweep = now
+        self._flush_touches()
+
+        with self._transaction():
+            expired = self._conn.execute(
+                "DELETE FROM sessions WHERE last_access < ?",
+                (time.time() - self.idle_ttl_seconds,),
+            ).rowcount
+            live = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            overflow = max(0, live - self.max_sessions)
+            if overflow:
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE session_id IN ("
+                    "SELECT session_id FROM sessions ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+        self.expired += max(0, expired)
+        self.evicted += overflow
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT / ROLLBACK on an autocommit connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._nested = False
+
+    def __enter__(self):
+        self._nested = self._conn.in_transaction
+        if not self._nested:
+            self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._nested:
+            return False
+        if exc_type is None:
+            self._conn.execute("COMMIT")
+        else:
+            self._conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,37 @@
+"""
+Shared setup for the python-backend tests.
+
+Settings are read from the environment when config is first imported,
+so the vector store, data folder and session backend are pointed at a
+throwaway directory here, before any test imports the app. Run from the
+python-backend folder:
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+# Offline stand-ins for the embedding model and the chat LLM
+sys.path.insert(0, str(BACKEND_DIR / "benchmarks"))
+
+_WORK_DIR = Path(tempfile.mkdtemp(prefix="crm-chatbot-tests-"))
+(_WORK_DIR / "data").mkdir()
+(_WORK_DIR / "data" / "service.txt").write_text(
+    "Oil changes cost $49 and take about 45 minutes. Tire rotations are "
+    "free with any service. Brake pad replacement takes about two hours.",
+    encoding="utf-8",
+)
+
+os.environ.update({
+    "DATA_FOLDER": str(_WORK_DIR / "data"),
+    "VECTOR_STORE_PATH": str(_WORK_DIR / "vector_store"),
+    "SESSION_BACKEND": "memory",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "MIN_SIMILARITY_SCORE": "0",
+    "LLM_MAX_CONCURRENCY": "16",
+})
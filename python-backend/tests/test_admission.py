@@ -0,0 +1,172 @@
+"""Admission slots are held around LLM calls only, summaries included."""
+
+import asyncio
+
+import pytest
+
+from admission import BATCH, AdmissionController, AdmissionRejected
+from response_cache import ResponseCache
+from stubs import HashingEmbeddings, StubChatModel
+
+REPLY = "An oil change costs $49."
+QUERY = "How much does an oil change cost?"
+
+
+class SlotProbeChatModel(StubChatModel):
+    """StubChatModel recording how many admission slots are taken during each call."""
+
+    def __init__(self, admission):
+        super().__init__(REPLY)
+        self.admission = admission
+        self.in_flight = []
+
+    async def ainvoke(self, messages):
+        self.in_flight.append(self.admission.in_flight)
+        return await super().ainvoke(messages)
+
+    async def astream(self, messages):
+        self.in_flight.append(self.admission.in_flight)
+        async for chunk in super().astream(messages):
+            yield chunk
+
+
+def _rag(max_queue=4):
+    from rag_system import RAGSystem
+
+    admission = AdmissionController(max_concurrency=1, max_queue=max_queue, queue_timeout=1.0)
+    llm = SlotProbeChatModel(admission)
+    rag = RAGSystem()
+    rag.initialize(embeddings=HashingEmbeddings(), llm=llm)
+    rag.admission = admission
+
+    # Slots taken while retrieving
+    retrieve = rag._retrieve
+    rag.retrieval_in_flight = []
+
+    def probed_retrieve(query):
+        rag.retrieval_in_flight.append(admission.in_flight)
+        return retrieve(query)
+
+    rag._retrieve = probed_retrieve
+    return rag, llm, admission
+
+
+def test_chat_holds_a_slot_only_during_the_llm_call():
+    rag, llm, admission = _rag()
+
+    result = asyncio.run(rag.aquery(QUERY))
+
+    assert result["response"] == REPLY
+    assert rag.retrieval_in_flight == [0]
+    assert llm.in_flight == [1]
+    assert admission.in_flight == 0
+
+
+def test_cached_answer_needs_no_slot():
+    rag, llm, admission = _rag(max_queue=0)
+    rag.response_cache = ResponseCache()
+    asyncio.run(rag.aquery(QUERY))
+
+    async def while_all_slots_are_busy():
+        ticket = await admission.acquire(BATCH)
+        try:
+            return await rag.aquery(QUERY)
+        finally:
+            ticket.release()
+
+    result = asyncio.run(while_all_slots_are_busy())
+    assert result["cached"]
+    assert result["response"] == REPLY
+    assert len(llm.in_flight) == 1
+
+
+def test_shed_chat_raises_before_the_llm_call():
+    rag, llm, admission = _rag(max_queue=0)
+
+    async def while_all_slots_are_busy():
+        ticket = await admission.acquire(BATCH)
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                await rag.aquery(QUERY)
+            events = rag.astream_query(QUERY)
+            with pytest.raises(AdmissionRejected):
+                await events.__anext__()
+            return rejected.value
+        finally:
+            ticket.release()
+
+    rejected = asyncio.run(while_all_slots_are_busy())
+    assert rejected.reason == "queue_full"
+    assert rag.retrieval_in_flight == [1, 1]
+    assert llm.in_flight == []
+
+
+def test_stream_holds_the_slot_until_the_llm_stream_ends():
+    rag, llm, admission = _rag()
+
+    async def stream():
+        slots = []
+        async for event in rag.astream_query(QUERY):
+            slots.append((event["event"], admission.in_flight))
+        return slots
+
+    slots = asyncio.run(stream())
+    assert slots[0] == ("start", 1)
+    assert all(held == 1 for kind, held in slots if kind == "token")
+    assert slots[-1] == ("done", 0)
+    assert llm.in_flight == [1]
+
+
+def test_summary_waits_for_a_slot():
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    rag, llm, admission = _rag(max_queue=0)
+    session_id = rag.get_or_create_session(None)
+    for turn in range(6):
+        rag.sessions.append(
+            session_id,
+            [HumanMessage(content=f"question {turn}"), AIMessage(content=f"answer {turn}")],
+        )
+
+    async def while_all_slots_are_busy():
+        ticket = await admission.acquire(BATCH)
+        try:
+            await rag._asummarize(session_id)
+        finally:
+            ticket.release()
+
+    # Shed: the summary is skipped and retried after a later turn
+    asyncio.run(while_all_slots_are_busy())
+    assert llm.in_flight == []
+    assert rag.sessions.snapshot(session_id).summary == ""
+
+    asyncio.run(rag._asummarize(session_id))
+    assert llm.in_flight == [1]
+    assert rag.sessions.snapshot(session_id).summary == REPLY
+
+
+def test_api_sheds_chats_with_retry_after(monkeypatch):
+    import httpx
+
+    from main import app
+    from rag_system import rag_system
+
+    rag_system.initialize(embeddings=HashingEmbeddings(), llm=StubChatModel(REPLY))
+    admission = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    monkeypatch.setattr(rag_system, "admission", admission)
+
+    async def while_all_slots_are_busy():
+        ticket = await admission.acquire(BATCH)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [
+                    await client.post(path, json={"query": QUERY})
+                    for path in ("/api/v1/chat", "/api/v1/chat/stream")
+                ]
+        finally:
+            ticket.release()
+
+    for response in asyncio.run(while_all_slots_are_busy()):
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
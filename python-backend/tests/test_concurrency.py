@@ -0,0 +1,63 @@
+"""Concurrent /chat requests must overlap their LLM calls."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+# Fixed latency of the stub LLM, in seconds
+LLM_LATENCY = 0.3
+CONCURRENT_CHATS = 10
+
+
+@pytest.fixture(scope="module")
+def app():
+    from main import app
+    from rag_system import rag_system
+    from stubs import HashingEmbeddings, StubChatModel
+
+    rag_system.initialize(
+        embeddings=HashingEmbeddings(),
+        llm=StubChatModel("An oil change costs $49.", latency=lambda: LLM_LATENCY),
+    )
+    return app
+
+
+async def _post_chats(app, count):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post("/api/v1/chat", json={"query": f"How much is oil change number {i}?"})
+            for i in range(count)
+        ))
+
+
+def test_concurrent_chats_take_about_one_llm_latency(app):
+    asyncio.run(_post_chats(app, 1))  # warm up
+
+    started = time.perf_counter()
+    responses = asyncio.run(_post_chats(app, CONCURRENT_CHATS))
+    elapsed = time.perf_counter() - started
+
+    assert [response.status_code for response in responses] == [200] * CONCURRENT_CHATS
+    assert all(not response.json()["cached"] for response in responses)
+    # Serialized calls would take CONCURRENT_CHATS * LLM_LATENCY = 3 s
+    assert elapsed < 2 * LLM_LATENCY, f"{CONCURRENT_CHATS} chats took {elapsed:.2f}s"
+
+
+def test_health_answers_while_chats_wait_on_the_llm(app):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            chats = asyncio.ensure_future(_post_chats(app, CONCURRENT_CHATS))
+            await asyncio.sleep(LLM_LATENCY / 3)
+            started = time.perf_counter()
+            health = await client.get("/health")
+            health_seconds = time.perf_counter() - started
+            await chats
+            return health, health_seconds
+
+    health, health_seconds = asyncio.run(scenario())
+    assert health.status_code == 200
+    assert health_seconds < LLM_LATENCY / 3
@@ -0,0 +1,44 @@
+"""Packing retrieved chunks (and caller context) into the context budget."""
+
+from context_packer import pack_context, truncate_to_budget
+from token_counter import count_tokens
+
+
+def test_unbroken_text_over_budget_is_cut_not_dropped():
+    record = "x" * 26000  # no sentence boundary anywhere
+    truncated = truncate_to_budget(record, max_tokens=100, max_chars=6000)
+    assert truncated and record.startswith(truncated)
+    assert count_tokens(truncated) <= 100
+
+
+def test_truncation_ends_at_the_last_sentence_that_fits():
+    text = " ".join(f"Sentence number {i} is here." for i in range(200))
+    truncated = truncate_to_budget(text, max_tokens=50, max_chars=6000)
+    assert truncated.endswith(".")
+    # One more sentence (well under ten tokens) would not have fit
+    assert 40 < count_tokens(truncated) <= 50
+
+
+def test_oversized_caller_context_is_kept():
+    caller_context = "customer record " * 3000
+    packed = pack_context(
+        [(caller_context, float("inf")), ("Oil changes cost $49.", 0.8)],
+        max_tokens=200,
+        max_chars=6000,
+    )
+    assert packed.chunks and caller_context.startswith(packed.chunks[0])
+    assert packed.truncated
+    assert packed.tokens <= 200
+
+
+def test_chunks_after_a_truncated_one_are_still_tried():
+    # Only the first sentence of this chunk fits, leaving room for the next
+    long_chunk = "Brake pads wear out. " + "squeal " * 500
+    packed = pack_context(
+        [(long_chunk, 0.9), ("Tire rotations are free.", 0.5)],
+        max_tokens=300,
+        max_chars=6000,
+    )
+    assert packed.chunks == ["Brake pads wear out.", "Tire rotations are free."]
+    assert packed.truncated
+    assert packed.dropped == 0
@@ -0,0 +1,189 @@
+"""Deadlines, retries, hedging and the circuit breaker, against a fault-injecting LLM."""
+
+import asyncio
+import time
+
+import pytest
+
+from llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    LLMTimeoutError,
+    ResilientLLM,
+)
+from stubs import FaultyChatModel, HashingEmbeddings, InjectedFault
+
+REPLY = "An oil change costs $49."
+
+
+class ScriptedChatModel(FaultyChatModel):
+    """FaultyChatModel whose faults follow a script, counting cancelled calls."""
+
+    def __init__(self, faults, **kwargs):
+        super().__init__(REPLY, **kwargs)
+        self.script = list(faults)
+        self.cancelled = 0
+
+    def _fault(self):
+        self.calls += 1
+        return self.script.pop(0) if self.script else None
+
+    async def ainvoke(self, messages):
+        try:
+            return await super().ainvoke(messages)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def _timed(coroutine):
+    started = time.perf_counter()
+    try:
+        return asyncio.run(coroutine), time.perf_counter() - started
+    except Exception as e:
+        e.elapsed = time.perf_counter() - started
+        raise
+
+
+# ----------------------------------------------------------------------
+# Deadlines and retries
+# ----------------------------------------------------------------------
+
+def test_attempt_timeout_cuts_off_a_hung_call():
+    llm = ScriptedChatModel(["hang"], hang_seconds=5)
+    client = ResilientLLM(llm, request_budget=5, attempt_timeout=0.2)
+
+    with pytest.raises(LLMTimeoutError) as raised:
+        _timed(client.ainvoke([]))
+    assert raised.value.elapsed < 0.5
+
+
+def test_hung_attempt_is_retried_within_the_budget():
+    llm = ScriptedChatModel(["hang"], hang_seconds=5, latency=lambda: 0.01)
+    client = ResilientLLM(
+        llm, request_budget=2, attempt_timeout=0.2, max_retries=1, backoff_base=0.01
+    )
+
+    response, elapsed = _timed(client.ainvoke([]))
+    assert response.content == REPLY
+    assert llm.calls == 2
+    assert elapsed < 0.5
+
+
+def test_retries_stop_when_the_budget_is_spent():
+    llm = FaultyChatModel(REPLY, latency=lambda: 0.1, error_rate=1.0)
+    client = ResilientLLM(llm, request_budget=0.35, max_retries=50, backoff_base=0.01)
+
+    with pytest.raises((InjectedFault, LLMTimeoutError)) as raised:
+        _timed(client.ainvoke([]))
+    # Each attempt takes 0.1 s: at most four fit, nowhere near 51
+    assert llm.calls <= 4
+    assert raised.value.elapsed < 0.35 + 0.1
+
+
+def test_no_retry_when_a_typical_call_no_longer_fits_the_budget():
+    llm = FaultyChatModel(REPLY, error_rate=1.0)
+    client = ResilientLLM(llm, request_budget=0.25, max_retries=5, backoff_base=0.01)
+    for _ in range(20):
+        client.latency.add(0.3)  # calls usually take 0.3 s
+
+    with pytest.raises(InjectedFault) as raised:
+        _timed(client.ainvoke([]))
+    assert llm.calls == 1
+    assert raised.value.elapsed < 0.1
+
+
+# ----------------------------------------------------------------------
+# Hedging
+# ----------------------------------------------------------------------
+
+def test_hedge_delay_uses_the_nearest_rank_p95():
+    tracker = LatencyTracker()
+    for millis in range(1, 101):
+        tracker.add(millis / 1000)
+    assert tracker.percentile(0.95) == 0.095
+    assert tracker.percentile(0.5) == 0.05
+
+
+def test_hedge_answers_when_the_first_call_stalls_and_the_loser_is_cancelled():
+    llm = ScriptedChatModel(["hang"], hang_seconds=5, latency=lambda: 0.01)
+    client = ResilientLLM(llm, request_budget=2, hedge_enabled=True, hedge_min_delay=0.1)
+
+    async def scenario():
+        response = await client.ainvoke([])
+        await asyncio.sleep(0.01)  # let the cancellation land
+        # Checked inside the loop: asyncio.run cancels leftovers on exit
+        return response, llm.cancelled
+
+    (response, cancelled), elapsed = _timed(scenario())
+    assert response.content == REPLY
+    assert llm.calls == 2
+    assert 0.1 <= elapsed < 0.4
+    assert cancelled == 1
+
+
+def test_no_hedge_when_the_first_call_answers_in_time():
+    llm = ScriptedChatModel([], latency=lambda: 0.02)
+    client = ResilientLLM(llm, request_budget=2, hedge_enabled=True, hedge_min_delay=0.1)
+
+    response, _ = _timed(client.ainvoke([]))
+    assert response.content == REPLY
+    assert llm.calls == 1
+
+
+# ----------------------------------------------------------------------
+# Circuit breaker
+# ----------------------------------------------------------------------
+
+def test_breaker_opens_fails_fast_and_half_opens_after_the_cooldown():
+    llm = FaultyChatModel(REPLY, error_rate=1.0)
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.2)
+    client = ResilientLLM(llm, breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(InjectedFault):
+            asyncio.run(client.ainvoke([]))
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.ainvoke([]))
+    assert llm.calls == 3  # refused without calling the provider
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    # A failed probe opens the circuit again
+    with pytest.raises(InjectedFault):
+        asyncio.run(client.ainvoke([]))
+    assert breaker.state == "open"
+
+    time.sleep(0.25)
+    llm.error_rate = 0.0
+    assert asyncio.run(client.ainvoke([])).content == REPLY
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_answers_from_the_documents():
+    from rag_system import RETRIEVAL_FALLBACK_MESSAGE, RAGSystem
+
+    llm = FaultyChatModel(REPLY, error_rate=1.0)
+    rag = RAGSystem()
+    rag.initialize(embeddings=HashingEmbeddings(), llm=llm)
+    rag.llm_client = ResilientLLM(llm, breaker=CircuitBreaker(2, reset_seconds=0.3))
+
+    for _ in range(2):
+        result = asyncio.run(rag.aquery("How much does an oil change cost?"))
+        assert result["response"].startswith(RETRIEVAL_FALLBACK_MESSAGE)
+    assert rag.llm_client.breaker.state == "open"
+
+    result, elapsed = _timed(rag.aquery("How much does an oil change cost?"))
+    assert result["response"].startswith(RETRIEVAL_FALLBACK_MESSAGE)
+    assert "Oil changes cost $49" in result["response"]
+    assert llm.calls == 2
+    assert elapsed < 0.2
+
+    time.sleep(0.35)
+    llm.error_rate = 0.0
+    result = asyncio.run(rag.aquery("How much does an oil change cost?"))
+    assert result["response"] == REPLY
+    assert rag.llm_client.breaker.state == "closed"
@@ -0,0 +1,57 @@
+"""ONNX Runtime embeddings must match the sentence-transformer they were exported from."""
+
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from config import settings
+from export_onnx import PARITY_SENTENCES
+from onnx_embeddings import (
+    MODEL_FILENAME,
+    QUANTIZED_MODEL_FILENAME,
+    OnnxEmbeddings,
+    default_model_path,
+)
+
+MIN_COSINE = 0.99
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MODEL_PATH = Path(settings.onnx_model_path or default_model_path(settings.embedding_model))
+if not MODEL_PATH.is_absolute():
+    MODEL_PATH = BACKEND_DIR / MODEL_PATH
+
+pytestmark = pytest.mark.skipif(
+    not (MODEL_PATH / MODEL_FILENAME).exists(),
+    reason=f"{MODEL_PATH / MODEL_FILENAME} not found; run export_onnx.py to create it",
+)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(settings.embedding_model, device="cpu")
+    return model.encode(PARITY_SENTENCES, normalize_embeddings=True)
+
+
+@pytest.mark.parametrize(
+    "quantized, model_file",
+    [(False, MODEL_FILENAME), (True, QUANTIZED_MODEL_FILENAME)],
+    ids=["fp32", "int8"],
+)
+def test_onnx_embeddings_match_sentence_transformer(reference, quantized, model_file):
+    if not (MODEL_PATH / model_file).exists():
+        pytest.skip(f"{MODEL_PATH / model_file} not found")
+
+    embeddings = OnnxEmbeddings(str(MODEL_PATH), quantized=quantized)
+    vectors = np.asarray(embeddings.embed_documents(PARITY_SENTENCES))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    cosines = (vectors * reference).sum(axis=1)
+
+    assert cosines.min() >= MIN_COSINE, (
+        f"min cosine {cosines.min():.4f} (mean {cosines.mean():.4f}) below {MIN_COSINE}"
+    )
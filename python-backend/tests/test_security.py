@@ -0,0 +1,50 @@
+"""Input validation verdicts must not change when the rules or the matcher do."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from security import SecurityValidator
+from security_bench import CORPUS, SequentialValidator, fuzz_queries
+
+RULES_FILE = Path(__file__).resolve().parent.parent / "security_rules.json"
+MAX_LENGTH = 500
+
+
+def _corpus():
+    return [
+        json.loads(line)
+        for line in CORPUS.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+@pytest.fixture(params=["builtin", "rules_file"])
+def validator(request):
+    if request.param == "builtin":
+        return SecurityValidator()
+    return SecurityValidator(rules_path=str(RULES_FILE))
+
+
+@pytest.mark.parametrize("item", _corpus(), ids=lambda item: item["query"][:40])
+def test_corpus_verdicts_are_unchanged(validator, item):
+    verdict = validator.check(item["query"], MAX_LENGTH)
+    assert (verdict.valid, verdict.message) == (item["valid"], item["message"])
+
+
+def test_random_inputs_match_the_sequential_scan(validator):
+    rules = validator.rules
+    injection = {rule.name: rule.regex.pattern for rule in rules.rules if rule.name.startswith("injection:")}
+    suspicious = {rule.name: rule.regex.pattern for rule in rules.rules if rule.name.startswith("suspicious:")}
+    reference = SequentialValidator(injection, suspicious, rules.max_special_char_ratio)
+
+    for query in fuzz_queries(list(injection.values()) + list(suspicious.values()), 5000, seed=7):
+        verdict = validator.check(query, MAX_LENGTH)
+        assert (verdict.valid, verdict.message) == reference.validate_input(query, MAX_LENGTH), query
+
+
+def test_rules_file_ships_the_builtin_rules():
+    data = json.loads(RULES_FILE.read_text(encoding="utf-8"))
+    assert data["injection"] == SecurityValidator.INJECTION_PATTERNS
+    assert data["suspicious"] == SecurityValidator.SUSPICIOUS_PATTERNS
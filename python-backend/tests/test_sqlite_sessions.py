@@ -0,0 +1,68 @@
+"""A busy SQLite session database must not stall the event loop."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+from sqlite_session_store import SQLiteSessionStore
+from stubs import HashingEmbeddings, StubChatModel
+
+REPLY = "An oil change costs $49."
+# How long another worker holds the database write lock, in seconds
+LOCK_SECONDS = 0.5
+
+
+def _rag(tmp_path):
+    from rag_system import RAGSystem
+
+    rag = RAGSystem()
+    rag.initialize(embeddings=HashingEmbeddings(), llm=StubChatModel(REPLY))
+    rag.sessions = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    return rag
+
+
+def _hold_write_lock(path, locked):
+    """Play another worker writing a long transaction."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    locked.set()
+    time.sleep(LOCK_SECONDS)
+    conn.execute("COMMIT")
+    conn.close()
+
+
+async def _longest_stall(coroutine):
+    """Run coroutine; return its result and the longest the loop went unscheduled."""
+    stalls = []
+
+    async def ticker():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append(time.perf_counter() - started)
+
+    ticking = asyncio.ensure_future(ticker())
+    try:
+        return await coroutine, max(stalls)
+    finally:
+        ticking.cancel()
+
+
+def test_chat_waits_for_a_locked_database_off_the_event_loop(tmp_path):
+    rag = _rag(tmp_path)
+    locked = threading.Event()
+    holder = threading.Thread(target=_hold_write_lock, args=(rag.sessions.path, locked))
+    holder.start()
+    locked.wait()
+
+    started = time.perf_counter()
+    result, stall = asyncio.run(_longest_stall(rag.aquery("How much does an oil change cost?")))
+    holder.join()
+
+    assert result["response"] == REPLY
+    assert result["memory_size"] == 2
+    # The session write had to wait for the lock...
+    assert time.perf_counter() - started >= LOCK_SECONDS * 0.8
+    # ...without blocking everything else on the loop meanwhile
+    assert stall < LOCK_SECONDS / 2
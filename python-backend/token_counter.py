@@ -0,0 +1,71 @@
+"""
+Prompt token counting.
+
+Uses tiktoken's cl100k_base encoding. Gemini's tokenizer is not public,
+so counts are an estimate, but a consistent one, which is what budgeting
+needs. If tiktoken (or its encoding file) is unavailable, falls back to
+roughly four characters per token.
+
+tiktoken downloads the encoding file on first use and caches it under
+TIKTOKEN_CACHE_DIR. Hosts without network access need that cache filled
+ahead of time, or startup waits out the download retries before falling
+back. RAGSystem loads the encoding at startup (load_encoding) so that
+the first chat request never pays for it.
+"""
+
+import threading
+from typing import Iterable
+
+ENCODING_NAME = "cl100k_base"
+
+# Per-message framing (role markers etc.) on top of the content tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                print(f"tiktoken unavailable ({e}); estimating tokens from length")
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def load_encoding() -> bool:
+    """Load the encoding now instead of on the first count; True if tiktoken is used."""
+    return _get_encoding() is not None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message) -> int:
+    """Tokens one chat message adds to a prompt, including framing."""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_message_tokens(messages: Iterable) -> int:
+    """Tokens of a chat prompt: message contents plus per-message overhead."""
+    return sum(message_tokens(message) for message in messages)
+
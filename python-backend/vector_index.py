@@ -0,0 +1,373 @@
+"""
+In-process exact vector index backed by NumPy.
+
+An alternative to Chroma for corpora of up to a few hundred thousand
+chunks. Embeddings are kept unit-normalized in one contiguous matrix, so
+a query is a single matrix-vector product followed by argpartition for
+the top k. The matrix is saved as a .npy file and opened memory-mapped,
+so worker processes share one copy through the page cache.
+
+The matrix can be stored as float16, or as int8 with one scale per
+vector, to cut index memory by 2x / 4x. In those modes a float32 copy is
+kept on disk (memory-mapped, so only the rows touched are paged in) and
+the best candidates from the quantized scan are re-scored against it.
+
+NumpyVectorIndex implements the subset of the langchain VectorStore
+interface that RAGSystem uses (add_texts, delete, persist,
+delete_collection, similarity_search_by_vector[_with_relevance_scores]),
+so the two backends are interchangeable. It also scores a batch of
+query vectors in one pass (similarity_search_by_vectors_with_relevance_scores).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+VECTORS_FILENAME = "vectors.npy"
+SCALES_FILENAME = "scales.npy"
+FULL_VECTORS_FILENAME = "vectors_full.npy"
+RECORDS_FILENAME = "records.json"
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# Rows converted to float32 at a time when scoring a quantized matrix
+_SCORE_BLOCK_ROWS = 4096
+
+
+class _Vectors(NamedTuple):
+    stored: np.ndarray  # search matrix, in the storage dtype
+    scales: Optional[np.ndarray]  # per-row scale (int8 only)
+    full: Optional[np.ndarray]  # float32 copy for re-scoring (quantized modes)
+
+    def __len__(self) -> int:
+        return self.stored.shape[0]
+
+
+def _concat(parts: List[_Vectors]) -> _Vectors:
+    return _Vectors(
+        *(
+            np.concatenate([getattr(part, name) for part in parts])
+            if getattr(parts[0], name) is not None
+            else None
+            for name in _Vectors._fields
+        )
+    )
+
+
+def _take(vectors: _Vectors, rows: List[int]) -> _Vectors:
+    return _Vectors(
+        *(
+            np.ascontiguousarray(array[rows]) if array is not None else None
+            for array in vectors
+        )
+    )
+
+
+def quantize(vectors: np.ndarray, dtype: np.dtype) -> _Vectors:
+    """Storage form of unit-normalized float32 vectors."""
+    if dtype == np.float32:
+        return _Vectors(vectors, None, None)
+    if dtype == np.float16:
+        return _Vectors(vectors.astype(np.float16), None, vectors)
+
+    # int8: symmetric, one scale per vector
+    scales = np.abs(vectors).max(axis=1, initial=0.0) / 127.0
+    scales[scales == 0] = 1.0
+    stored = np.rint(vectors / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return _Vectors(stored, scales.astype(np.float32), vectors)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _atomic_save(path: Path, write: Callable[[object], None], mode: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, mode) as handle:
+        write(handle)
+    os.replace(tmp_path, path)
+
+
+class NumpyVectorIndex:
+    """Exact cosine-similarity search over a contiguous embedding matrix."""
+
+    def __init__(
+        self,
+        path: str,
+        embedding_function,
+        dtype: str = "float32",
+        rescore_factor: int = 4,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype '{dtype}'")
+
+        self.path = Path(path)
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        # Quantized modes re-score k * rescore_factor candidates exactly
+        self.rescore_factor = max(1, rescore_factor)
+
+        self._lock = threading.RLock()
+        self._vectors: Optional[_Vectors] = None
+        self._pending: List[_Vectors] = []
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._id_set: set = set()
+        self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+
+        embeddings = np.asarray(
+            self.embedding_function.embed_documents(texts), dtype=np.float32
+        )
+        block = quantize(_normalize(embeddings), self.dtype)
+
+        with self._lock:
+            existing = self._id_set.intersection(ids)
+            if existing:
+                self._delete(existing)
+            self._pending.append(block)
+            self._ids.extend(ids)
+            self._id_set.update(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._delete(set(ids))
+
+    def persist(self) -> None:
+        """Write the matrices and records, then reopen the matrices memory-mapped."""
+        with self._lock:
+            vectors = self._consolidate()
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            files = (VECTORS_FILENAME, SCALES_FILENAME, FULL_VECTORS_FILENAME)
+            for filename, array in zip(files, vectors):
+                if array is not None:
+                    _atomic_save(
+                        self.path / filename,
+                        lambda handle, array=array: np.save(handle, array),
+                        "wb",
+                    )
+            records = {"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}
+            _atomic_save(
+                self.path / RECORDS_FILENAME,
+                lambda handle: handle.write(json.dumps(records).encode("utf-8")),
+                "wb",
+            )
+            self._vectors = self._open_files()
+
+    def delete_collection(self) -> None:
+        """Drop the in-memory index (files are removed by the caller)."""
+        with self._lock:
+            self._vectors = None
+            self._pending = []
+            self._ids, self._texts, self._metadatas = [], [], []
+            self._id_set = set()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: List[float], k: int = 4, **kwargs
+    ) -> List[Tuple[Document, float]]:
+        """Top-k documents with cosine distance (0 = identical)."""
+        return self.similarity_search_by_vectors_with_relevance_scores([embedding], k=k)[0]
+
+    def similarity_search_by_vectors_with_relevance_scores(
+        self, embeddings: List[List[float]], k: int = 4
+    ) -> List[List[Tuple[Document, float]]]:
+        """Top-k results for several query vectors, scored in one matrix product."""
+        from langchain_core.documents import Document
+
+        with self._lock:
+            vectors = self._consolidate()
+            texts, metadatas = self._texts, self._metadatas
+
+        count = len(vectors)
+        if count == 0 or k <= 0 or not embeddings:
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        k = min(k, count)
+        scores = self._scores(vectors, queries)
+
+        results = []
+        for column, query in enumerate(queries):
+            if vectors.full is None:
+                top = _top_k(scores[:, column], k)
+                top_scores = scores[top, column]
+            else:
+                # Approximate scan, then exact scores for the best candidates
+                # (rows read in file order, so the memory-mapped copy is
+                # touched sequentially)
+                candidates = np.sort(
+                    _top_k(scores[:, column], min(count, k * self.rescore_factor))
+                )
+                exact = vectors.full[candidates] @ query
+                order = np.argsort(exact)[::-1][:k]
+                top = candidates[order]
+                top_scores = exact[order]
+
+            results.append([
+                (
+                    Document(page_content=texts[i], metadata=metadatas[i]),
+                    float(1.0 - score),
+                )
+                for i, score in zip(top, top_scores)
+            ])
+        return results
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _distance in self.similarity_search_by_vector_with_relevance_scores(
+                embedding, k=k
+            )
+        ]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Same conversion Chroma uses for cosine distance
+        return lambda distance: 1.0 - distance
+
+    def stats(self) -> dict:
+        with self._lock:
+            vectors = self._consolidate()
+        stored = vectors.stored
+        resident = stored.nbytes + (vectors.scales.nbytes if vectors.scales is not None else 0)
+        return {
+            "backend": "numpy",
+            "chunks": len(vectors),
+            "dimensions": stored.shape[1] if stored.ndim == 2 else 0,
+            "dtype": str(self.dtype),
+            "matrix_bytes": int(resident),
+            "full_precision_bytes": int(vectors.full.nbytes) if vectors.full is not None else 0,
+            "memory_mapped": isinstance(stored, np.memmap),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold the lock)
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        records_path = self.path / RECORDS_FILENAME
+        if not (self.path / VECTORS_FILENAME).exists() or not records_path.exists():
+            return
+
+        try:
+            vectors = self._open_files()
+            records = json.loads(records_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load vector index at {self.path}: {e}")
+            return
+
+        if len(vectors) != len(records["ids"]) or vectors.stored.dtype != self.dtype:
+            print(f"Warning: Vector index at {self.path} is inconsistent; ignoring it")
+            return
+
+        self._vectors = vectors
+        self._ids = records["ids"]
+        self._texts = records["texts"]
+        self._metadatas = records["metadatas"]
+        self._id_set = set(self._ids)
+
+    def _open_files(self) -> _Vectors:
+        stored = np.load(self.path / VECTORS_FILENAME, mmap_mode="r")
+        scales = full = None
+        if self.dtype == np.int8:
+            scales = np.load(self.path / SCALES_FILENAME)
+        if self.dtype != np.float32:
+            full = np.load(self.path / FULL_VECTORS_FILENAME, mmap_mode="r")
+        return _Vectors(stored, scales, full)
+
+    def _consolidate(self) -> _Vectors:
+        """Fold pending added blocks into the index and return it."""
+        if self._vectors is None and not self._pending:
+            return quantize(np.empty((0, 0), dtype=np.float32), self.dtype)
+
+        if self._pending:
+            parts = ([self._vectors] if self._vectors is not None else []) + self._pending
+            self._vectors = _concat(parts)
+            self._pending = []
+        return self._vectors
+
+    def _delete(self, ids: set) -> None:
+        # Copy-on-write: searches holding the previous arrays are unaffected
+        vectors = self._consolidate()
+        keep = [row for row, chunk_id in enumerate(self._ids) if chunk_id not in ids]
+        if len(keep) == len(self._ids):
+            return
+        self._vectors = _take(vectors, keep)
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._id_set = set(self._ids)
+
+    def _scores(self, vectors: _Vectors, queries: np.ndarray) -> np.ndarray:
+        """Approximate cosine scores, one column per query."""
+        stored = vectors.stored
+        if stored.dtype == np.float32:
+            return stored @ queries.T
+
+        scores = np.empty((stored.shape[0], queries.shape[0]), dtype=np.float32)
+        for start in range(0, stored.shape[0], _SCORE_BLOCK_ROWS):
+            block = stored[start : start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start : start + _SCORE_BLOCK_ROWS] = block @ queries.T
+        if vectors.scales is not None:
+            scores *= vectors.scales[:, None]
+        return scores
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    count = scores.shape[0]
+    if k < count:
+        top = np.argpartition(scores, count - k)[count - k:]
+    else:
+        top = np.arange(count)
+    return top[np.argsort(scores[top])[::-1]]